@@ -0,0 +1,478 @@
+"""Benchmark suite for the simulation, autopilot, rendering and startup.
+
+Every benchmark runs under the SDL dummy video and audio drivers, so no
+window or sound device is needed.  Each one is timed as several samples of
+many calls, with inputs built from fixed seeds and the garbage collector
+paused, and the per-call minimum, median, mean and spread are written as
+JSON::
+
+    python bench.py -o baseline.json
+    python bench.py --compare baseline.json
+
+``--compare`` prints the change of every benchmark against a stored run and
+exits with status 1 when any slowed by more than ``--threshold``.  The
+per-call minimum is compared by default: background load only ever adds
+time, so it is the least noisy statistic.
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import copy
+import functools
+import gc
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+import pygame
+
+from constants import Screen, Physics, Ball, PowerupType
+from demo import DemoGame, predict_intercept
+from entities import create_ball, spawn_powerup
+from game import GameState, draw_world
+from planner import LookaheadPilot
+import synth
+from text import TextRenderer, get_font
+from vecenv import VecPongEnv
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Ball counts the physics step is timed at.
+BALL_COUNTS = (1, 100, 1_000, 10_000)
+
+# Shortest sample taken when the number of calls is chosen automatically.
+MIN_SAMPLE_TIME = 0.02
+
+# Setup functions keyed by benchmark name, with calls per sample and number
+# of samples.  A setup function builds fresh inputs, untimed, and returns
+# the callable to time.
+BENCHMARKS: dict[str, tuple[Callable[[], Callable], int | None, int]] = {}
+
+
+def benchmark(
+    name: str, number: int | None = None, repeat: int = 20
+) -> Callable:
+    """Register the decorated setup function as benchmark ``name``.
+
+    ``number`` fixes the calls per sample, which stateful benchmarks need
+    so every run times the same simulated span.  When omitted, enough calls
+    are made for a sample to last ``MIN_SAMPLE_TIME``.
+    """
+
+    def register(setup: Callable[[], Callable]) -> Callable[[], Callable]:
+        BENCHMARKS[name] = (setup, number, repeat)
+        return setup
+
+    return register
+
+
+def _display() -> pygame.Surface:
+    """Return the dummy display, creating it on first use."""
+    screen = pygame.display.get_surface()
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode((Screen.WIDTH, Screen.HEIGHT))
+    return screen
+
+
+def _state_with_balls(count: int) -> GameState:
+    """Return a seeded round holding ``count`` balls in the upper half.
+
+    Balls start high enough that none reach the paddle during a sample, so
+    every step updates the full population.
+    """
+    state = GameState(seed=0)
+    rng = random.Random(0)
+    for _ in range(count - len(state.balls)):
+        pos = (
+            rng.randint(Ball.SIZE, Screen.WIDTH - Ball.SIZE),
+            rng.randint(Ball.SIZE, Screen.HEIGHT // 2),
+        )
+        state.balls.add(create_ball(pos=pos, rng=rng))
+    return state
+
+
+@functools.cache
+def _template(count: int) -> GameState:
+    """Return the shared ``_state_with_balls(count)``; copy before use."""
+    return _state_with_balls(count)
+
+
+def _physics_setup(count: int) -> tuple[Callable[[], Callable], int]:
+    """Return the setup of ``physics.step.<count>`` and its calls per sample.
+
+    Small populations interleave several identical rounds so samples are
+    long enough to time reliably; every round still advances 30 steps.
+    """
+    rounds = min(10, max(1, 1000 // count))
+
+    def setup() -> Callable:
+        template = _template(count)
+        states = [copy.deepcopy(template) for _ in range(rounds)]
+        turns = iter(states * 30)
+        dt = 1.0 / Physics.TICK_RATE
+        return lambda: next(turns).step(dt, False, False)
+
+    return setup, 30 * rounds
+
+
+for _count in BALL_COUNTS:
+    _setup, _number = _physics_setup(_count)
+    benchmark(f"physics.step.{_count}", number=_number, repeat=40)(_setup)
+
+
+def _demo() -> DemoGame:
+    """Return a menu demo with a fixed random sequence."""
+    random.seed(0)
+    return DemoGame()
+
+
+@benchmark("demo.update", number=600)
+def _demo_update() -> Callable:
+    demo = _demo()
+    return lambda: demo.update(1.0 / Screen.FPS)
+
+
+@benchmark("demo.predict_intercept")
+def _demo_predict() -> Callable:
+    demo = _demo()
+    ball = demo.balls[0]
+    args = (ball.rect.x, ball.rect.y, ball.vx, ball.vy, demo.paddle.top)
+    return lambda: predict_intercept(*args)
+
+
+@benchmark("demo.draw")
+def _demo_draw() -> Callable:
+    screen = _display()
+    demo = _demo()
+    for _ in range(120):
+        demo.update(1.0 / Screen.FPS)
+    return lambda: demo.draw(screen, alpha=128)
+
+
+@functools.cache
+def _planner_frames() -> list[GameState]:
+    """Return 30 consecutive steps of a round for the planner benchmark."""
+    state = _state_with_balls(300)
+    rng = random.Random(0)
+    for kind in PowerupType:
+        slot = state.powerups.add(spawn_powerup(rng, kind))
+        state.balls.clear_powerup_slot(slot)
+    frames = []
+    for _ in range(30):
+        frames.append(copy.deepcopy(state))
+        state.step(1.0 / Physics.TICK_RATE, False, False)
+    return frames
+
+
+@benchmark("planner.controls.300", number=30)
+def _planner() -> Callable:
+    """Time planning over 30 recorded steps of a busy round.
+
+    The round holds 300 balls and a bar of every kind.  Its steps are
+    recorded up front so only planning is timed.
+    """
+    pilot = LookaheadPilot()
+    turns = iter(_planner_frames())
+    return lambda: pilot.controls(next(turns))
+
+
+@benchmark("game.render.100")
+def _game_render() -> Callable:
+    screen = _display()
+    state = _state_with_balls(100)
+    score_text = TextRenderer(get_font(32), "white")
+    label = score_text.render("Score:")
+
+    def frame() -> None:
+        screen.fill("black")
+        draw_world(screen, state, 0.5)
+        screen.blit(label, (380, 10))
+        score_text.draw(screen, "123", (460, 10))
+        pygame.display.flip()
+
+    return frame
+
+
+@benchmark("vecenv.step.4096", number=60)
+def _vecenv_step() -> Callable:
+    env = VecPongEnv(4096, seed=0)
+    actions = np.random.default_rng(0).integers(0, 4, (60, env.num_envs))
+    turns = iter(actions)
+    return lambda: env.step(next(turns))
+
+
+def _mixer() -> None:
+    """Start the dummy mixer with the settings used by the game."""
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(44100, -16, 1, 512)
+
+
+@benchmark("synth.init_sounds.cold", number=1, repeat=7)
+def _sounds_cold() -> Callable:
+    _mixer()
+    os.environ["PONG_CACHE_DIR"] = _temp_dir()
+    return synth.init_sounds
+
+
+@benchmark("synth.init_sounds.warm")
+def _sounds_warm() -> Callable:
+    _mixer()
+    os.environ["PONG_CACHE_DIR"] = _warm_cache()
+    return synth.init_sounds
+
+
+_WARM_CACHE: list[str] = []
+
+# Temporary directories created by this run, removed by :func:`run`.
+_TEMP_DIRS: list[tempfile.TemporaryDirectory] = []
+
+
+def _temp_dir() -> str:
+    """Return a new empty directory that is removed after the run."""
+    temp = tempfile.TemporaryDirectory(prefix="pong-bench-")
+    _TEMP_DIRS.append(temp)
+    return temp.name
+
+
+def _warm_cache() -> str:
+    """Return a sound cache directory that is already populated."""
+    if not _WARM_CACHE:
+        path = _temp_dir()
+        os.environ["PONG_CACHE_DIR"] = path
+        _mixer()
+        synth.init_sounds()
+        _WARM_CACHE.append(path)
+    return _WARM_CACHE[0]
+
+
+# Run in a fresh interpreter: start the game and exit as soon as the first
+# frame has been presented.
+_FIRST_FRAME = """
+import os, sys
+import pygame
+sys.path.insert(0, {root!r})
+_flip = pygame.display.flip
+def flip():
+    _flip()
+    os._exit(0)
+pygame.display.flip = flip
+import main
+main.main([])
+"""
+
+
+def _startup_setup(cache_dir: Callable[[], str]) -> Callable[[], Callable]:
+    def setup() -> Callable:
+        env = dict(os.environ, PONG_CACHE_DIR=cache_dir())
+        code = _FIRST_FRAME.format(root=ROOT)
+        return lambda: subprocess.run(
+            [sys.executable, "-c", code],
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    return setup
+
+
+benchmark("startup.first_frame.warm", number=1, repeat=7)(
+    _startup_setup(_warm_cache)
+)
+benchmark("startup.first_frame.cold", number=1, repeat=5)(
+    _startup_setup(_temp_dir)
+)
+
+
+def _sample(setup: Callable[[], Callable], number: int) -> float:
+    """Return the seconds taken by ``number`` calls on fresh inputs."""
+    fn = setup()
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def _autorange(setup: Callable[[], Callable]) -> int:
+    """Return a call count whose sample lasts at least MIN_SAMPLE_TIME."""
+    number = 1
+    while _sample(setup, number) < MIN_SAMPLE_TIME:
+        number *= 2
+    return number
+
+
+def measure(
+    setup: Callable[[], Callable], number: int | None, repeat: int
+) -> dict:
+    """Time ``repeat`` samples of ``number`` calls and summarise per call.
+
+    One extra sample is run first and discarded to warm caches.  A
+    ``number`` of ``None`` is chosen with :func:`_autorange`.
+
+    Returns
+    -------
+    dict
+        ``min``, ``median``, ``mean`` and ``stdev`` seconds per call, with
+        the ``number`` of calls per sample and the ``repeat`` count.
+    """
+    if number is None:
+        number = _autorange(setup)
+    _sample(setup, number)
+    samples = [_sample(setup, number) / number for _ in range(repeat)]
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run(names: list[str] | None = None, quick: bool = False) -> dict:
+    """Run the selected benchmarks and return the report.
+
+    Parameters
+    ----------
+    names:
+        Substrings selecting benchmarks by name; all run when omitted.
+    quick:
+        Take three samples of each benchmark instead of the full count.
+    """
+    results = {}
+    cache_dir = os.environ.get("PONG_CACHE_DIR")
+    try:
+        for name, (setup, number, repeat) in BENCHMARKS.items():
+            if names and not any(part in name for part in names):
+                continue
+            results[name] = measure(setup, number, 3 if quick else repeat)
+            print(
+                f"{name:32} {results[name]['min'] * 1e3:10.4f} ms",
+                file=sys.stderr,
+            )
+    finally:
+        # Sound benchmarks point the cache at temporary directories.
+        if cache_dir is None:
+            os.environ.pop("PONG_CACHE_DIR", None)
+        else:
+            os.environ["PONG_CACHE_DIR"] = cache_dir
+        _WARM_CACHE.clear()
+        while _TEMP_DIRS:
+            _TEMP_DIRS.pop().cleanup()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    report: dict, baseline: dict, threshold: float, stat: str = "min"
+) -> list[str]:
+    """Print ``report`` against ``baseline`` and return the regressions.
+
+    A benchmark regresses when its ``stat`` statistic is more than
+    ``threshold`` (a fraction) slower than in the baseline.
+    """
+    regressions = []
+    base = baseline.get("results", {})
+    print(f"{'benchmark':32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in report["results"].items():
+        if name not in base:
+            print(f"{name:32} {'-':>12} {result[stat] * 1e3:10.4f}ms")
+            continue
+        old, new = base[name][stat], result[stat]
+        change = new / old - 1.0 if old > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:32} {old * 1e3:10.4f}ms {new * 1e3:10.4f}ms "
+            f"{change:+8.1%}{flag}"
+        )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks from the command line and return the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-o", "--output", metavar="PATH", help="write the JSON report here"
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="PATH",
+        help="compare against a report saved earlier with --output",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="slowdown fraction reported as a regression (default 0.10)",
+    )
+    parser.add_argument(
+        "--stat",
+        choices=("min", "median", "mean"),
+        default="min",
+        help="statistic compared against the baseline (default min)",
+    )
+    parser.add_argument(
+        "-k",
+        dest="names",
+        action="append",
+        metavar="NAME",
+        help="only run benchmarks whose name contains NAME; repeatable",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="take fewer samples"
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="list the benchmarks and exit"
+    )
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    report = run(args.names, args.quick)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if compare(report, baseline, args.threshold, args.stat):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
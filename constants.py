@@ -2,7 +2,7 @@
 
 The values are organised into small classes to keep related settings
 together.  This module contains screen dimensions, paddle movement
-parameters, ball physics and power-up configuration.
+parameters, ball physics, simulation timing and power-up configuration.
 """
 
 from enum import Enum
@@ -16,6 +16,21 @@ class Screen:
     FPS = 60
 
 
+class Physics:
+    """Fixed-timestep simulation settings.
+
+    Ball and paddle speeds are expressed in pixels per frame at
+    ``Screen.FPS``; each physics step scales them by its share of a frame.
+    """
+
+    TICK_RATE = 60
+    MAX_FRAME_TIME = 0.25
+    # Under heavy load, balls at least FAR_DISTANCE pixels above the paddle
+    # may collide with other balls only every FAR_INTERVAL steps.
+    FAR_DISTANCE = 160
+    FAR_INTERVAL = 4
+
+
 class Paddle:
     """Paddle size and movement tuning constants."""
 
@@ -36,6 +51,7 @@ class Ball:
     MAX_SPEED = 15
     ANGLE_INFLUENCE = 5
     GRAVITY = 0.02
+    ELASTIC_COLLISIONS = False
 
 
 class PowerupType(str, Enum):
@@ -56,11 +72,17 @@ POWERUP_COLOURS = {
 
 
 class BasePowerup:
-    """Common dimensions and timing shared by power-ups."""
+    """Common dimensions and timing shared by power-ups.
+
+    ``MAX_ACTIVE`` limits how many bars of any type are on screen at once.
+    Balls track the bars they are inside in a 64-bit set, so it may not
+    exceed 64.
+    """
 
     WIDTH = 100
     HEIGHT = 4
     DURATION = 8.0
+    MAX_ACTIVE = 4
 
 
 class DuplicatePowerup(BasePowerup):
@@ -98,6 +120,7 @@ class SlowPowerup:
 
 __all__ = [
     "Screen",
+    "Physics",
     "Paddle",
     "Ball",
     "PowerupType",
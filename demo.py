@@ -2,6 +2,9 @@
 
 import random
 import math
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
 import pygame
 
 from constants import (
@@ -15,14 +18,267 @@ from constants import (
     PowerupType,
     POWERUP_COLOURS,
 )
-from entities import create_ball, spawn_powerup
+from entities import BallPool, PooledBall, spawn_powerup
+import sprites
+from powerups import PowerupSet
 from utils import duplicate_velocity
 
+if TYPE_CHECKING:
+    from game import GameState
+
+
+# Frames beyond which an intercept is too far away to be worth planning for.
+PREDICTION_HORIZON = 2000
+
+
+def _fall_time(y: float, vy: float, s: float, target: float) -> float | None:
+    """Return the first frame at which ``y`` reaches ``target`` going down.
+
+    Positions follow the game's integration, ``vy += g*s`` then
+    ``y += vy*s``, whose closed form after ``n`` frames is
+    ``y + s*vy*n + g*s*s*n*(n + 1)/2``.  ``None`` means never.
+    """
+    a = Ball.GRAVITY * s * s / 2
+    b = s * vy + a
+    c = y - target
+    if c >= 0:
+        return 0.0
+    if a == 0:
+        return -c / b if b > 0 else None
+    return (-b + math.sqrt(b * b - 4 * a * c)) / (2 * a)
+
+
+def _rise_time(y: float, vy: float, s: float) -> float | None:
+    """Return the first frame at which a rising ball reaches the top edge.
+
+    Uses the same closed form as :func:`_fall_time`.  ``None`` means
+    gravity turns the ball around first.
+    """
+    a = Ball.GRAVITY * s * s / 2
+    b = s * vy + a
+    if y <= 0:
+        return 0.0
+    if a == 0:
+        return -y / b if b < 0 else None
+    disc = b * b - 4 * a * y
+    if disc < 0 or b >= 0:
+        return None
+    return (-b - math.sqrt(disc)) / (2 * a)
+
+
+def _fold_x(x: float) -> float:
+    """Map an unfolded x-position back between the side walls."""
+    span = Screen.WIDTH - Ball.SIZE
+    x %= 2 * span
+    return x if x <= span else 2 * span - x
+
+
+def predict_intercept(
+    x: float,
+    y: float,
+    vx: float,
+    vy: float,
+    paddle_top: int,
+    speed_factor: float = 1.0,
+) -> tuple[float, int]:
+    """Return the predicted centre x-position and frames until a ball
+    reaches ``paddle_top``.
+
+    The flight is solved piecewise in closed form: an optional rise to the
+    top edge with its speed-up, then the fall to the paddle.  Side-wall
+    bounces are handled by folding the unobstructed x-position back into
+    the playfield, so the cost does not depend on how far away impact is.
+
+    Parameters
+    ----------
+    x, y:
+        Top-left corner of the ball's hitbox.
+    vx, vy:
+        Current velocity of the ball in pixels per frame.
+    paddle_top:
+        Y coordinate of the paddle's top edge.
+    speed_factor:
+        Slow-motion multiplier currently applied to the ball.
+    """
+    s = speed_factor
+    frames = 0.0
+
+    if vy < 0:
+        n = _rise_time(y, vy, s)
+        if n is not None:
+            # Bounce off the top and gradually speed up.
+            x += vx * s * n
+            y = 0.0
+            vy = -(vy + Ball.GRAVITY * s * n)
+            speed = math.hypot(vx, vy)
+            if 0 < speed < Ball.MAX_SPEED:
+                scale = min(
+                    speed * Ball.SPEED_INCREMENT, Ball.MAX_SPEED
+                ) / speed
+                vx *= scale
+                vy *= scale
+            frames = n
+
+    n = _fall_time(y, vy, s, paddle_top - Ball.SIZE)
+    if n is None or frames + n > PREDICTION_HORIZON:
+        n = PREDICTION_HORIZON - frames
+    x += vx * s * n
+    frames += n
+
+    return _fold_x(x) + Ball.SIZE / 2, math.ceil(frames)
+
+
+class _Prediction(NamedTuple):
+    """Cached intercept of one ball and the state it was computed from."""
+
+    x: float             # Predicted centre x-position at impact.
+    impact: float        # Autopilot frame at which the ball lands.
+    vx: float            # Horizontal velocity when predicted.
+    speed_factor: float  # Slow-motion multiplier when predicted.
+    vy: float            # Vertical velocity when predicted.
+    frame: float         # Autopilot frame of the prediction.
+
+
+class Autopilot:
+    """Paddle controller that chases the ball predicted to land first.
+
+    The same tracking logic drives the menu backdrop and headless play.
+    Predictions are cached per ball and reused while the ball's velocity
+    follows the predicted trajectory.  Side-wall bounces are part of that
+    trajectory, so only reversing ``vx`` keeps the prediction; a paddle or
+    top bounce, power-up or change of speed factor alters the velocity and
+    triggers a fresh prediction, as does a missed ball's impact passing.
+
+    Parameters
+    ----------
+    jitter:
+        Maximum random offset in pixels added to the target each frame so
+        the paddle motion does not look too mechanical.
+    rng:
+        Source of the jitter, e.g. a seeded :class:`random.Random`.
+        Defaults to the global generator.
+    """
+
+    def __init__(self, jitter: float = 2.0, rng=random) -> None:
+        self.jitter = jitter
+        self.rng = rng
+        self.frame = 0.0  # Frames elapsed, the time base of the cache.
+        self._cache: dict[int, _Prediction] = {}
+
+    def target(
+        self,
+        paddle: pygame.Rect,
+        balls: Iterable[tuple[int, float, float, float, float]],
+        frames: float = 1.0,
+        speed_factor: float = 1.0,
+    ) -> tuple[float, float]:
+        """Return the x-position to aim for and frames until impact.
+
+        Parameters
+        ----------
+        paddle:
+            The paddle being steered.
+        balls:
+            ``(id, x, y, vx, vy)`` tuples for every ball in play, where
+            ``x`` and ``y`` are the hitbox corner.  At least one ball must
+            be provided.
+        frames:
+            Frames simulated since the previous call.
+        speed_factor:
+            Slow-motion multiplier currently applied to the balls.
+        """
+        self.frame += frames
+        now = self.frame
+        gravity = Ball.GRAVITY * speed_factor
+        old_cache = self._cache
+        cache: dict[int, _Prediction] = {}
+
+        target_x: float | None = None
+        frames_left: float | None = None
+        for ball_id, x, y, vx, vy in balls:
+            pred = old_cache.get(ball_id)
+            if (
+                pred is None
+                or abs(pred.vx) != abs(vx)
+                or pred.speed_factor != speed_factor
+                or abs(pred.vy + gravity * (now - pred.frame) - vy) > 1e-6
+            ):
+                px, n = predict_intercept(
+                    x, y, vx, vy, paddle.top, speed_factor
+                )
+                pred = _Prediction(px, now + n, vx, speed_factor, vy, now)
+            cache[ball_id] = pred
+
+            fl = pred.impact - now
+            if frames_left is None or fl < frames_left:
+                target_x, frames_left = pred.x, fl
+        # Dropping entries for balls not seen this frame keeps the cache
+        # from growing as balls are missed.
+        self._cache = cache
+
+        assert target_x is not None and frames_left is not None
+        # Add a tiny offset each frame so the paddle motion is not perfectly
+        # straight.
+        target_x += self.rng.uniform(-self.jitter, self.jitter)
+        return target_x, frames_left
+
+    def controls(
+        self, state: "GameState", frames: float = 1.0
+    ) -> tuple[bool, bool]:
+        """Return the ``(left, right)`` controls to hold for ``state``.
+
+        Parameters
+        ----------
+        state:
+            Round being played by :func:`game.run_game` or headlessly.
+        frames:
+            Frames simulated since the previous call.
+        """
+        balls = state.balls
+        if not balls:
+            return False, False
+        speed_factor = (
+            SlowPowerup.SPEED_FACTOR if state.slow_timer > 0 else 1.0
+        )
+        target_x, frames_left = self.target(
+            state.paddle,
+            zip(
+                balls.id.tolist(),
+                balls.x.tolist(),
+                balls.y.tolist(),
+                balls.vx.tolist(),
+                balls.vy.tolist(),
+            ),
+            frames,
+            speed_factor,
+        )
+
+        # Only start moving once the paddle would otherwise arrive late.
+        center = state.paddle.centerx
+        dist = abs(target_x - center)
+        move_frames = math.ceil(dist / Paddle.SPEED)
+        if frames_left > move_frames + 3 or dist <= Paddle.SPEED / 2:
+            return False, False
+        return target_x < center, target_x > center
+
+
+@lru_cache(maxsize=None)
+def _dimmed(colour: str, alpha: int) -> pygame.Color:
+    """Return ``colour`` as it appears blended at ``alpha`` over black."""
+    c = pygame.Color(colour)
+    return pygame.Color(
+        c.r * alpha // 255, c.g * alpha // 255, c.b * alpha // 255
+    )
+
 
 class DemoGame:
     """Lightweight game loop that runs automatically on menu screens."""
 
     def __init__(self) -> None:
+        self.autopilot = Autopilot()
+        self.powerups = PowerupSet()  # Power-up bars on screen.
+        self._pool = BallPool()  # Recycles balls as they spawn and drop.
+        self.balls: list[PooledBall] = []
         self.reset()
 
     def reset(self) -> None:
@@ -35,8 +291,12 @@ class DemoGame:
         )
         self._paddle_center = float(self.paddle.centerx)
         self.paddle_vx: float = 0.0
-        self.balls = [create_ball()]  # Start with a single ball.
-        self.powerup: dict | None = None
+        for ball in self.balls:
+            self._pool.release(ball)
+        # Start with a single ball.
+        self.balls = [self._pool.acquire()]
+        self.powerups.clear()
+        self._inside = []  # Balls with any power-up bit set.
         self.paddle_power_timer = 0.0
         self.slow_timer: float = 0.0
 
@@ -55,24 +315,20 @@ class DemoGame:
         speed_factor = SlowPowerup.SPEED_FACTOR if self.slow_timer > 0 else 1.0
 
         # Autopilot: track the ball that will strike the paddle next.
-        # A small random offset keeps the motion from looking too mechanical.
         if self.balls:
-            target_x: float | None = None
-            frames_left: int | None = None
-            for ball in self.balls:
-                tx, fl = self._predict_intercept(ball)
-                if frames_left is None or fl < frames_left:
-                    target_x, frames_left = tx, fl
-            assert target_x is not None and frames_left is not None
-            # Add a tiny offset each frame so the paddle motion is not perfectly straight.
-            assert target_x is not None
-            target_x += random.uniform(-2, 2)
+            target_x, frames_left = self.autopilot.target(
+                self.paddle,
+                (
+                    (b.id, b.rect.x, b.rect.y, b.vx, b.vy)
+                    for b in self.balls
+                ),
+                speed_factor=speed_factor,
+            )
 
             # Determine when to start moving so the paddle reaches the target.
             dist = abs(target_x - self._paddle_center)
             move_frames = math.ceil(dist / Paddle.SPEED)
             # Aim to arrive a few frames before impact.
-            assert frames_left is not None
             start_moving = frames_left <= move_frames + 3
 
             if start_moving:
@@ -98,132 +354,140 @@ class DemoGame:
             + PaddleSmallPowerup.CHANCE
             + SlowPowerup.CHANCE
         )
-        if self.powerup is None and random.random() < spawn_prob:
-            self.powerup = spawn_powerup()
+        if not self.powerups.full and random.random() < spawn_prob:
+            slot = self.powerups.add(spawn_powerup())
+            # The slot's bit may still be set from an earlier bar.
+            for b in self._inside:
+                b.powerups &= ~(1 << slot)
 
-        for b in self.balls[:]:
-            rect = b["rect"]
+        for b in self.balls:
+            rect = b.rect
 
-            b["vy"] += Ball.GRAVITY * speed_factor
-            rect.x += b["vx"] * speed_factor
-            rect.y += b["vy"] * speed_factor
+            b.vy += Ball.GRAVITY * speed_factor
+            rect.x += b.vx * speed_factor
+            rect.y += b.vy * speed_factor
 
             if rect.left <= 0 or rect.right >= Screen.WIDTH:
-                b["vx"] *= -1
+                b.vx *= -1
             if rect.top <= 0:
-                b["vy"] *= -1
-                speed = math.hypot(b["vx"], b["vy"])
-                if speed < Ball.MAX_SPEED:
-                    speed = min(speed * Ball.SPEED_INCREMENT, Ball.MAX_SPEED)
-                    angle = math.atan2(b["vy"], b["vx"])
-                    b["vx"] = int(round(math.cos(angle) * speed))
-                    b["vy"] = int(round(math.sin(angle) * speed))
+                b.vy *= -1
+                # Scaled without rounding, as predict_intercept assumes.
+                speed = math.hypot(b.vx, b.vy)
+                if 0 < speed < Ball.MAX_SPEED:
+                    scale = min(
+                        speed * Ball.SPEED_INCREMENT, Ball.MAX_SPEED
+                    ) / speed
+                    b.vx *= scale
+                    b.vy *= scale
 
             # Bounce off the paddle.
-            if rect.colliderect(self.paddle) and b["vy"] > 0:
+            if rect.colliderect(self.paddle) and b.vy > 0:
                 offset = (
                     rect.centerx - self.paddle.centerx
                 ) / (Paddle.WIDTH / 2)
-                b["vy"] *= -1
-                b["vx"] += (
+                b.vy *= -1
+                b.vx += (
                     offset * Ball.ANGLE_INFLUENCE
                     + self.paddle_vx * Paddle.VEL_INFLUENCE
                 )
-                b["vx"] = max(
-                    min(b["vx"] * Ball.SPEED_INCREMENT, Ball.MAX_SPEED),
+                b.vx = max(
+                    min(b.vx * Ball.SPEED_INCREMENT, Ball.MAX_SPEED),
                     -Ball.MAX_SPEED,
                 )
-                b["vy"] = max(
-                    min(b["vy"] * Ball.SPEED_INCREMENT, Ball.MAX_SPEED),
+                b.vy = max(
+                    min(b.vy * Ball.SPEED_INCREMENT, Ball.MAX_SPEED),
                     -Ball.MAX_SPEED,
                 )
 
-            # Handle powerup collisions.
-            if self.powerup:
-                p_rect = self.powerup["rect"]
-                ball_id = b["id"]
-                if self.powerup["type"] is PowerupType.SLOW:
-                    if p_rect.colliderect(rect):
-                        self.slow_timer = SlowPowerup.EFFECT_TIME
-                        self.powerup = None
-                else:
-                    if (
-                        p_rect.colliderect(rect)
-                        and ball_id not in self.powerup["collided"]
-                    ):
-                        if self.powerup["type"] is PowerupType.DUPLICATE:
-                            vx_new, vy_new = duplicate_velocity(
-                                b["vx"],
-                                b["vy"],
-                            )
-                            nb = create_ball(up=b["vy"] < 0, pos=rect.center)
-                            nb["vx"], nb["vy"] = vx_new, vy_new
-                            self.balls.append(nb)
-                            self.powerup["collided"].update(
-                                {ball_id, nb["id"]}
-                            )
-                        else:
-                            is_big = (
-                                self.powerup["type"]
-                                is PowerupType.PADDLE_BIG
-                            )
-                            factor = (
-                                PaddleBigPowerup.ENLARGE_FACTOR
-                                if is_big
-                                else PaddleSmallPowerup.SHRINK_FACTOR
-                            )
-                            center = self.paddle.centerx
-                            self.paddle.width = int(Paddle.WIDTH * factor)
-                            self.paddle.centerx = center
-                            self.paddle_power_timer = (
-                                PaddleBigPowerup.SIZE_DURATION
-                            )
-                            self.powerup["collided"].add(ball_id)
-                    elif not p_rect.colliderect(rect):
-                        self.powerup["collided"].discard(ball_id)
-
-            if rect.top > Screen.HEIGHT:
-                self.balls.remove(b)
-
-        if self.powerup:
-            self.powerup["timer"] -= dt
-            if self.powerup["timer"] <= 0:
-                self.powerup = None
+        # Handle powerup collisions, testing only bars balls can reach.
+        if self.powerups:
+            self._collide_powerups()
+
+        # Drop balls that fell below the screen.  Walk backwards so each
+        # swap-remove only moves a ball that has already been checked.
+        balls = self.balls
+        for i in range(len(balls) - 1, -1, -1):
+            if balls[i].rect.top > Screen.HEIGHT:
+                self._pool.remove(balls, i)
+
+        self.powerups.expire(dt)
 
         if not self.balls:
             # Always keep at least one ball in play.
-            self.balls.append(create_ball())
+            self.balls.append(self._pool.acquire())
 
-    def draw(self, surface: pygame.Surface) -> None:
-        pygame.draw.rect(surface, "white", self.paddle)
-        for b in self.balls:
-            pygame.draw.ellipse(surface, "white", b["rect"])
-        if self.powerup:
-            colour = POWERUP_COLOURS.get(self.powerup["type"], "yellow")
-            pygame.draw.rect(surface, colour, self.powerup["rect"])
+    def _collide_powerups(self) -> None:
+        """Apply every power-up bar to the balls overlapping it."""
+        powerups = self.powerups
+        balls = self.balls
+        inside = self._inside
+        inside.clear()
+        # Duplicates appended during the loop start inside their parent's
+        # bars, so they are left for the next frame.
+        for i in range(len(balls)):
+            b = balls[i]
+            # Rebuild the bitset from this frame's hits, so a ball that
+            # left a bar may trigger it again later.
+            bits = powerups.touching(b.rect)
+            entered = bits & ~b.powerups
+            b.powerups = bits
+            if bits:
+                inside.append(b)
+            if entered:
+                self._enter_powerups(b, entered)
 
-    def _predict_intercept(self, ball: dict) -> tuple[float, int]:
-        """Return the predicted x-position and frames until impact."""
-        rect = ball["rect"].copy()
-        vx, vy = ball["vx"], ball["vy"]
+    def _enter_powerups(self, b: PooledBall, entered: int) -> None:
+        """Apply the bars in the bitset ``entered`` that ``b`` just entered."""
+        powerups = self.powerups
+        for slot, kind in enumerate(powerups.types):
+            if kind is None or not entered >> slot & 1:
+                continue
+            if kind is PowerupType.SLOW:
+                self.slow_timer = SlowPowerup.EFFECT_TIME
+                powerups.remove(slot)
+            elif kind is PowerupType.DUPLICATE:
+                vx_new, vy_new = duplicate_velocity(b.vx, b.vy)
+                nb = self._pool.acquire(up=b.vy < 0, pos=b.rect.center)
+                nb.vx, nb.vy = vx_new, vy_new
+                # Start inside the same bars so it does not re-trigger.
+                nb.powerups = b.powerups
+                self.balls.append(nb)
+                self._inside.append(nb)
+            else:
+                is_big = kind is PowerupType.PADDLE_BIG
+                factor = (
+                    PaddleBigPowerup.ENLARGE_FACTOR
+                    if is_big
+                    else PaddleSmallPowerup.SHRINK_FACTOR
+                )
+                center = self.paddle.centerx
+                self.paddle.width = int(Paddle.WIDTH * factor)
+                self.paddle.centerx = center
+                self.paddle_power_timer = PaddleBigPowerup.SIZE_DURATION
 
-        for frame in range(2000):
-            rect.x += vx
-            rect.y += vy
-            vy += Ball.GRAVITY
+    def draw(self, surface: pygame.Surface, alpha: int = 255) -> None:
+        """Draw the demo onto ``surface``.
 
-            if rect.left <= 0 or rect.right >= Screen.WIDTH:
-                vx *= -1
-            if rect.top <= 0:
-                vy *= -1
-                speed = math.hypot(vx, vy)
-                if speed < Ball.MAX_SPEED:
-                    speed = min(speed * Ball.SPEED_INCREMENT, Ball.MAX_SPEED)
-                    angle = math.atan2(vy, vx)
-                    vx = int(round(math.cos(angle) * speed))
-                    vy = int(round(math.sin(angle) * speed))
-
-            if rect.bottom >= self.paddle.top:
-                return rect.centerx, frame
-
-        return rect.centerx, 2000
+        Parameters
+        ----------
+        surface:
+            Destination surface.
+        alpha:
+            Opacity to draw with over a black background.  Colours are
+            dimmed up front, which looks the same as blending a translucent
+            layer but avoids a full-screen alpha blit.
+        """
+        white = _dimmed("white", alpha)
+        sprites.draw_rect(surface, white, self.paddle)
+        sprites.draw_balls(
+            surface,
+            [b.rect.x for b in self.balls],
+            [b.rect.y for b in self.balls],
+            white,
+        )
+        powerups = self.powerups
+        for slot in powerups.slots():
+            colour = POWERUP_COLOURS.get(powerups.types[slot], "yellow")
+            sprites.draw_rect(
+                surface, _dimmed(colour, alpha), powerups.rects[slot]
+            )
@@ -1,4 +1,10 @@
-"""Helpers for creating balls and power-up rectangles."""
+"""Helpers for creating balls and power-up rectangles.
+
+:func:`create_ball` returns a fresh dictionary and is fine for one-off
+balls.  Code that spawns and drops balls continually, such as the menu
+demo, uses a :class:`BallPool` instead, which recycles slotted
+:class:`PooledBall` objects and their rects.
+"""
 
 import random
 import pygame
@@ -17,7 +23,9 @@ from utils import random_velocity
 _next_ball_id = 0
 
 
-def create_ball(up: bool = False, pos: tuple[int, int] | None = None) -> dict:
+def create_ball(
+    up: bool = False, pos: tuple[int, int] | None = None, rng=random
+) -> dict:
     """Return a new ball dictionary.
 
     Parameters
@@ -27,18 +35,21 @@ def create_ball(up: bool = False, pos: tuple[int, int] | None = None) -> dict:
     pos:
         Optional starting position for the ball's centre.  When omitted a
         random location is chosen.
+    rng:
+        Source of randomness, e.g. a seeded :class:`random.Random`.
+        Defaults to the global generator.
     """
     global _next_ball_id
 
     # Create the rectangular hitbox for the ball.
     rect = pygame.Rect(0, 0, Ball.SIZE, Ball.SIZE)
     rect.center = pos or (
-        random.randint(40, Screen.WIDTH - 40),
+        rng.randint(40, Screen.WIDTH - 40),
         Screen.HEIGHT // 2,
     )
 
     # Pick a starting velocity for the ball.
-    vx, vy = random_velocity(up)
+    vx, vy = random_velocity(up, rng)
 
     # Store additional fields used for debugging and physics.
     ball = {
@@ -55,22 +66,112 @@ def create_ball(up: bool = False, pos: tuple[int, int] | None = None) -> dict:
     return ball
 
 
-def spawn_powerup() -> dict:
+class PooledBall:
+    """A ball with the same fields as :func:`create_ball` dictionaries.
+
+    ``__slots__`` keeps instances small and attribute access fast.  Balls
+    are handed out and taken back by a :class:`BallPool`.  ``powerups`` is
+    the bitset of power-up slots the ball is inside.
+    """
+
+    __slots__ = ("rect", "x", "y", "vx", "vy", "ax", "ay", "id", "powerups")
+
+    def __init__(self) -> None:
+        self.rect = pygame.Rect(0, 0, Ball.SIZE, Ball.SIZE)
+        self.x = self.y = 0.0
+        self.vx = self.vy = 0.0
+        self.ax = self.ay = 0.0
+        self.id = -1
+        self.powerups = 0
+
+
+class BallPool:
+    """Free list of :class:`PooledBall` objects.
+
+    Released balls, including their rects, are reused by later
+    :meth:`acquire` calls, so spawning and dropping balls in steady state
+    allocates nothing.
+    """
+
+    def __init__(self) -> None:
+        self._free: list[PooledBall] = []
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    def acquire(
+        self,
+        up: bool = False,
+        pos: tuple[int, int] | None = None,
+        rng=random,
+    ) -> PooledBall:
+        """Return a ball initialised exactly like :func:`create_ball`.
+
+        Parameters
+        ----------
+        up:
+            If ``True`` the ball initially travels upward.
+        pos:
+            Optional starting position for the ball's centre.  When omitted
+            a random location is chosen.
+        rng:
+            Source of randomness.  Defaults to the global generator.
+        """
+        global _next_ball_id
+
+        ball = self._free.pop() if self._free else PooledBall()
+        rect = ball.rect
+        rect.center = pos or (
+            rng.randint(40, Screen.WIDTH - 40),
+            Screen.HEIGHT // 2,
+        )
+        ball.x = float(rect.x)
+        ball.y = float(rect.y)
+        ball.vx, ball.vy = random_velocity(up, rng)
+        ball.ax = ball.ay = 0.0
+        ball.id = _next_ball_id
+        ball.powerups = 0
+        _next_ball_id += 1
+        return ball
+
+    def release(self, ball: PooledBall) -> None:
+        """Return ``ball`` to the pool for reuse."""
+        self._free.append(ball)
+
+    def remove(self, balls: list[PooledBall], index: int) -> None:
+        """Drop ``balls[index]`` in O(1) and release it to the pool.
+
+        The last ball is moved into the gap, so the order of ``balls``
+        changes.  When removing while iterating, walk the list backwards.
+        """
+        ball = balls[index]
+        last = balls.pop()
+        if last is not ball:
+            balls[index] = last
+        self.release(ball)
+
+
+def spawn_powerup(rng=random, kind: PowerupType | None = None) -> dict:
     """Return a randomly positioned power-up dictionary.
 
     A random type is chosen between ball duplication, paddle resizing and
-    slow motion.  The returned dictionary includes a ``rect`` for collision,
-    a countdown ``timer`` and a ``type`` key describing the effect.
+    slow motion unless ``kind`` names one.  The returned dictionary
+    includes a ``rect`` for collision, a countdown ``timer`` and a ``type``
+    key describing the effect; pass it to :meth:`powerups.PowerupSet.add`
+    to show it.  ``rng`` is the source of randomness and defaults to the
+    global generator.
     """
 
-    p_type = random.choice(
-        [
-            PowerupType.DUPLICATE,
-            PowerupType.PADDLE_BIG,
-            PowerupType.PADDLE_SMALL,
-            PowerupType.SLOW,
-        ]
-    )
+    p_type = kind
+    if p_type is None:
+        p_type = rng.choice(
+            [
+                PowerupType.DUPLICATE,
+                PowerupType.PADDLE_BIG,
+                PowerupType.PADDLE_SMALL,
+                PowerupType.SLOW,
+            ]
+        )
 
     if p_type is PowerupType.SLOW:
         width, height, duration = (
@@ -98,8 +199,8 @@ def spawn_powerup() -> dict:
         )
 
     # Position the powerup somewhere near the top half of the screen.
-    x = random.randint(20, Screen.WIDTH - width - 20)
-    y = random.randint(80, Screen.HEIGHT // 2)
+    x = rng.randint(20, Screen.WIDTH - width - 20)
+    y = rng.randint(80, Screen.HEIGHT // 2)
     rect = pygame.Rect(x, y, width, height)
 
-    return {"rect": rect, "timer": duration, "collided": set(), "type": p_type}
+    return {"rect": rect, "timer": duration, "type": p_type}
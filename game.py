@@ -1,16 +1,22 @@
 """Core gameplay loop for the single-player Pong clone.
 
-All rendering and physics updates occur here.  The :func:`run_game` function
-is called once per round and returns the score when no balls remain.
+The simulation of a round lives in :class:`GameState`, which knows nothing
+about the display so it can also be driven headlessly.  The :func:`run_game`
+function wraps it with input handling and rendering; it is called once per
+round and returns the score when no balls remain.
 """
 
 import pygame
 import sys
 import random
 import math
+import time
+
+import numpy as np
 
 from constants import (
     Screen,
+    Physics,
     Paddle,
     Ball,
     DuplicatePowerup,
@@ -22,12 +28,350 @@ from constants import (
 )
 from utils import snappy_ease, duplicate_velocity
 from entities import create_ball, spawn_powerup
-from synth import SOUNDS
+from physics import BallStore
+from powerups import PowerupSet
+from spatial import SpatialHash
+import sprites
+import synth
+from text import TextRenderer
+from render import DirtyRenderer
+from planner import LookaheadPilot
+from profiler import FrameProfiler, PHASES
+from governor import FrameGovernor, Quality
+from pipeline import Simulation
+from replay import Replay
+
+# Seconds of frame profile the debug overlay's P key writes to CSV.
+PROFILE_DUMP_SECONDS = 10.0
+
+# Width in pixels of the frame profile shown in debug mode.
+PROFILE_WIDTH = 200
+
+
+class GameState:
+    """Simulation state of a single round, independent of any display.
+
+    All randomness is drawn from a generator seeded with ``seed``, so a
+    round is reproduced exactly by the same seed and the same controls at
+    every step.
+
+    Parameters
+    ----------
+    ball_collisions:
+        Let balls bounce elastically off each other.
+    seed:
+        Seed for the round's random generator.  ``None`` seeds it from
+        system entropy.
+    """
+
+    def __init__(
+        self,
+        ball_collisions: bool = Ball.ELASTIC_COLLISIONS,
+        seed: int | None = None,
+    ) -> None:
+        self.rng = random.Random(seed)
+
+        # Set up the player's paddle near the bottom of the screen.
+        self.paddle = pygame.Rect(
+            Screen.WIDTH // 2 - Paddle.WIDTH // 2,
+            Screen.HEIGHT - 20 - Paddle.HEIGHT,
+            Paddle.WIDTH,
+            Paddle.HEIGHT,
+        )
+
+        self.balls = BallStore()  # Every active ball on the screen.
+        self.balls.add(create_ball(rng=self.rng))
+        self.grid = SpatialHash()  # Broad phase rebuilt every step.
+        self.ball_collisions = ball_collisions
+        self.powerups = PowerupSet()  # Power-up bars on screen.
+        self.score = 0
+        self.slow_timer: float = 0.0  # Duration remaining for slow effect.
+        self.paddle_power_timer = 0.0
+
+        # Sub-pixel paddle position and its value before the last step.
+        self.paddle_x = float(self.paddle.x)
+        self.prev_paddle_x = self.paddle_x
+        self.paddle_vx: float = 0.0         # Current horizontal velocity.
+        self.paddle_target_vx: float = 0.0  # Desired velocity from input.
+        self.paddle_start_vx: float = 0.0   # Velocity when a transition began.
+        self.transition_t = 1.0             # Progress of velocity transition.
+
+        # Optional :class:`profiler.FrameProfiler` timing the step's phases.
+        self.profiler = None
+        # Steps between collision tests of balls far above the paddle.
+        # Raised above one only to shed load, since it changes the round.
+        self.far_interval = 1
+        self.steps = 0  # Physics steps taken so far.
+
+    @property
+    def over(self) -> bool:
+        """``True`` once every ball has been missed."""
+        return not self.balls
+
+    def step(self, dt: float, left: bool, right: bool) -> None:
+        """Advance the round by one physics step.
+
+        Speeds are tuned in pixels per frame at ``Screen.FPS``, so every
+        per-frame quantity is scaled by the share of a frame that ``dt``
+        covers.  Calling this with a constant ``dt`` gives gameplay that is
+        independent of the rendering frame rate.
+
+        Parameters
+        ----------
+        dt:
+            Length of the step in seconds.
+        left, right:
+            Whether the left and right controls are held this frame.
+        """
+        paddle = self.paddle
+        balls = self.balls
+        frames = dt * Screen.FPS  # Share of a nominal frame being simulated.
+
+        if self.slow_timer > 0:
+            self.slow_timer = max(0.0, self.slow_timer - dt)
+        speed_factor = SlowPowerup.SPEED_FACTOR if self.slow_timer > 0 else 1.0
+
+        if self.paddle_power_timer > 0:
+            self.paddle_power_timer -= dt
+            if self.paddle_power_timer <= 0:
+                # Restore paddle size.
+                center = paddle.centerx
+                paddle.width = Paddle.WIDTH
+                paddle.centerx = center
+
+        # Translate the held controls into a target velocity.
+        new_target_vx = 0
+        if left and paddle.left > 0:
+            new_target_vx = -Paddle.SPEED
+        if right and paddle.right < Screen.WIDTH:
+            new_target_vx = Paddle.SPEED
 
+        # Start a smooth transition whenever the target velocity changes.
+        if new_target_vx != self.paddle_target_vx:
+            self.paddle_target_vx = new_target_vx
+            self.paddle_start_vx = self.paddle_vx
+            self.transition_t = 0.0
 
-def run_game(screen, clock, font, debug_font) -> int:
+        # Interpolate towards the target velocity using easing.
+        if self.transition_t < 1.0:
+            self.transition_t = min(
+                self.transition_t + Paddle.TRANSITION_RATE * dt, 1.0
+            )
+            prog = snappy_ease(self.transition_t)
+            self.paddle_vx = self.paddle_start_vx + (
+                self.paddle_target_vx - self.paddle_start_vx
+            ) * prog
+        else:
+            self.paddle_vx = self.paddle_target_vx
+
+        # Move the paddle and keep it on screen.  Resizing and clamping move
+        # the rect directly, so resync the sub-pixel position when they do.
+        if paddle.x != int(self.paddle_x):
+            self.paddle_x = float(paddle.x)
+        self.prev_paddle_x = self.paddle_x
+        self.paddle_x += self.paddle_vx * frames
+        paddle.x = int(self.paddle_x)
+        paddle.clamp_ip(pygame.Rect(0, 0, Screen.WIDTH, Screen.HEIGHT))
+        if paddle.x != int(self.paddle_x):
+            self.paddle_x = float(paddle.x)
+        prof = self.profiler
+        if prof is not None:
+            prof.mark("input")
+
+        # Randomly spawn a powerup.  The chances are per frame, so convert
+        # them to the equivalent probability for this step.
+        spawn_prob = 1.0 - (
+            1.0
+            - (
+                DuplicatePowerup.CHANCE
+                + PaddleBigPowerup.CHANCE
+                + PaddleSmallPowerup.CHANCE
+                + SlowPowerup.CHANCE
+            )
+        ) ** frames
+        if not self.powerups.full and self.rng.random() < spawn_prob:
+            slot = self.powerups.add(spawn_powerup(self.rng))
+            balls.clear_powerup_slot(slot)
+            synth.queue("powerup")
+        if prof is not None:
+            prof.mark("spawn")
+
+        # Update all balls in one vectorised step.
+        bounces, hits = balls.step(
+            speed_factor * frames, paddle, self.paddle_vx, dt
+        )
+        self.score += hits
+
+        if self.ball_collisions:
+            # Balls far above the paddle may take turns to collide, each
+            # every ``far_interval`` steps.
+            select = None
+            interval = self.far_interval
+            if interval > 1:
+                far = balls.ry < paddle.top - Physics.FAR_DISTANCE
+                turn = balls.id % interval == self.steps % interval
+                select = np.flatnonzero(~far | turn)
+                self.grid.build(balls.rx[select], balls.ry[select])
+            else:
+                self.grid.build(balls.rx, balls.ry)
+            bounces += balls.collide(self.grid, select)
+        self.steps += 1
+        if bounces:
+            synth.queue("bounce", bounces)
+
+        # Apply the power-up bars the balls passed through.
+        if self.powerups:
+            self._collide_powerups()
+
+        # Remove balls that fall below the screen.
+        balls.cull()
+
+        # Powerups expire after a set time.
+        self.powerups.expire(dt)
+        if prof is not None:
+            prof.mark("physics")
+
+    def _collide_powerups(self) -> None:
+        """Apply every power-up bar to the balls that entered it this step.
+
+        Each ball's swept path is tested only against the bars it can
+        reach, so fast balls cannot skip a bar.  A ball triggers a bar once
+        on entry and again only after leaving it, tracked by the bitset in
+        ``balls.powerups``.
+        """
+        balls = self.balls
+        powerups = self.powerups
+        paddle = self.paddle
+        hit_balls, hit_slots = powerups.hits(
+            balls.px, balls.py, balls.x, balls.y
+        )
+        bits = np.left_shift(np.uint64(1), hit_slots.astype(np.uint64))
+        fresh = (balls.powerups[hit_balls] & bits) == 0
+        # Rebuild the bitsets from this step's hits, so a ball that left a
+        # bar may trigger it again later.
+        balls.powerups[:] = 0
+        np.bitwise_or.at(balls.powerups, hit_balls, bits)
+
+        for slot in np.unique(hit_slots).tolist():
+            kind = powerups.types[slot]
+            on_bar = hit_slots == slot
+            if kind is PowerupType.SLOW:
+                self.slow_timer = SlowPowerup.EFFECT_TIME
+                powerups.remove(slot)
+                continue
+            entered = hit_balls[on_bar & fresh]
+            if not entered.size:
+                continue
+            if kind is PowerupType.DUPLICATE:
+                for i in entered.tolist():
+                    vx_new, vy_new = duplicate_velocity(
+                        balls.vx[i],
+                        balls.vy[i],
+                        self.rng,
+                    )
+                    nb = create_ball(
+                        up=balls.vy[i] < 0,
+                        pos=balls.center(i),
+                        rng=self.rng,
+                    )
+                    nb["vx"], nb["vy"] = vx_new, vy_new
+                    # Start inside the same bars so it does not re-trigger.
+                    balls.add(nb, powerups=int(balls.powerups[i]))
+                synth.queue("powerup", len(entered))
+            else:
+                factor = (
+                    PaddleBigPowerup.ENLARGE_FACTOR
+                    if kind is PowerupType.PADDLE_BIG
+                    else PaddleSmallPowerup.SHRINK_FACTOR
+                )
+                center = paddle.centerx
+                paddle.width = int(Paddle.WIDTH * factor)
+                paddle.centerx = center
+                self.paddle_power_timer = PaddleBigPowerup.SIZE_DURATION
+
+    def paddle_rect(self, alpha: float) -> pygame.Rect:
+        """Return the paddle rect blended between the last two steps.
+
+        Parameters
+        ----------
+        alpha:
+            Fraction of a physics step elapsed since the latest state.
+        """
+        rect = self.paddle.copy()
+        rect.x = int(
+            self.prev_paddle_x + (self.paddle_x - self.prev_paddle_x) * alpha
+        )
+        return rect
+
+
+def draw_world(
+    screen: pygame.Surface,
+    state: GameState,
+    alpha: float,
+    plain_balls: bool = False,
+) -> tuple[list[pygame.Rect], list, list]:
+    """Draw the paddle, balls and power-up of ``state`` onto ``screen``.
+
+    Parameters
+    ----------
+    screen:
+        Destination surface.
+    state:
+        Round to draw, or a :class:`pipeline.Snapshot` of one.
+    alpha:
+        Fraction of a physics step elapsed since the latest state; positions
+        are interpolated from the previous one.
+    plain_balls:
+        Draw balls as plain squares with :func:`sprites.draw_squares`,
+        which is cheaper than round sprites once there are many balls.
+
+    Returns
+    -------
+    tuple
+        Rects covered by the paddle and power-ups, and the lists of ``x`` and
+        ``y`` ball corners that were drawn.
+    """
+    drawn = [sprites.draw_rect(screen, "white", state.paddle_rect(alpha))]
+    draw_x, draw_y = state.balls.interpolated(alpha)
+    if plain_balls:
+        sprites.draw_squares(screen, draw_x, draw_y)
+    draw_x, draw_y = draw_x.tolist(), draw_y.tolist()
+    if not plain_balls:
+        sprites.draw_balls(screen, draw_x, draw_y)
+    powerups = state.powerups
+    for slot in powerups.slots():
+        colour = POWERUP_COLOURS.get(powerups.types[slot], "yellow")
+        drawn.append(
+            sprites.draw_rect(screen, colour, powerups.rects[slot])
+        )
+    return drawn, draw_x, draw_y
+
+
+def run_game(
+    screen,
+    clock,
+    font,
+    debug_font,
+    tick_rate: int = Physics.TICK_RATE,
+    ball_collisions: bool = Ball.ELASTIC_COLLISIONS,
+    dirty_rects: bool = False,
+    record: str | None = None,
+    autopilot: bool = False,
+    threaded: bool = False,
+) -> int:
     """Run a single game session and return the player's score.
 
+    Physics advances in fixed steps of ``1 / tick_rate`` seconds driven by
+    an accumulator, independent of how fast frames are rendered.  Several
+    steps run after a slow frame, and the renderer interpolates between the
+    last two physics states so motion stays smooth at any refresh rate.
+    A :class:`governor.FrameGovernor` lowers the quality level while frames
+    run over budget and restores it once they recover.
+
+    With ``threaded`` the round is simulated by a
+    :class:`pipeline.Simulation` thread instead, and each frame draws the
+    latest snapshot it published.
+
     Parameters
     ----------
     screen:
@@ -38,213 +382,167 @@ def run_game(screen, clock, font, debug_font) -> int:
         Font object for UI rendering.
     debug_font:
         Font used when debug mode is enabled.
+    tick_rate:
+        Number of physics steps simulated per second.
+    ball_collisions:
+        Let balls bounce elastically off each other.
+    dirty_rects:
+        Erase and present only the regions that changed each frame
+        instead of redrawing and flipping the whole window.
+    record:
+        Path to write a :class:`replay.Replay` of the round to once it
+        ends, or the window is closed.
+    autopilot:
+        Let a :class:`planner.LookaheadPilot` steer the paddle instead of
+        the keyboard.
+    threaded:
+        Run the simulation on a worker thread, overlapping it with
+        rendering and presenting frames.
     """
 
     debug_mode = False
-
-    # Set up the player's paddle near the bottom of the screen.
-    paddle = pygame.Rect(
-        Screen.WIDTH // 2 - Paddle.WIDTH // 2,
-        Screen.HEIGHT - 20 - Paddle.HEIGHT,
-        Paddle.WIDTH,
-        Paddle.HEIGHT,
+    renderer = DirtyRenderer(screen) if dirty_rects else None
+    recording = Replay(tick_rate, ball_collisions) if record else None
+    state = GameState(
+        ball_collisions, None if recording is None else recording.seed
     )
+    pilot = LookaheadPilot(tick_rate=tick_rate) if autopilot else None
+    pilot_frames = 0.0  # Frames simulated since the pilot last planned.
 
-    balls = [create_ball()]  # List of active balls on the screen.
-    powerup = None           # Active powerup, or ``None`` if none is present.
-    score = 0
-    slow_timer: float = 0.0  # Duration remaining for the slow effect.
-
-    paddle_power_timer = 0.0
-
-    # Pre-render the score label so it doesn't need to be recreated.
-    score_label_surf = font.render("Score:", True, "white")
+    # Text is drawn from cached glyphs so frames avoid ``Font.render``.
+    score_text = TextRenderer(font, "white")
+    debug_text = TextRenderer(debug_font, "green")
+    score_label_surf = score_text.render("Score:")
     # Track animation progress for the bouncing effect on the score number.
     score_bounce_t = 1.0
+    shown_score = 0  # Score drawn in the previous frame.
 
-    paddle_vx: float = 0.0           # Current horizontal velocity.
-    paddle_target_vx: float = 0.0    # Desired velocity based on input.
-    paddle_start_vx: float = 0.0     # Velocity at the start of a transition.
-    transition_t = 1.0      # Progress of velocity transition.
+    # Time every phase of the frame for the debug overlay.  The threaded
+    # simulation's time is shown too, but it does not hold up the frame.
+    if threaded:
+        profiler = FrameProfiler(
+            PHASES + ("simulation",), background=("simulation",)
+        )
+    else:
+        profiler = FrameProfiler()
+    profile_stats = profiler.percentiles()
+    # Coarse physics only thins out ball-ball collisions, and would make a
+    # recorded round impossible to replay.
+    coarse = ball_collisions and recording is None
+    governor = FrameGovernor(
+        lowest=Quality.COARSE_PHYSICS if coarse else Quality.STILL_SCORE
+    )
+
+    step_dt = 1.0 / tick_rate
+    accumulator = 0.0  # Simulation time owed to the physics.
+    sim = None
+    if threaded:
+        # From here on only the simulation thread touches ``state``.
+        sim = Simulation(state, tick_rate, recording, pilot, governor)
+        sim_busy = 0.0  # Simulation time already charged to the profiler.
+        sim.start()
+    else:
+        state.profiler = profiler
+        governor.apply(state, synth.AUDIO)
 
     while True:
         # ``dt`` is the time (in seconds) since the last loop iteration.
         dt = clock.tick(Screen.FPS) / 1000.0
-        if slow_timer > 0:
-            slow_timer = max(0.0, slow_timer - dt)
-        speed_factor = SlowPowerup.SPEED_FACTOR if slow_timer > 0 else 1.0
-
-        if paddle_power_timer > 0:
-            paddle_power_timer -= dt
-            if paddle_power_timer <= 0:
-                # Restore paddle size.
-                center = paddle.centerx
-                paddle.width = Paddle.WIDTH
-                paddle.centerx = center
+        # Cap the debt after long stalls so we never spiral trying to catch up.
+        accumulator += min(dt, Physics.MAX_FRAME_TIME)
+        profiler.begin()
 
-        # Handle window events and toggle debug mode with the M key.
+        # Handle window events and toggle debug mode with the M key.  In
+        # debug mode P dumps the recent frame profile to a CSV file.
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if sim is not None:
+                    sim.stop()
+                if recording is not None:
+                    recording.score = state.score
+                    recording.save(record)
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.KEYDOWN and event.key == pygame.K_m:
                 debug_mode = not debug_mode
-
-        # Read player input for left/right movement.
-        keys = pygame.key.get_pressed()
-        new_target_vx = 0
-        if keys[pygame.K_LEFT] and paddle.left > 0:
-            new_target_vx = -Paddle.SPEED
-        if keys[pygame.K_RIGHT] and paddle.right < Screen.WIDTH:
-            new_target_vx = Paddle.SPEED
-
-        # Start a smooth transition whenever the target velocity changes.
-        if new_target_vx != paddle_target_vx:
-            paddle_target_vx = new_target_vx
-            paddle_start_vx = paddle_vx
-            transition_t = 0.0
-
-        # Interpolate towards the target velocity using easing.
-        if transition_t < 1.0:
-            transition_t = min(transition_t + Paddle.TRANSITION_RATE * dt, 1.0)
-            prog = snappy_ease(transition_t)
-            paddle_vx = paddle_start_vx + (
-                paddle_target_vx - paddle_start_vx
-            ) * prog
+            elif (
+                event.type == pygame.KEYDOWN
+                and event.key == pygame.K_p
+                and debug_mode
+            ):
+                profiler.dump_csv(
+                    time.strftime("frame-profile-%Y%m%d-%H%M%S.csv"),
+                    PROFILE_DUMP_SECONDS,
+                )
+        profiler.mark("events")
+
+        # Read player input for left/right movement.  The simulation
+        # thread runs the autopilot itself.
+        if pilot is None:
+            keys = pygame.key.get_pressed()
+            left, right = keys[pygame.K_LEFT], keys[pygame.K_RIGHT]
+            if sim is not None:
+                sim.send(left, right)
+        elif sim is None:
+            left, right = pilot.controls(state, pilot_frames)
+            pilot_frames = 0.0
+        profiler.mark("input")
+
+        if sim is None:
+            while accumulator >= step_dt:
+                state.step(step_dt, left, right)
+                accumulator -= step_dt
+                pilot_frames += step_dt * Screen.FPS
+                if recording is not None:
+                    recording.record(left, right)
+
+                # End the round when there are no balls left.
+                if state.over:
+                    synth.AUDIO.throttle("bounce")
+                    if recording is not None:
+                        recording.score = state.score
+                        recording.save(record)
+                    return state.score
+            # Play this frame's coalesced sound events.
+            synth.flush()
+            profiler.mark("audio")
+            world = state
+            alpha = accumulator / step_dt
         else:
-            paddle_vx = paddle_target_vx
-
-        # Move the paddle and keep it on screen.
-        paddle.x = int(paddle.x + paddle_vx)
-        paddle.clamp_ip(pygame.Rect(0, 0, Screen.WIDTH, Screen.HEIGHT))
-
-        # Randomly spawn a powerup.
-        spawn_prob = (
-            DuplicatePowerup.CHANCE
-            + PaddleBigPowerup.CHANCE
-            + PaddleSmallPowerup.CHANCE
-            + SlowPowerup.CHANCE
+            if sim.error is not None:
+                raise sim.error
+            world = sim.read()
+            busy = sim.busy
+            profiler.add("simulation", busy - sim_busy)
+            sim_busy = busy
+            if world.over:
+                sim.join()
+                synth.AUDIO.throttle("bounce")
+                if recording is not None:
+                    recording.score = world.score
+                    recording.save(record)
+                return world.score
+            # The snapshot's step was due at ``stamp``; draw it as far
+            # towards its state as time has moved on since.
+            alpha = min(
+                max((time.perf_counter() - world.stamp) / step_dt, 0.0), 1.0
+            )
+        balls = world.balls
+        quality = governor.level
+        if world.score != shown_score and quality < Quality.STILL_SCORE:
+            # Restart the bounce animation whenever the score increases.
+            score_bounce_t = 0.0
+        shown_score = world.score
+
+        # Draw the world part-way between the last two physics states.
+        if renderer:
+            renderer.begin()
+        else:
+            screen.fill("black")
+        drawn, draw_x, draw_y = draw_world(
+            screen, world, alpha, quality >= Quality.PLAIN_BALLS
         )
-        if powerup is None and random.random() < spawn_prob:
-            powerup = spawn_powerup()
-            SOUNDS["powerup"].play()
-
-        # Update all balls.
-        for b in balls[:]:
-            rect = b["rect"]
-            prev_vx, prev_vy = b["vx"], b["vy"]
-
-            # Apply gravity then update position using sub-pixel accuracy.
-            b["vy"] += Ball.GRAVITY * speed_factor
-            b["x"] += b["vx"] * speed_factor
-            b["y"] += b["vy"] * speed_factor
-            rect.x = round(b["x"])
-            rect.y = round(b["y"])
-
-            # Bounce off the side walls.
-            if rect.left <= 0 or rect.right >= Screen.WIDTH:
-                b["vx"] *= -1
-                SOUNDS["bounce"].play()
-            if rect.top <= 0:
-                # Bounce off the top and gradually speed up.
-                b["vy"] *= -1
-                SOUNDS["bounce"].play()
-                speed = math.hypot(b["vx"], b["vy"])
-                if speed < Ball.MAX_SPEED:
-                    speed = min(speed * Ball.SPEED_INCREMENT, Ball.MAX_SPEED)
-                    angle = math.atan2(b["vy"], b["vx"])
-                    b["vx"] = math.cos(angle) * speed
-                    b["vy"] = math.sin(angle) * speed
-
-            # Bounce off the paddle and angle the ball based on where it hits.
-            if rect.colliderect(paddle) and b["vy"] > 0:
-                offset = (rect.centerx - paddle.centerx) / (Paddle.WIDTH / 2)
-                b["vy"] *= -1
-                SOUNDS["bounce"].play()
-                b["vx"] += (
-                    offset * Ball.ANGLE_INFLUENCE
-                    + paddle_vx * Paddle.VEL_INFLUENCE
-                )
-                b["vx"] = max(
-                    min(b["vx"] * Ball.SPEED_INCREMENT, Ball.MAX_SPEED),
-                    -Ball.MAX_SPEED,
-                )
-                b["vy"] = max(
-                    min(b["vy"] * Ball.SPEED_INCREMENT, Ball.MAX_SPEED),
-                    -Ball.MAX_SPEED,
-                )
-                score += 1
-                # Restart the bounce animation whenever the score increases.
-                score_bounce_t = 0.0
-
-            # Handle collisions with the powerup bar.
-            if powerup:
-                p_rect = powerup["rect"]
-                ball_id = b["id"]
-                if powerup["type"] is PowerupType.SLOW:
-                    if p_rect.colliderect(rect):
-                        slow_timer = SlowPowerup.EFFECT_TIME
-                        powerup = None
-                else:
-                    if (
-                        p_rect.colliderect(rect)
-                        and ball_id not in powerup["collided"]
-                    ):
-                        if powerup["type"] is PowerupType.DUPLICATE:
-                            vx_new, vy_new = duplicate_velocity(
-                                b["vx"],
-                                b["vy"],
-                            )
-                            nb = create_ball(up=b["vy"] < 0, pos=rect.center)
-                            nb["vx"], nb["vy"] = vx_new, vy_new
-                            balls.append(nb)
-                            powerup["collided"].update({ball_id, nb["id"]})
-                            SOUNDS["powerup"].play()
-                        else:
-                            factor = (
-                                PaddleBigPowerup.ENLARGE_FACTOR
-                                if powerup["type"] is PowerupType.PADDLE_BIG
-                                else PaddleSmallPowerup.SHRINK_FACTOR
-                            )
-                            center = paddle.centerx
-                            paddle.width = int(Paddle.WIDTH * factor)
-                            paddle.centerx = center
-                            paddle_power_timer = (
-                                PaddleBigPowerup.SIZE_DURATION
-                            )
-                            powerup["collided"].add(ball_id)
-                    elif not p_rect.colliderect(rect):
-                        # Once a ball leaves, allow it to trigger again later.
-                        powerup["collided"].discard(ball_id)
-
-            # Compute acceleration for debug display.
-            if dt > 0:
-                b["ax"] = (b["vx"] - prev_vx) / dt
-                b["ay"] = (b["vy"] - prev_vy) / dt
-            else:
-                b["ax"] = b["ay"] = 0.0
-
-            # Remove balls that fall below the screen.
-            if rect.top > Screen.HEIGHT:
-                balls.remove(b)
-
-        # Powerups expire after a set time.
-        if powerup:
-            powerup["timer"] -= dt
-            if powerup["timer"] <= 0:
-                powerup = None
-
-        # End the round when there are no balls left.
-        if not balls:
-            return score
-
-        screen.fill("black")
-        pygame.draw.rect(screen, "white", paddle)
-        for b in balls:
-            pygame.draw.ellipse(screen, "white", b["rect"])
-        if powerup:
-            colour = POWERUP_COLOURS.get(powerup["type"], "yellow")
-            pygame.draw.rect(screen, colour, powerup["rect"])
+        profiler.mark("render")
 
         # Update the bounce animation timer.
         if score_bounce_t < 1.0:
@@ -254,26 +552,76 @@ def run_game(screen, clock, font, debug_font) -> int:
             offset = 0
 
         # Draw the current score in the top-right corner with bouncing digits.
-        score_num_surf = font.render(str(score), True, "white")
-        total_w = score_label_surf.get_width() + score_num_surf.get_width() + 5
+        score_str = str(world.score)
+        label_w = score_label_surf.get_width()
+        total_w = label_w + score_text.width(score_str) + 5
         x = Screen.WIDTH - total_w - 10
-        screen.blit(score_label_surf, (x, 10))
-        screen.blit(
-            score_num_surf,
-            (x + score_label_surf.get_width() + 5, 10 + offset),
+        drawn.append(screen.blit(score_label_surf, (x, 10)))
+        drawn.append(
+            score_text.draw(screen, score_str, (x + label_w + 5, 10 + offset))
         )
 
         if debug_mode:
-            # Display ball statistics on the left side of the screen.
-            lines = [f"Balls: {len(balls)}"]
-            for b in balls:
-                speed = math.hypot(b["vx"], b["vy"])
-                accel = math.hypot(b["ax"], b["ay"])
-                lines.append(f"id {b['id']} spd {speed:.2f} acc {accel:.2f}")
+            # Display ball statistics on the left side of the screen.  Only
+            # as many balls as fit on screen are listed, and none once the
+            # debug text is simplified.
+            line_h = debug_text.height + 2
+            lines = [
+                f"Balls: {len(balls)}",
+                f"Quality: {quality.name.lower()} ({int(quality)})",
+            ]
+            shown = 0
+            if quality < Quality.PLAIN_DEBUG:
+                shown = max(0, (Screen.HEIGHT - 10) // line_h - len(lines))
+            speeds = np.hypot(balls.vx[:shown], balls.vy[:shown]).tolist()
+            accels = np.hypot(balls.ax[:shown], balls.ay[:shown]).tolist()
+            for ball_id, speed, accel in zip(
+                balls.id[:shown].tolist(), speeds, accels
+            ):
+                lines.append(f"id {ball_id} spd {speed:.2f} acc {accel:.2f}")
             y = 10
             for line in lines:
-                surf = debug_font.render(line, True, "green")
-                screen.blit(surf, (10, y))
-                y += surf.get_height() + 2
-
-        pygame.display.flip()
+                drawn.append(debug_text.draw(screen, line, (10, y)))
+                y += line_h
+
+            # Show where the frame time goes on the right.  Percentiles are
+            # refreshed a few times a second so the numbers stay readable.
+            if profiler.frames % 15 == 0:
+                profile_stats = profiler.percentiles()
+            x = Screen.WIDTH - PROFILE_WIDTH - 10
+            y = 50
+            drawn.append(debug_text.draw(screen, "ms p50 p95 p99", (x, y)))
+            y += line_h
+            rows = ("frame",)
+            if quality < Quality.PLAIN_DEBUG:
+                rows += profiler.phases
+            for name in rows:
+                p50, p95, p99 = (profile_stats[name] * 1e3).tolist()
+                drawn.append(
+                    debug_text.draw(
+                        screen,
+                        f"{name} {p50:.2f} {p95:.2f} {p99:.2f}",
+                        (x, y),
+                    )
+                )
+                y += line_h
+            drawn.append(
+                profiler.draw_sparkline(
+                    screen,
+                    pygame.Rect(x, y + 4, PROFILE_WIDTH, 40),
+                    1.0 / Screen.FPS,
+                )
+            )
+        profiler.mark("text")
+
+        if renderer:
+            for rect in drawn:
+                renderer.mark(rect)
+            renderer.mark_many(draw_x, draw_y, Ball.SIZE, Ball.SIZE)
+            renderer.present()
+        else:
+            pygame.display.flip()
+        profiler.mark("flip")
+        profiler.end()
+        if governor.update(profiler) and sim is None:
+            governor.apply(state, synth.AUDIO)
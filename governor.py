@@ -0,0 +1,121 @@
+"""Adaptive quality levels that keep gameplay frames within budget.
+
+A :class:`FrameGovernor` watches the frame times recorded by a
+:class:`profiler.FrameProfiler`.  While the median of recent frames is over
+the budget it steps down one :class:`Quality` level at a time, each giving
+up a little more polish for speed.  It steps back up only after frames have
+stayed well under budget for longer, so the level does not flap between two
+settings when the load sits near the limit.
+"""
+
+from enum import IntEnum
+
+import numpy as np
+
+from constants import Screen, Physics
+from profiler import FrameProfiler
+
+# Frames whose median time is compared against the budget.
+WINDOW = 30
+
+# Share of the budget the median must exceed to step down, and stay under
+# to step back up.
+DOWNGRADE_AT = 1.0
+UPGRADE_AT = 0.6
+
+# Frames to wait after a change before stepping down or up again.  Stepping
+# up waits longer, so the cost of the better level is known to fit.
+DOWNGRADE_HOLD = WINDOW
+UPGRADE_HOLD = 4 * WINDOW
+
+# Flushes between bounce sounds once they are throttled.
+BOUNCE_INTERVAL = 6
+
+
+class Quality(IntEnum):
+    """Quality levels from best to cheapest.
+
+    Levels are cumulative: each one also keeps every saving of the levels
+    before it.
+    """
+
+    FULL = 0
+    QUIET_BOUNCES = 1    # Play bounce sounds at most a few times a second.
+    PLAIN_DEBUG = 2      # Show only summary lines in the debug overlay.
+    PLAIN_BALLS = 3      # Draw balls as squares instead of circles.
+    STILL_SCORE = 4      # Skip the score bounce animation.
+    COARSE_PHYSICS = 5   # Collide balls far from the paddle less often.
+
+
+class FrameGovernor:
+    """Choose a :class:`Quality` level from recent frame times.
+
+    Parameters
+    ----------
+    budget:
+        Target frame time in seconds.
+    lowest:
+        Cheapest level the governor may choose.  Replays should stop before
+        :attr:`Quality.COARSE_PHYSICS`, which changes the simulation, and
+        so should rounds without ball collisions, where it saves nothing.
+    """
+
+    def __init__(
+        self,
+        budget: float = 1.0 / Screen.FPS,
+        lowest: Quality = Quality.COARSE_PHYSICS,
+    ) -> None:
+        self.budget = budget
+        self.lowest = lowest
+        self.level = Quality.FULL
+        self._since = 0  # Frames since the level last changed.
+
+    def update(self, profiler: FrameProfiler) -> bool:
+        """Look at the latest frames and return whether the level changed.
+
+        Call once per frame, after :meth:`profiler.FrameProfiler.end`.
+        """
+        self._since += 1
+        if len(profiler) < WINDOW:
+            return False
+        median = float(np.median(profiler.frame_times(WINDOW)))
+        level = self.level
+        if (
+            median > self.budget * DOWNGRADE_AT
+            and self._since >= DOWNGRADE_HOLD
+            and level < self.lowest
+        ):
+            level += 1
+        elif (
+            median < self.budget * UPGRADE_AT
+            and self._since >= UPGRADE_HOLD
+            and level > Quality.FULL
+        ):
+            level -= 1
+        if level == self.level:
+            return False
+        self.level = Quality(level)
+        self._since = 0
+        return True
+
+    def apply(self, state, audio) -> None:
+        """Set the simulation and sound options of the current level.
+
+        Parameters
+        ----------
+        state:
+            :class:`game.GameState` whose far-ball interval is set.
+        audio:
+            :class:`synth.AudioScheduler` whose bounce sounds are throttled.
+        """
+        level = self.level
+        audio.throttle(
+            "bounce",
+            BOUNCE_INTERVAL if level >= Quality.QUIET_BOUNCES else 1,
+        )
+        state.far_interval = (
+            Physics.FAR_INTERVAL if level >= Quality.COARSE_PHYSICS else 1
+        )
+
+
+__all__ = ["FrameGovernor", "Quality"]
@@ -0,0 +1,94 @@
+"""Headless batch play used for soak tests and capacity planning.
+
+Rounds are simulated with :class:`game.GameState` and steered by the
+:class:`demo.Autopilot`.  No window is opened, the mixer is never started and
+frames are not throttled, so rounds run as fast as the CPU allows.
+"""
+
+import json
+import time
+
+from constants import Screen, Physics, Ball
+from demo import Autopilot
+from game import GameState
+
+
+def play_round(
+    max_frames: int | None = None,
+    ball_collisions: bool = Ball.ELASTIC_COLLISIONS,
+    seed: int | None = None,
+) -> dict:
+    """Play one autopilot round and return its statistics.
+
+    Parameters
+    ----------
+    max_frames:
+        Optional cap on the number of frames to simulate.  A strong
+        autopilot can keep a round going indefinitely, so soak tests should
+        usually set one.
+    ball_collisions:
+        Let balls bounce elastically off each other.
+    seed:
+        Seed for the round and the autopilot's jitter, so the same seed
+        replays the same round.  ``None`` seeds from system entropy.
+
+    Returns
+    -------
+    dict
+        ``score``, simulated ``duration`` in seconds, ``frames``,
+        ``peak_balls``, achieved ``fps`` and whether the round ``finished``
+        because every ball was missed.  With no rendering, a frame is one
+        fixed physics step at ``Physics.TICK_RATE``.
+    """
+    state = GameState(ball_collisions, seed)
+    pilot = Autopilot(rng=state.rng)
+    # Use the same fixed physics step as real play.
+    dt = 1.0 / Physics.TICK_RATE
+
+    frames = 0
+    peak_balls = len(state.balls)
+    start = time.perf_counter()
+    while not state.over:
+        if max_frames is not None and frames >= max_frames:
+            break
+        left, right = pilot.controls(state, dt * Screen.FPS)
+        state.step(dt, left, right)
+        frames += 1
+        peak_balls = max(peak_balls, len(state.balls))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "score": state.score,
+        "duration": frames * dt,
+        "frames": frames,
+        "peak_balls": peak_balls,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "finished": state.over,
+    }
+
+
+def run_headless(
+    rounds: int,
+    out_path: str,
+    max_frames: int | None = None,
+    ball_collisions: bool = Ball.ELASTIC_COLLISIONS,
+) -> list[dict]:
+    """Play ``rounds`` autopilot rounds and write their stats as JSON.
+
+    Parameters
+    ----------
+    rounds:
+        Number of rounds to play.
+    out_path:
+        File the JSON report is written to.
+    max_frames:
+        Optional per-round frame cap passed to :func:`play_round`.
+    ball_collisions:
+        Let balls bounce elastically off each other.
+    """
+    results = [
+        play_round(max_frames, ball_collisions) for _ in range(rounds)
+    ]
+    with open(out_path, "w", encoding="utf-8") as fh:
+        json.dump({"rounds": results}, fh, indent=2)
+    return results
@@ -1,30 +1,195 @@
-"""Program entry point for the single-player Pong game."""
+"""Program entry point for the single-player Pong game.
+
+Start-up is staged so the first menu frame appears as early as possible.
+Only the display is initialised before the menu is shown; the mixer, sound
+synthesis and the gameplay modules are loaded on a background thread, and
+sounds stay silent until they are ready.  Modules are imported inside
+:func:`main` so ``--startup-trace`` can time each import.
+"""
+
+import time
+
+_START = time.perf_counter()  # Reference point for --startup-trace.
+
+import argparse
+import json
+import os
+import threading
 
-import pygame
 from constants import Screen
-from menus import run_menu, run_game_over
-from game import run_game
-from synth import init_sounds
+from startup import StartupTrace
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(description="Single-player Pong")
+    parser.add_argument(
+        "--headless",
+        type=int,
+        metavar="ROUNDS",
+        help="play ROUNDS autopilot rounds without a window and exit",
+    )
+    parser.add_argument(
+        "--stats",
+        default="headless_stats.json",
+        metavar="PATH",
+        help="where headless mode writes its JSON report",
+    )
+    parser.add_argument(
+        "--max-frames",
+        type=int,
+        metavar="N",
+        help="stop each headless round after N frames",
+    )
+    parser.add_argument(
+        "--ball-collisions",
+        action="store_true",
+        help="let balls bounce elastically off each other",
+    )
+    parser.add_argument(
+        "--dirty-rects",
+        action="store_true",
+        help="redraw and present only the changed parts of the screen",
+    )
+    parser.add_argument(
+        "--threaded",
+        action="store_true",
+        help="simulate on a worker thread, overlapping physics with drawing",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="save a replay of every round played into DIR",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="watch the replay at PATH instead of playing",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="with --replay, re-simulate without a window and print the "
+        "result",
+    )
+    parser.add_argument(
+        "--startup-trace",
+        action="store_true",
+        help="print the time spent in each start-up import and init step",
+    )
+    return parser.parse_args(argv)
+
+
+def _replay_path(directory: str) -> str:
+    """Return a new timestamped replay file name inside ``directory``."""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"round-{stamp}.pongrep")
+    n = 1
+    while os.path.exists(path):
+        n += 1
+        path = os.path.join(directory, f"round-{stamp}-{n}.pongrep")
+    return path
+
+
+def _load_in_background(trace: StartupTrace) -> threading.Thread:
+    """Start the mixer, sounds and gameplay modules on a worker thread."""
+
+    def load() -> None:
+        import pygame
+
+        with trace.step("mixer init"):
+            try:
+                pygame.mixer.init(44100, -16, 1, 512)
+            except pygame.error:
+                pass
+        if pygame.mixer.get_init():
+            with trace.step("import synth"):
+                from synth import init_sounds
+            with trace.step("init sounds"):
+                init_sounds()
+        else:
+            # No audio device: play without sound.
+            trace.mark("sounds disabled")
+        with trace.step("import game"):
+            import game  # noqa: F401
 
+    thread = threading.Thread(target=load, name="loader", daemon=True)
+    thread.start()
+    return thread
 
-def main() -> None:
+
+def main(argv: list[str] | None = None) -> None:
     """Set up Pygame and run the high level game loops."""
-    pygame.mixer.pre_init(44100, -16, 1, 512)
-    pygame.init()
-    init_sounds()
-    screen = pygame.display.set_mode((Screen.WIDTH, Screen.HEIGHT))
-    pygame.display.set_caption("Single-Player Pong")
+    args = parse_args(argv)
+    trace = StartupTrace(args.startup_trace, _START)
+    if args.headless is not None:
+        from headless import run_headless
+
+        run_headless(
+            args.headless, args.stats, args.max_frames, args.ball_collisions
+        )
+        return
+    if args.replay and args.fast:
+        from playback import simulate
+        from replay import Replay
+
+        print(json.dumps(simulate(Replay.load(args.replay))))
+        return
+
+    with trace.step("import pygame"):
+        import pygame
+    with trace.step("init display"):
+        pygame.display.init()
+        pygame.font.init()
+        screen = pygame.display.set_mode((Screen.WIDTH, Screen.HEIGHT))
+        pygame.display.set_caption("Single-Player Pong")
     clock = pygame.time.Clock()
+    loader = _load_in_background(trace)
+
+    with trace.step("import text"):
+        from text import get_font
+
+    if args.replay:
+        from playback import play_replay
+        from replay import Replay
 
-    # Pre-create fonts so we don't recreate them every frame.
-    font = pygame.font.SysFont(None, 32)
-    debug_font = pygame.font.SysFont(None, 24)
+        play_replay(
+            screen, clock, get_font(32), get_font(24), Replay.load(args.replay)
+        )
+        return
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+
+    with trace.step("import menus"):
+        from menus import run_menu, run_game_over
 
     # Show the menu screen first.
-    run_menu(screen, clock)
+    mode = run_menu(screen, clock, lambda: trace.mark("first menu frame"))
+
+    # The loader has usually finished while the menu was shown.
+    with trace.step("wait for loader"):
+        loader.join()
+    from game import run_game
+
+    # Fetch fonts once so we don't recreate them every frame.
+    with trace.step("load fonts"):
+        font = get_font(32)
+        debug_font = get_font(24)
+
     while True:
         # Play one round of the game and get the final score.
-        final_score = run_game(screen, clock, font, debug_font)
+        final_score = run_game(
+            screen,
+            clock,
+            font,
+            debug_font,
+            ball_collisions=args.ball_collisions,
+            dirty_rects=args.dirty_rects,
+            record=_replay_path(args.record) if args.record else None,
+            autopilot=mode == "autopilot",
+            threaded=args.threaded,
+        )
 
         # When the player loses, display the game over screen and ask what to do.
         choice = run_game_over(screen, clock, final_score)
@@ -32,7 +197,7 @@ def main() -> None:
             # Immediately start another round.
             continue
         # Otherwise return to the main menu.
-        run_menu(screen, clock)
+        mode = run_menu(screen, clock)
 
 
 if __name__ == "__main__":
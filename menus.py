@@ -2,13 +2,61 @@
 
 import pygame
 import sys
+from functools import lru_cache
 from constants import Screen
 from demo import DemoGame
-from synth import SOUNDS
+from synth import play
+from text import get_font
 
 
-def run_menu(screen, clock) -> None:
-    """Display the main menu until the user chooses to start or quit.
+@lru_cache(maxsize=16)
+def _menu_layer(
+    title: str,
+    options: tuple[str, ...],
+    selected: int,
+    subtitle: str | None = None,
+) -> tuple[tuple[pygame.Surface, tuple[int, int]], ...]:
+    """Return the pre-rendered text of a menu screen as blit pairs.
+
+    The result only depends on the arguments, so it is cached and rebuilt
+    just when the selection or score changes; drawing a menu frame is then
+    a single ``Surface.blits`` call.
+
+    Parameters
+    ----------
+    title:
+        Heading shown in the upper third of the screen.
+    options:
+        Menu entries listed below the centre of the screen.
+    selected:
+        Index of the highlighted option.
+    subtitle:
+        Optional line shown between the title and the options.
+    """
+    title_font = get_font(48)
+    menu_font = get_font(32)
+    layer = []
+
+    def centred(surf: pygame.Surface, y: int) -> None:
+        layer.append((surf, (Screen.WIDTH // 2 - surf.get_width() // 2, y)))
+
+    centred(
+        title_font.render(title, True, "white"), Screen.HEIGHT // 3 - 50
+    )
+    if subtitle is not None:
+        centred(
+            menu_font.render(subtitle, True, "white"), Screen.HEIGHT // 2 - 40
+        )
+    for i, option in enumerate(options):
+        colour = "yellow" if i == selected else "white"
+        centred(
+            menu_font.render(option, True, colour), Screen.HEIGHT // 2 + i * 40
+        )
+    return tuple(layer)
+
+
+def run_menu(screen, clock, on_first_frame=None) -> str:
+    """Display the main menu until the user chooses a mode or quits.
 
     Parameters
     ----------
@@ -16,17 +64,21 @@ def run_menu(screen, clock) -> None:
         Display surface used for rendering.
     clock:
         Clock for controlling the frame rate.
+    on_first_frame:
+        Optional callable invoked once the first frame has been shown.
+
+    Returns
+    -------
+    str
+        ``"player"`` to play the round yourself or ``"autopilot"`` to
+        watch the lookahead autopilot play it.
     """
 
-    options = ["Start Game", "Quit"]
+    options = ("Start Game", "Autopilot", "Quit")
+    modes = {"Start Game": "player", "Autopilot": "autopilot"}
     selected = 0
 
-    title_font = pygame.font.SysFont(None, 48)
-    menu_font = pygame.font.SysFont(None, 32)
     demo = DemoGame()
-    demo_surface = pygame.Surface(
-        (Screen.WIDTH, Screen.HEIGHT), pygame.SRCALPHA
-    )
 
     while True:
         dt = clock.tick(Screen.FPS) / 1000.0
@@ -38,45 +90,30 @@ def run_menu(screen, clock) -> None:
                 if event.key in (pygame.K_UP, pygame.K_w):
                     # Move selection up.
                     selected = (selected - 1) % len(options)
-                    SOUNDS["menu_move"].play()
+                    play("menu_move")
                 elif event.key in (pygame.K_DOWN, pygame.K_s):
                     # Move selection down.
                     selected = (selected + 1) % len(options)
-                    SOUNDS["menu_move"].play()
+                    play("menu_move")
                 elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
-                    if options[selected] == "Start Game":
-                        SOUNDS["menu_select"].play()
-                        return
+                    play("menu_select")
+                    if options[selected] in modes:
+                        return modes[options[selected]]
                     pygame.quit()
-                    SOUNDS["menu_select"].play()
                     sys.exit()
 
         demo.update(dt)
         screen.fill("black")
-        demo_surface.fill((0, 0, 0, 0))
-        demo.draw(demo_surface)
-        demo_surface.set_alpha(128)
-        screen.blit(demo_surface, (0, 0))
-        title = title_font.render("Single-Player Pong", True, "white")
-        screen.blit(
-            title,
-            (
-                Screen.WIDTH // 2 - title.get_width() // 2,
-                Screen.HEIGHT // 3 - 50,
-            ),
+        # Draw the demo at half brightness straight onto the screen.
+        demo.draw(screen, alpha=128)
+        screen.blits(
+            _menu_layer("Single-Player Pong", options, selected),
+            doreturn=False,
         )
-
-        for i, option in enumerate(options):
-            colour = "yellow" if i == selected else "white"
-            surf = menu_font.render(option, True, colour)
-            screen.blit(
-                surf,
-                (
-                    Screen.WIDTH // 2 - surf.get_width() // 2,
-                    Screen.HEIGHT // 2 + i * 40,
-                ),
-            )
         pygame.display.flip()
+        if on_first_frame is not None:
+            on_first_frame()
+            on_first_frame = None
 
 
 def run_game_over(screen, clock, score: int) -> str:
@@ -97,10 +134,8 @@ def run_game_over(screen, clock, score: int) -> str:
         ``"retry"`` or ``"menu"`` depending on the player's selection.
     """
 
-    options = ["Retry", "Main Menu"]
+    options = ("Retry", "Main Menu")
     selected = 0
-    title_font = pygame.font.SysFont(None, 48)
-    menu_font = pygame.font.SysFont(None, 32)
 
     while True:
         clock.tick(Screen.FPS) / 1000.0
@@ -112,42 +147,18 @@ def run_game_over(screen, clock, score: int) -> str:
                 if event.key in (pygame.K_UP, pygame.K_w):
                     # Move selection up.
                     selected = (selected - 1) % len(options)
-                    SOUNDS["menu_move"].play()
+                    play("menu_move")
                 elif event.key in (pygame.K_DOWN, pygame.K_s):
                     # Move selection down.
                     selected = (selected + 1) % len(options)
-                    SOUNDS["menu_move"].play()
+                    play("menu_move")
                 elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
-                    SOUNDS["menu_select"].play()
+                    play("menu_select")
                     return "retry" if selected == 0 else "menu"
 
         screen.fill("black")
-        title = title_font.render("Game Over", True, "white")
-        screen.blit(
-            title,
-            (
-                Screen.WIDTH // 2 - title.get_width() // 2,
-                Screen.HEIGHT // 3 - 50,
-            ),
+        screen.blits(
+            _menu_layer("Game Over", options, selected, f"Score: {score}"),
+            doreturn=False,
         )
-
-        score_surf = menu_font.render(f"Score: {score}", True, "white")
-        screen.blit(
-            score_surf,
-            (
-                Screen.WIDTH // 2 - score_surf.get_width() // 2,
-                Screen.HEIGHT // 2 - 40,
-            ),
-        )
-
-        for i, option in enumerate(options):
-            colour = "yellow" if i == selected else "white"
-            surf = menu_font.render(option, True, colour)
-            screen.blit(
-                surf,
-                (
-                    Screen.WIDTH // 2 - surf.get_width() // 2,
-                    Screen.HEIGHT // 2 + i * 40,
-                ),
-            )
         pygame.display.flip()
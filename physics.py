@@ -0,0 +1,452 @@
+"""Vectorised ball physics for the gameplay loop.
+
+Balls are kept in a :class:`BallStore`, a struct-of-arrays container that
+holds positions, velocities, IDs and an alive mask in NumPy arrays.  Each
+physics step advances the whole population with a handful of array
+operations instead of a Python loop over per-ball dictionaries, so the cost
+of a frame stays flat even when duplicate power-ups push the ball count into
+the thousands.
+"""
+
+import numpy as np
+import pygame
+
+from constants import Screen, Paddle, Ball
+from spatial import SpatialHash
+
+
+# Column name and dtype for every per-ball field stored in a ``BallStore``.
+_FIELDS = (
+    ("x", np.float64),        # Sub-pixel position of the hitbox corner.
+    ("y", np.float64),
+    ("px", np.float64),       # Position before the last step.
+    ("py", np.float64),
+    ("vx", np.float64),       # Velocity in pixels per frame.
+    ("vy", np.float64),
+    ("ax", np.float64),       # Acceleration, only used by the debug overlay.
+    ("ay", np.float64),
+    ("rx", np.int64),         # Integer hitbox position used for collisions.
+    ("ry", np.int64),
+    ("id", np.int64),
+    ("alive", np.bool_),
+    ("powerups", np.uint64),  # Bitset of power-up slots the ball is inside.
+)
+
+
+def sweep_rect(
+    x0: np.ndarray,
+    y0: np.ndarray,
+    x1: np.ndarray,
+    y1: np.ndarray,
+    rect: pygame.Rect,
+) -> np.ndarray:
+    """Return the time of impact of moving ball hitboxes against ``rect``.
+
+    Each hitbox travels in a straight line from its corner at ``(x0, y0)``
+    to ``(x1, y1)``.  The rectangle is grown by the ball size so the test
+    reduces to a segment against a box, solved with the slab method.
+
+    Returns
+    -------
+    numpy.ndarray
+        Fraction of the path in ``[0, 1]`` at which each hitbox first
+        overlaps ``rect`` (``0`` if it starts inside), or ``inf`` if it
+        never does.  Touching edges do not count, matching
+        :meth:`pygame.Rect.colliderect`.
+    """
+    return sweep_bounds(
+        x0, y0, x1, y1, rect.left, rect.top, rect.right, rect.bottom
+    )
+
+
+def sweep_bounds(
+    x0: np.ndarray,
+    y0: np.ndarray,
+    x1: np.ndarray,
+    y1: np.ndarray,
+    left,
+    top,
+    right,
+    bottom,
+) -> np.ndarray:
+    """Like :func:`sweep_rect`, with the rectangle given by its edges.
+
+    The edges may be scalars or arrays holding one rectangle per path, so
+    many ball and rectangle pairs can be tested at once.
+    """
+    shape = np.shape(x0)
+    left = np.broadcast_to(np.asarray(left) - Ball.SIZE, shape)
+    top = np.broadcast_to(np.asarray(top) - Ball.SIZE, shape)
+    right = np.broadcast_to(right, shape)
+    bottom = np.broadcast_to(bottom, shape)
+    toi = np.full(shape, np.inf)
+
+    # Cheap rejection: only paths whose bounding box meets the grown
+    # rectangle can hit it, and usually there are none.
+    near = np.flatnonzero(
+        (np.minimum(x0, x1) < right)
+        & (np.maximum(x0, x1) > left)
+        & (np.minimum(y0, y1) < bottom)
+        & (np.maximum(y0, y1) > top)
+    )
+    if not near.size:
+        return toi
+
+    enter = np.full(near.shape, -np.inf)
+    leave = np.full(near.shape, np.inf)
+    for start, end, low, high in (
+        (x0[near], x1[near], left[near], right[near]),
+        (y0[near], y1[near], top[near], bottom[near]),
+    ):
+        delta = end - start
+        moving = delta != 0
+        # Avoid dividing by zero; stationary axes are handled below.
+        safe = np.where(moving, delta, 1.0)
+        t_low = (low - start) / safe
+        t_high = (high - start) / safe
+        t_in = np.where(moving, np.minimum(t_low, t_high), -np.inf)
+        t_out = np.where(moving, np.maximum(t_low, t_high), np.inf)
+        # A stationary axis overlaps either always or never.
+        outside = ~moving & ((start <= low) | (start >= high))
+        t_in[outside] = np.inf
+        np.maximum(enter, t_in, out=enter)
+        np.minimum(leave, t_out, out=leave)
+
+    hit = (enter < leave) & (enter <= 1) & (leave > 0)
+    toi[near[hit]] = np.maximum(enter[hit], 0.0)
+    return toi
+
+
+def _column(name: str) -> property:
+    """Return a property exposing the live slice of column ``name``."""
+
+    def getter(self: "BallStore") -> np.ndarray:
+        return self._data[name][: self.n]
+
+    return property(getter, doc=f"Live ``{name}`` values of every ball.")
+
+
+class BallStore:
+    """Struct-of-arrays storage for every ball in play.
+
+    Each field from :data:`_FIELDS` is available as an attribute returning a
+    view over the live balls, e.g. ``store.vx`` or ``store.alive``.  Writing
+    through these views updates the store in place.
+
+    Parameters
+    ----------
+    capacity:
+        Number of balls to allocate room for up front.  The arrays grow
+        automatically when more balls are added.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.n = 0
+        self._data = {
+            name: np.zeros(capacity, dtype=dtype) for name, dtype in _FIELDS
+        }
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _reserve(self, count: int) -> None:
+        """Make sure there is room for ``count`` balls."""
+        capacity = len(self._data["x"])
+        if count <= capacity:
+            return
+        while capacity < count:
+            capacity *= 2
+        for name, column in self._data.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.n] = column[: self.n]
+            self._data[name] = grown
+
+    def add(self, ball: dict, powerups: int = 0) -> int:
+        """Append a ball created by :func:`entities.create_ball`.
+
+        Parameters
+        ----------
+        ball:
+            Ball dictionary providing the starting rect and velocity.
+        powerups:
+            Bitset of power-up slots the ball starts inside, so a ball
+            spawned in a bar does not trigger it again straight away.
+
+        Returns
+        -------
+        int
+            Index of the new ball within the store.
+        """
+        self._reserve(self.n + 1)
+        i = self.n
+        rect = ball["rect"]
+        data = self._data
+        data["x"][i] = ball["x"]
+        data["y"][i] = ball["y"]
+        data["px"][i] = ball["x"]
+        data["py"][i] = ball["y"]
+        data["vx"][i] = ball["vx"]
+        data["vy"][i] = ball["vy"]
+        data["ax"][i] = 0.0
+        data["ay"][i] = 0.0
+        data["rx"][i] = rect.x
+        data["ry"][i] = rect.y
+        data["id"][i] = ball["id"]
+        data["alive"][i] = True
+        data["powerups"][i] = powerups
+        self.n += 1
+        return i
+
+    def copy(
+        self, read_only: bool = False, out: "BallStore | None" = None
+    ) -> "BallStore":
+        """Return an independent store holding copies of the live balls.
+
+        With ``read_only`` the copied columns cannot be written to, e.g. for
+        a snapshot shared with another thread.  ``out`` is an earlier copy
+        to overwrite and return instead; its arrays are reused while they
+        have room for every ball.
+        """
+        if out is None:
+            out = BallStore.__new__(BallStore)
+            out._data = {}
+        n = self.n
+        for name, column in self._data.items():
+            copied = out._data.get(name)
+            if copied is None or len(copied) < n:
+                copied = np.empty(len(column), dtype=column.dtype)
+                out._data[name] = copied
+            copied.flags.writeable = True
+            copied[:n] = column[:n]
+            copied.flags.writeable = not read_only
+        out.n = n
+        return out
+
+    def center(self, i: int) -> tuple[int, int]:
+        """Return the hitbox centre of ball ``i`` like ``Rect.center``."""
+        half = Ball.SIZE // 2
+        return (
+            int(self._data["rx"][i]) + half,
+            int(self._data["ry"][i]) + half,
+        )
+
+    def interpolated(self, alpha: float) -> tuple[np.ndarray, np.ndarray]:
+        """Return integer draw positions blended between the last two steps.
+
+        Parameters
+        ----------
+        alpha:
+            Fraction of a physics step elapsed since the latest state, where
+            ``0`` is the previous state and ``1`` the current one.
+        """
+        px, py = self.px, self.py
+        xs = np.rint(px + (self.x - px) * alpha).astype(np.int64)
+        ys = np.rint(py + (self.y - py) * alpha).astype(np.int64)
+        return xs, ys
+
+    def step(
+        self,
+        speed_factor: float,
+        paddle: pygame.Rect,
+        paddle_vx: float,
+        dt: float,
+    ) -> tuple[int, int]:
+        """Advance every ball by one physics step.
+
+        Applies gravity, integrates positions, bounces balls off the walls,
+        the top edge and the paddle, and marks balls that fell below the
+        screen as no longer alive.  Collisions are resolved at their time of
+        impact along the path swept during the step, so correctness does
+        not depend on the step being small.
+
+        Parameters
+        ----------
+        speed_factor:
+            Multiplier applied to gravity and velocity: the slow-motion
+            factor times the fraction of a ``Screen.FPS`` frame simulated.
+        paddle:
+            The player's paddle rectangle.
+        paddle_vx:
+            Current paddle velocity, which adds spin on paddle hits.
+        dt:
+            Step length in seconds, used for the debug acceleration values.
+
+        Returns
+        -------
+        tuple[int, int]
+            Number of wall/top/paddle bounces and number of paddle hits.
+        """
+        if self.n == 0:
+            return 0, 0
+
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        rx, ry = self.rx, self.ry
+        prev_vx = vx.copy()
+        prev_vy = vy.copy()
+        self.px[:] = x
+        self.py[:] = y
+
+        # Apply gravity then update position using sub-pixel accuracy.
+        vy += Ball.GRAVITY * speed_factor
+        x += vx * speed_factor
+        y += vy * speed_factor
+
+        # Bounce off the side walls.  Reflecting the overshoot places the
+        # ball where it would be had it bounced at the exact time of impact,
+        # however far it travelled this step.
+        span = Screen.WIDTH - Ball.SIZE
+        left = (x <= 0) & (vx < 0)
+        right = (x >= span) & (vx > 0)
+        x[left] *= -1
+        x[right] = 2 * span - x[right]
+        wall = left | right
+        vx[wall] *= -1
+
+        # Bounce off the top and gradually speed up.
+        top = (y <= 0) & (vy < 0)
+        y[top] *= -1
+        vy[top] *= -1
+        if top.any():
+            speed = np.hypot(vx[top], vy[top])
+            boosted = np.minimum(speed * Ball.SPEED_INCREMENT, Ball.MAX_SPEED)
+            scale = np.where(
+                speed < Ball.MAX_SPEED, boosted / np.maximum(speed, 1e-12), 1.0
+            )
+            vx[top] *= scale
+            vy[top] *= scale
+
+        # Bounce off the paddle and angle the ball based on where it hits.
+        # The path swept this step is tested rather than the end position,
+        # so fast balls cannot tunnel through the thin paddle.
+        toi = sweep_rect(self.px, self.py, x, y, paddle)
+        hit = (toi <= 1) & (vy > 0)
+        hits = int(np.count_nonzero(hit))
+        if hits:
+            t = toi[hit]
+            hit_x = self.px[hit] + (x[hit] - self.px[hit]) * t
+            hit_y = self.py[hit] + (y[hit] - self.py[hit]) * t
+            # Mirror the rest of the step's fall back up from the contact.
+            y[hit] = 2 * hit_y - y[hit]
+            offset = (hit_x + Ball.SIZE / 2 - paddle.centerx) / (
+                Paddle.WIDTH / 2
+            )
+            vy[hit] *= -1
+            new_vx = (
+                vx[hit]
+                + offset * Ball.ANGLE_INFLUENCE
+                + paddle_vx * Paddle.VEL_INFLUENCE
+            )
+            vx[hit] = np.clip(
+                new_vx * Ball.SPEED_INCREMENT, -Ball.MAX_SPEED, Ball.MAX_SPEED
+            )
+            vy[hit] = np.clip(
+                vy[hit] * Ball.SPEED_INCREMENT, -Ball.MAX_SPEED, Ball.MAX_SPEED
+            )
+
+        # ``np.rint`` rounds half to even exactly like the built-in ``round``.
+        rx[:] = np.rint(x)
+        ry[:] = np.rint(y)
+
+        # Compute acceleration for debug display.
+        if dt > 0:
+            np.subtract(vx, prev_vx, out=self.ax)
+            np.subtract(vy, prev_vy, out=self.ay)
+            self.ax[:] /= dt
+            self.ay[:] /= dt
+        else:
+            self.ax[:] = 0.0
+            self.ay[:] = 0.0
+
+        # Balls that fall below the screen are removed by :meth:`cull`.
+        self.alive[:] = ry <= Screen.HEIGHT
+
+        bounces = (
+            int(np.count_nonzero(wall)) + int(np.count_nonzero(top)) + hits
+        )
+        return bounces, hits
+
+    def collide(
+        self, grid: SpatialHash, select: np.ndarray | None = None
+    ) -> int:
+        """Resolve elastic collisions between overlapping balls.
+
+        Balls are treated as equal-mass discs of diameter ``Ball.SIZE``.
+        Approaching pairs exchange their velocity components along the line
+        between their centres, and overlapping pairs are pushed apart.
+
+        Parameters
+        ----------
+        grid:
+            Spatial hash built from the current ``rx``/``ry`` positions,
+            used to find candidate pairs without an O(n²) scan.
+        select:
+            Indices of the balls the grid was built from, when it holds
+            only some of them.  Only those balls collide.
+
+        Returns
+        -------
+        int
+            Number of pairs that bounced off each other.
+        """
+        i, j = grid.pairs()
+        if not len(i):
+            return 0
+        if select is not None:
+            i, j = select[i], select[j]
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+
+        dx = x[j] - x[i]
+        dy = y[j] - y[i]
+        dist2 = dx * dx + dy * dy
+        touching = (dist2 < Ball.SIZE * Ball.SIZE) & (dist2 > 0)
+        if not touching.any():
+            return 0
+        i, j, dx, dy = i[touching], j[touching], dx[touching], dy[touching]
+        dist = np.sqrt(dist2[touching])
+        nx = dx / dist
+        ny = dy / dist
+
+        # Relative speed along the normal; negative means approaching.
+        rel = (vx[j] - vx[i]) * nx + (vy[j] - vy[i]) * ny
+        impulse = np.minimum(rel, 0.0)
+        np.add.at(vx, i, impulse * nx)
+        np.add.at(vy, i, impulse * ny)
+        np.subtract.at(vx, j, impulse * nx)
+        np.subtract.at(vy, j, impulse * ny)
+
+        # Push overlapping balls apart so they do not stick together.
+        push = (Ball.SIZE - dist) / 2
+        np.subtract.at(x, i, push * nx)
+        np.subtract.at(y, i, push * ny)
+        np.add.at(x, j, push * nx)
+        np.add.at(y, j, push * ny)
+        self.rx[:] = np.rint(x)
+        self.ry[:] = np.rint(y)
+
+        return int(np.count_nonzero(rel < 0))
+
+    def clear_powerup_slot(self, slot: int) -> None:
+        """Mark every ball as outside the power-up bar in ``slot``.
+
+        A new bar reuses the slot of an old one, whose bit may still be set.
+        """
+        self.powerups[:] &= ~np.uint64(1 << slot)
+
+    def cull(self) -> int:
+        """Drop balls that are no longer alive and return how many remain."""
+        alive = self.alive
+        if alive.all():
+            return self.n
+        keep = np.flatnonzero(alive)
+        count = len(keep)
+        for column in self._data.values():
+            column[:count] = column[keep]
+        self.n = count
+        return count
+
+
+for _name, _ in _FIELDS:
+    setattr(BallStore, _name, _column(_name))
+
+
+__all__ = ["BallStore", "sweep_rect", "sweep_bounds"]
@@ -0,0 +1,215 @@
+"""Run a round's simulation on a worker thread, apart from rendering.
+
+In the threaded game loop a :class:`Simulation` thread owns the
+:class:`game.GameState`.  It advances the round in fixed steps on its own
+schedule, plays the step's sounds, and after every step publishes a
+:class:`Snapshot`: a read-only copy of everything the renderer draws.  The
+main thread only ever reads the latest snapshot, so a slow
+``display.flip`` no longer delays the next physics step, and NumPy releases
+the GIL for long enough during large steps that both can run at once on
+separate cores.
+
+The worker cycles through ``SNAPSHOTS`` preallocated snapshots, copying
+each step into one that is neither the latest nor the one the renderer
+holds, and publishes it by swapping a single reference.  This is triple
+buffering without locks, and steps allocate no new arrays once the
+buffers have grown to fit the balls.  Controls travel the other way
+through a :class:`collections.deque`, whose ``append`` and ``popleft`` are
+atomic in CPython, so neither side ever waits on the other.
+"""
+
+import collections
+import threading
+import time
+from typing import NamedTuple
+
+import pygame
+
+from constants import Screen, Physics
+import synth
+
+# Control updates kept while the simulation is stalled; older ones are
+# dropped, since only the latest controls matter.
+INPUT_QUEUE = 64
+
+# Snapshots reused in turn: the latest, the one being drawn and the one
+# being filled.
+SNAPSHOTS = 3
+
+
+class Controls(NamedTuple):
+    """Keys held by the player, sent to the simulation every frame."""
+
+    left: bool
+    right: bool
+
+
+class Snapshot:
+    """Read-only copy of the parts of a round that are drawn.
+
+    It has the attributes of :class:`game.GameState` read by
+    :func:`game.draw_world` and the HUD, so either can be drawn.  Nothing
+    in it is shared with the round.
+
+    Parameters
+    ----------
+    state:
+        Round to copy.
+    stamp:
+        ``time.perf_counter`` value at which the copied step was due.
+    """
+
+    def __init__(self, state, stamp: float) -> None:
+        self.paddle = state.paddle.copy()
+        self.balls = None
+        self.powerups = None
+        self.update(state, stamp)
+
+    def update(self, state, stamp: float) -> None:
+        """Overwrite the snapshot with ``state``, reusing its arrays."""
+        self.stamp = stamp
+        self.steps = state.steps
+        self.score = state.score
+        self.over = state.over
+        self.paddle.update(state.paddle)
+        self.paddle_x = state.paddle_x
+        self.prev_paddle_x = state.prev_paddle_x
+        self.balls = state.balls.copy(read_only=True, out=self.balls)
+        self.powerups = state.powerups.copy(out=self.powerups)
+
+    def paddle_rect(self, alpha: float) -> pygame.Rect:
+        """Return the paddle rect like :meth:`game.GameState.paddle_rect`."""
+        rect = self.paddle.copy()
+        rect.x = int(
+            self.prev_paddle_x + (self.paddle_x - self.prev_paddle_x) * alpha
+        )
+        return rect
+
+
+class Simulation(threading.Thread):
+    """Worker thread stepping a round and publishing snapshots.
+
+    Steps are due every ``1 / tick_rate`` seconds from when the thread
+    starts.  A late step runs as soon as possible, but after long stalls
+    the missed time beyond ``Physics.MAX_FRAME_TIME`` is dropped, like the
+    accumulator of the single-threaded loop.
+
+    Parameters
+    ----------
+    state:
+        Round to simulate.  Only this thread may touch it once started.
+    tick_rate:
+        Number of physics steps simulated per second.
+    recording:
+        Optional :class:`replay.Replay` the controls of every step are
+        recorded into.
+    pilot:
+        Optional autopilot steering the paddle instead of the controls
+        sent with :meth:`send`.
+    governor:
+        Optional :class:`governor.FrameGovernor` whose level changes are
+        applied to the round and the sounds.
+    """
+
+    def __init__(
+        self,
+        state,
+        tick_rate: int = Physics.TICK_RATE,
+        recording=None,
+        pilot=None,
+        governor=None,
+    ) -> None:
+        super().__init__(name="simulation", daemon=True)
+        self.state = state
+        self.step_dt = 1.0 / tick_rate
+        self.recording = recording
+        self.pilot = pilot
+        self.governor = governor
+        now = time.perf_counter()
+        self._snapshots = [Snapshot(state, now) for _ in range(SNAPSHOTS)]
+        # Latest snapshot, replaced by the worker after every step.
+        self.latest = self._snapshots[0]
+        self._reading: Snapshot | None = None  # Snapshot being drawn.
+        self.busy = 0.0  # Seconds spent stepping in total.
+        self.error: BaseException | None = None
+        self._inputs: collections.deque[Controls] = collections.deque(
+            maxlen=INPUT_QUEUE
+        )
+        self._stopping = threading.Event()
+
+    def send(self, left: bool, right: bool) -> None:
+        """Hand the currently held controls to the simulation."""
+        self._inputs.append(Controls(left, right))
+
+    def read(self) -> Snapshot:
+        """Return the latest snapshot and keep it until the next call.
+
+        The worker never overwrites the returned snapshot while it is held,
+        so it stays unchanged while the frame draws it.
+        """
+        while True:
+            snapshot = self.latest
+            self._reading = snapshot
+            # The worker may have picked it to fill before it was marked.
+            if self.latest is snapshot:
+                return snapshot
+
+    def stop(self) -> None:
+        """Ask the thread to finish and wait until it has."""
+        self._stopping.set()
+        self.join()
+
+    def run(self) -> None:
+        try:
+            self._loop()
+        except BaseException as exc:
+            # Re-raised by the main thread, which owns the window.
+            self.error = exc
+
+    def _loop(self) -> None:
+        state = self.state
+        dt = self.step_dt
+        clock = time.perf_counter
+        left = right = False
+        pilot_frames = 0.0  # Frames simulated since the pilot last planned.
+        level = None
+        due = clock()
+        while not self._stopping.is_set():
+            now = clock()
+            if now < due:
+                time.sleep(due - now)
+                continue
+            due = max(due, now - Physics.MAX_FRAME_TIME)
+
+            governor = self.governor
+            if governor is not None and governor.level != level:
+                level = governor.level
+                governor.apply(state, synth.AUDIO)
+            # Only this thread pops, so the queue cannot empty in between.
+            while self._inputs:
+                left, right = self._inputs.popleft()
+            if self.pilot is not None:
+                left, right = self.pilot.controls(state, pilot_frames)
+                pilot_frames = 0.0
+
+            state.step(dt, left, right)
+            pilot_frames += dt * Screen.FPS
+            if self.recording is not None:
+                self.recording.record(left, right)
+            synth.flush()
+
+            for snapshot in self._snapshots:
+                if (
+                    snapshot is not self.latest
+                    and snapshot is not self._reading
+                ):
+                    break
+            snapshot.update(state, due)
+            self.latest = snapshot
+            due += dt
+            self.busy += clock() - now
+            if state.over:
+                return
+
+
+__all__ = ["Controls", "Simulation", "Snapshot", "SNAPSHOTS"]
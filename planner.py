@@ -0,0 +1,458 @@
+"""Lookahead autopilot that plans paddle moves over several intercepts.
+
+:class:`demo.Autopilot` always chases the ball that lands first.  The
+:class:`LookaheadPilot` instead predicts where the next ``PLAN_DEPTH``
+balls will reach the paddle, including the copies that duplicate bars in
+their path will split off and the paddle size that bars and timers will
+leave it with, and searches for the order of catches that saves the most
+balls.
+
+Predictions for the ``PREDICT_BALLS`` lowest balls are made with a handful
+of array operations.
+The search is a depth-first branch and bound that runs as a generator: each
+frame it is resumed until the frame's compute budget is spent and then
+suspended, so planning spreads over as many frames as it needs while the
+best plan found so far steers the paddle.  The search restarts whenever the
+predicted intercepts change, and the old plan is followed until the new
+search has found one.
+"""
+
+import math
+import time
+from typing import TYPE_CHECKING, Iterator, NamedTuple
+
+import numpy as np
+
+from constants import (
+    Screen,
+    Physics,
+    Paddle,
+    Ball,
+    PaddleBigPowerup,
+    PaddleSmallPowerup,
+    SlowPowerup,
+    PowerupType,
+)
+from demo import PREDICTION_HORIZON
+from utils import snappy_ease
+
+if TYPE_CHECKING:
+    from game import GameState
+
+
+# Number of soonest intercepts a plan covers.
+PLAN_DEPTH = 8
+
+# Seconds of compute allowed per frame.
+PLAN_BUDGET = 0.001
+
+# Balls whose intercepts are predicted, the ones closest above the paddle,
+# so prediction stays within the budget however many balls are in play.
+PREDICT_BALLS = 256
+
+# Directions a duplicated ball is assumed to leave in, in radians.  They
+# split the range :func:`utils.duplicate_velocity` draws from into equal
+# parts, and each copy counts as that fraction of a ball.
+DUPLICATE_ANGLES = tuple(0.1 + 2.94 * (k + 0.5) / 3 for k in range(3))
+
+# Frames lost to easing when the paddle starts moving.
+MOVE_MARGIN = 3
+
+# Pixels trimmed from each side of the catch window, so the paddle aims
+# well inside it despite prediction error and easing.
+CATCH_MARGIN = 16
+
+
+def _brake_frames(tick_rate: int) -> float:
+    """Return the frames of full paddle speed covered while easing to a stop.
+
+    The easing advances once per physics step, so the distance depends on
+    the ``tick_rate`` the round is simulated at.
+    """
+    return sum(
+        1.0 - snappy_ease(k * Paddle.TRANSITION_RATE / tick_rate)
+        for k in range(1, tick_rate + 1)
+    ) * Screen.FPS / tick_rate
+
+
+def _fold_x(x: np.ndarray) -> np.ndarray:
+    """Map unfolded x-positions back between the side walls."""
+    span = Screen.WIDTH - Ball.SIZE
+    x = np.mod(x, 2 * span)
+    return np.where(x <= span, x, 2 * span - x)
+
+
+def _fall_times(
+    y: np.ndarray, vy: np.ndarray, s: float, target: float
+) -> np.ndarray:
+    """Return the frames until each ball falls to ``target``.
+
+    Vectorised :func:`demo._fall_time`; ``inf`` means never.
+    """
+    a = Ball.GRAVITY * s * s / 2
+    b = s * vy + a
+    c = y - target
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if a > 0:
+            n = (-b + np.sqrt(np.maximum(b * b - 4 * a * c, 0.0))) / (2 * a)
+        else:
+            n = np.where(b > 0, -c / b, np.inf)
+    return np.where(c >= 0, 0.0, n)
+
+
+def _fall_segment(
+    x: np.ndarray, y: np.ndarray, vx: np.ndarray, vy: np.ndarray, s: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return the state in which each ball starts its final fall.
+
+    Rising balls that reach the top edge are advanced to their bounce,
+    with its speed-up, as in :func:`demo.predict_intercept`.  Returns the
+    position, velocity and frames until the fall begins.
+    """
+    a = Ball.GRAVITY * s * s / 2
+    start = np.zeros(len(x))
+    rising = vy < 0
+    if not rising.any():
+        return x, y, vx, vy, start
+    b = s * vy + a
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if a > 0:
+            disc = b * b - 4 * a * y
+            n = (-b - np.sqrt(np.maximum(disc, 0.0))) / (2 * a)
+            top = rising & (disc >= 0) & (b < 0)
+        else:
+            n = -y / b
+            top = rising & (b < 0)
+    n = np.where(y <= 0, 0.0, n)
+    top |= rising & (y <= 0)
+
+    bounce_vy = -(vy + Ball.GRAVITY * s * n)
+    speed = np.hypot(vx, bounce_vy)
+    boosted = np.minimum(speed * Ball.SPEED_INCREMENT, Ball.MAX_SPEED)
+    scale = np.where(
+        (speed > 0) & (speed < Ball.MAX_SPEED),
+        boosted / np.maximum(speed, 1e-12),
+        1.0,
+    )
+    return (
+        np.where(top, x + vx * s * n, x),
+        np.where(top, 0.0, y),
+        np.where(top, vx * scale, vx),
+        np.where(top, bounce_vy * scale, vy),
+        np.where(top, n, start),
+    )
+
+
+def _crossings(
+    fall: tuple, row: int, left: int, right: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the balls whose final fall enters a bar from above.
+
+    ``fall`` is the speed factor followed by the :func:`_fall_segment`
+    state.  A ball enters the bar when its hitbox corner falls to ``row``
+    between ``left`` and ``right``.  Returns the indices of those balls,
+    with the x-position and frames at which they enter.
+    """
+    s, x, y, vx, vy, start = fall
+    above = np.flatnonzero(y < row)
+    n = _fall_times(y[above], vy[above], s, row)
+    cross_x = _fold_x(x[above] + vx[above] * s * n)
+    hit = (cross_x > left) & (cross_x < right)
+    return above[hit], cross_x[hit], start[above][hit] + n[hit]
+
+
+class Intercepts(NamedTuple):
+    """Predicted arrivals at the paddle, one entry per ball or copy."""
+
+    key: np.ndarray     # Ball ID, or a negative code for predicted copies.
+    time: np.ndarray    # Pilot frame of arrival.
+    x: np.ndarray       # Centre x-position at arrival.
+    weight: np.ndarray  # Balls saved by the catch; copies count partly.
+
+
+class LookaheadPilot:
+    """Paddle controller that plans a sequence of catches.
+
+    It has the same :meth:`controls` interface as
+    :class:`demo.Autopilot`, so it can steer :func:`game.run_game` or
+    headless rounds.
+
+    Parameters
+    ----------
+    budget:
+        Seconds allowed per call of :meth:`controls`, counted from the
+        start of the call.  Predicting the intercepts of at most
+        ``PREDICT_BALLS`` balls is a few array operations; the search then
+        runs until the budget is spent and resumes on the next call.
+    depth:
+        Number of soonest intercepts each plan covers.
+    tick_rate:
+        Physics steps per second of the rounds being steered.
+    """
+
+    def __init__(
+        self,
+        budget: float = PLAN_BUDGET,
+        depth: int = PLAN_DEPTH,
+        tick_rate: int = Physics.TICK_RATE,
+    ) -> None:
+        self.budget = budget
+        self.depth = depth
+        self._brake_frames = _brake_frames(tick_rate)
+        self.frame = 0.0  # Frames elapsed, the time base of plans.
+        # (pilot frame, paddle centre) of every catch in the best plan.
+        self.plan: list[tuple[float, float]] = []
+        self._value = -1.0  # Balls the best plan saves.
+        self._search: Iterator[None] | None = None
+        self._key: tuple | None = None
+
+    @staticmethod
+    def _fall(state: "GameState", near=slice(None)) -> tuple:
+        """Return the speed factor and :func:`_fall_segment` state.
+
+        Only the balls selected by the index or slice ``near`` are included.
+        """
+        balls = state.balls
+        s = SlowPowerup.SPEED_FACTOR if state.slow_timer > 0 else 1.0
+        return (s,) + _fall_segment(
+            balls.x[near], balls.y[near], balls.vx[near], balls.vy[near], s
+        )
+
+    def intercepts(
+        self,
+        state: "GameState",
+        fall: tuple | None = None,
+        near=slice(None),
+    ) -> Intercepts:
+        """Predict when and where the balls of ``state`` reach the paddle.
+
+        Balls that fall through a duplicate bar first also produce one
+        predicted copy per angle in ``DUPLICATE_ANGLES``.  Only the balls
+        selected by ``near`` are predicted, and ``fall`` must be for them.
+        """
+        if fall is None:
+            fall = self._fall(state, near)
+        s, x, y, vx, vy, start = fall
+        ids = state.balls.id[near]
+        target = state.paddle.top - Ball.SIZE
+        land = np.minimum(
+            start + _fall_times(y, vy, s, target), PREDICTION_HORIZON
+        )
+        keys = [ids]
+        times = [land]
+        xs = [_fold_x(x + vx * s * (land - start)) + Ball.SIZE / 2]
+        weights = [np.ones(len(land))]
+
+        powerups = state.powerups
+        share = 1.0 / len(DUPLICATE_ANGLES)
+        for slot in powerups.slots():
+            if powerups.types[slot] is not PowerupType.DUPLICATE:
+                continue
+            row = int(powerups.top[slot]) - Ball.SIZE
+            parents, split_x, split_t = _crossings(
+                fall,
+                row,
+                int(powerups.left[slot]) - Ball.SIZE,
+                int(powerups.right[slot]),
+            )
+            if not parents.size:
+                continue
+            n = split_t - start[parents]
+            speed = np.hypot(
+                vx[parents], vy[parents] + Ball.GRAVITY * s * n
+            )
+            codes = ids[parents] * 64 + slot
+            for k, angle in enumerate(DUPLICATE_ANGLES):
+                copy_n = _fall_times(
+                    np.full(len(parents), float(row)),
+                    speed * math.sin(angle),
+                    s,
+                    target,
+                )
+                copy_land = np.minimum(split_t + copy_n, PREDICTION_HORIZON)
+                copy_x = split_x + speed * math.cos(angle) * s * (
+                    copy_land - split_t
+                )
+                keys.append(-1 - (codes * len(DUPLICATE_ANGLES) + k))
+                times.append(copy_land)
+                xs.append(_fold_x(copy_x) + Ball.SIZE / 2)
+                weights.append(np.full(len(parents), share))
+
+        return Intercepts(
+            np.concatenate(keys),
+            np.concatenate(times) + self.frame,
+            np.concatenate(xs),
+            np.concatenate(weights),
+        )
+
+    def widths(
+        self,
+        state: "GameState",
+        times: np.ndarray,
+        fall: tuple | None = None,
+    ) -> np.ndarray:
+        """Return the paddle width predicted at each pilot frame ``times``.
+
+        The current size effect lasts until its timer runs out.  A paddle
+        bar that some ball is predicted to fall through replaces it from
+        then on, for ``SIZE_DURATION`` seconds.
+        """
+        if fall is None:
+            fall = self._fall(state)
+        paddle = state.paddle
+        expires = self.frame + state.paddle_power_timer * Screen.FPS
+        widths = np.where(times < expires, paddle.width, Paddle.WIDTH)
+
+        powerups = state.powerups
+        events = []
+        for slot in powerups.slots():
+            kind = powerups.types[slot]
+            if kind is PowerupType.PADDLE_BIG:
+                width = int(Paddle.WIDTH * PaddleBigPowerup.ENLARGE_FACTOR)
+            elif kind is PowerupType.PADDLE_SMALL:
+                width = int(Paddle.WIDTH * PaddleSmallPowerup.SHRINK_FACTOR)
+            else:
+                continue
+            _, _, enter = _crossings(
+                fall,
+                int(powerups.top[slot]) - Ball.SIZE,
+                int(powerups.left[slot]) - Ball.SIZE,
+                int(powerups.right[slot]),
+            )
+            if enter.size:
+                events.append((self.frame + float(enter.min()), width))
+        duration = PaddleBigPowerup.SIZE_DURATION * Screen.FPS
+        for begins, width in sorted(events):
+            lasts = np.where(times < begins + duration, width, Paddle.WIDTH)
+            widths = np.where(times >= begins, lasts, widths)
+        return widths
+
+    def _search_plans(
+        self,
+        times: list[float],
+        lows: list[float],
+        highs: list[float],
+        weights: list[float],
+        centre: float,
+    ) -> Iterator[None]:
+        """Search catch sequences, yielding after every node.
+
+        Intercepts are visited in time order, and at each one the search
+        either moves the paddle centre between ``lows`` and ``highs`` in
+        time or lets the ball go.  Branches that cannot beat the best plan
+        even by catching every remaining ball are pruned.  The first
+        complete plan replaces ``self.plan``, and better ones replace it as
+        they are found.
+        """
+        count = len(times)
+        remaining = np.cumsum(weights[::-1])[::-1].tolist() + [0.0]
+        # (next intercept, paddle centre, pilot frame, balls saved, catches)
+        stack = [(0, centre, self.frame, 0.0, ())]
+        while stack:
+            i, pos, now, value, catches = stack.pop()
+            if value + remaining[i] <= self._value:
+                continue
+            if i == count:
+                self._value = value
+                self.plan = list(catches)
+                continue
+            # Push the miss first so the catch is explored first.
+            stack.append((i + 1, pos, now, value, catches))
+            low, high = lows[i], highs[i]
+            dist = max(low - pos, pos - high, 0.0)
+            if dist / Paddle.SPEED + MOVE_MARGIN <= times[i] - now:
+                arrive = min(max(pos, low), high)
+                stack.append(
+                    (
+                        i + 1,
+                        arrive,
+                        times[i],
+                        value + weights[i],
+                        catches + ((times[i], arrive),),
+                    )
+                )
+            yield
+
+    def controls(
+        self, state: "GameState", frames: float = 1.0
+    ) -> tuple[bool, bool]:
+        """Return the ``(left, right)`` controls to hold for ``state``.
+
+        Parameters
+        ----------
+        state:
+            Round being played by :func:`game.run_game` or headlessly.
+        frames:
+            Frames simulated since the previous call.
+        """
+        deadline = time.perf_counter() + self.budget
+        self.frame += frames
+        if not state.balls:
+            return False, False
+
+        balls = state.balls
+        near = slice(None)
+        if len(balls) > PREDICT_BALLS:
+            # The lowest balls are the likeliest to land first.
+            near = np.argpartition(-balls.y, PREDICT_BALLS)[:PREDICT_BALLS]
+        fall = self._fall(state, near)
+        found = self.intercepts(state, fall, near)
+        soon = np.flatnonzero(found.time > self.frame)
+        if len(soon) > self.depth:
+            nearest = np.argpartition(found.time[soon], self.depth)
+            soon = soon[nearest[: self.depth]]
+        soon = soon[np.argsort(found.time[soon], kind="stable")]
+        times = found.time[soon]
+        widths = self.widths(state, times, fall)
+        # Centres at which the paddle catches each ball, kept on screen.
+        reach = widths / 2 + Ball.SIZE / 2 - CATCH_MARGIN
+        lows = np.maximum(found.x[soon] - reach, widths // 2)
+        highs = np.minimum(
+            found.x[soon] + reach, Screen.WIDTH - widths + widths // 2
+        )
+
+        # Replan from scratch only when the intercepts changed.
+        key = (
+            found.key[soon].tobytes(),
+            np.rint(found.x[soon] / 2).tobytes(),
+            widths.tobytes(),
+        )
+        if key != self._key:
+            # The previous plan keeps steering until the new search has
+            # completed one of its own.
+            self._key = key
+            self._value = -1.0
+            self._search = self._search_plans(
+                times.tolist(),
+                lows.tolist(),
+                highs.tolist(),
+                found.weight[soon].tolist(),
+                float(state.paddle.centerx),
+            )
+        # The search only gets what prediction left of the budget, and none
+        # at all once prediction used it up.
+        while self._search is not None and time.perf_counter() < deadline:
+            if next(self._search, False) is False:
+                self._search = None
+
+        while self.plan and self.plan[0][0] <= self.frame:
+            self.plan.pop(0)
+        if not self.plan:
+            return False, False
+        offset = self.plan[0][1] - state.paddle.centerx
+        # Let go early enough for the easing to stop on the target.
+        coasting = state.paddle_vx * offset > 0 and abs(offset) <= abs(
+            state.paddle_vx
+        ) * self._brake_frames
+        if abs(offset) <= Paddle.SPEED / 2 or coasting:
+            return False, False
+        return offset < 0, offset > 0
+
+
+__all__ = [
+    "LookaheadPilot",
+    "Intercepts",
+    "PLAN_DEPTH",
+    "PLAN_BUDGET",
+    "PREDICT_BALLS",
+]
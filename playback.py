@@ -0,0 +1,198 @@
+"""Playback of recorded :class:`replay.Replay` rounds.
+
+:func:`simulate` re-runs a replay without a window or frame limit, which is
+far faster than real time and reports whether the final score matches the
+recording.  :func:`play_replay` shows a replay on screen with pausing,
+speed control and seeking.  Seeking backwards restores the closest earlier
+checkpoint and re-simulates from there, so it stays quick in long rounds.
+"""
+
+import copy
+import sys
+import time
+
+import pygame
+
+from constants import Screen, Physics
+from game import GameState, draw_world
+from replay import Replay
+import synth
+from text import TextRenderer
+
+# Seconds of play between checkpoints kept for seeking.
+CHECKPOINT_INTERVAL = 5.0
+
+
+class ReplayPlayer:
+    """Re-simulate a replay step by step.
+
+    Parameters
+    ----------
+    replay:
+        Recording to play.
+    checkpoint_interval:
+        Seconds of play between saved states used by :meth:`seek`, or
+        ``None`` to keep only the initial state.
+    """
+
+    def __init__(
+        self,
+        replay: Replay,
+        checkpoint_interval: float | None = CHECKPOINT_INTERVAL,
+    ) -> None:
+        self.replay = replay
+        self.dt = 1.0 / replay.tick_rate
+        self.interval = (
+            max(1, round(checkpoint_interval * replay.tick_rate))
+            if checkpoint_interval
+            else None
+        )
+        self.state = GameState(replay.ball_collisions, replay.seed)
+        self.step = 0  # Number of recorded steps simulated so far.
+        self._checkpoints = {0: copy.deepcopy(self.state)}
+
+    @property
+    def done(self) -> bool:
+        """``True`` once every recorded step has been simulated."""
+        return self.step >= len(self.replay) or self.state.over
+
+    def advance(self, steps: int = 1) -> int:
+        """Simulate up to ``steps`` recorded steps and return how many ran."""
+        ran = 0
+        state = self.state
+        controls = self.replay.controls
+        while ran < steps and not self.done:
+            left, right = controls(self.step)
+            state.step(self.dt, left, right)
+            self.step += 1
+            ran += 1
+            if self.interval and self.step % self.interval == 0:
+                self._checkpoints.setdefault(
+                    self.step, copy.deepcopy(state)
+                )
+        return ran
+
+    def seek(self, step: int) -> None:
+        """Move playback to ``step``, restoring a checkpoint if needed."""
+        step = max(0, min(step, len(self.replay)))
+        start = max(s for s in self._checkpoints if s <= step)
+        # Checkpoints are copied so they can be restored again later.
+        if step < self.step or start > self.step:
+            self.state = copy.deepcopy(self._checkpoints[start])
+            self.step = start
+        self.advance(step - self.step)
+
+
+def simulate(replay: Replay) -> dict:
+    """Re-run ``replay`` as fast as possible and report the outcome.
+
+    Returns
+    -------
+    dict
+        Final ``score``, the ``recorded_score``, whether they ``match``,
+        the number of ``steps`` simulated and the ``speedup`` over real
+        time.
+    """
+    player = ReplayPlayer(replay, checkpoint_interval=None)
+    start = time.perf_counter()
+    player.advance(len(replay))
+    elapsed = time.perf_counter() - start
+    simulated = player.step * player.dt
+    return {
+        "score": player.state.score,
+        "recorded_score": replay.score,
+        "match": player.state.score == replay.score,
+        "steps": player.step,
+        "speedup": simulated / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def play_replay(
+    screen: pygame.Surface,
+    clock: pygame.time.Clock,
+    font: pygame.font.Font,
+    debug_font: pygame.font.Font,
+    replay: Replay,
+) -> None:
+    """Show ``replay`` on screen until the viewer leaves.
+
+    Space pauses, Left and Right seek five seconds, Up and Down double or
+    halve the playback speed, Home restarts and Escape or Return exits.
+
+    Parameters
+    ----------
+    screen:
+        The main display surface.
+    clock:
+        Pygame clock used to regulate the frame rate.
+    font:
+        Font for the score.
+    debug_font:
+        Font for the playback status line.
+    replay:
+        Recording to show.
+    """
+    player = ReplayPlayer(replay)
+    score_text = TextRenderer(font, "white")
+    status_text = TextRenderer(debug_font, "green")
+    score_label_surf = score_text.render("Score:")
+    seek_steps = round(5 * replay.tick_rate)
+    total = replay.duration
+
+    speed = 1.0
+    paused = False
+    accumulator = 0.0
+    while True:
+        dt = clock.tick(Screen.FPS) / 1000.0
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key in (pygame.K_ESCAPE, pygame.K_RETURN):
+                return
+            if event.key == pygame.K_SPACE:
+                paused = not paused
+            elif event.key == pygame.K_UP:
+                speed = min(speed * 2, 64.0)
+            elif event.key == pygame.K_DOWN:
+                speed = max(speed / 2, 0.25)
+            elif event.key == pygame.K_HOME:
+                player.seek(0)
+            elif event.key == pygame.K_LEFT:
+                player.seek(player.step - seek_steps)
+            elif event.key == pygame.K_RIGHT:
+                player.seek(player.step + seek_steps)
+
+        if not paused and not player.done:
+            accumulator += min(dt, Physics.MAX_FRAME_TIME) * speed
+            steps = int(accumulator / player.dt)
+            accumulator -= steps * player.dt
+            player.advance(steps)
+            synth.flush()
+        else:
+            accumulator = 0.0
+
+        state = player.state
+        alpha = 1.0 if paused or player.done else accumulator / player.dt
+        screen.fill("black")
+        draw_world(screen, state, alpha)
+
+        score_str = str(state.score)
+        label_w = score_label_surf.get_width()
+        x = Screen.WIDTH - label_w - score_text.width(score_str) - 15
+        screen.blit(score_label_surf, (x, 10))
+        score_text.draw(screen, score_str, (x + label_w + 5, 10))
+
+        status = f"{player.step * player.dt:.1f} / {total:.1f} s  x{speed:g}"
+        if paused:
+            status += "  paused"
+        elif player.done:
+            status += "  end"
+        status_text.draw(screen, status, (10, 10))
+        pygame.display.flip()
+
+
+__all__ = ["ReplayPlayer", "simulate", "play_replay", "CHECKPOINT_INTERVAL"]
@@ -0,0 +1,221 @@
+"""Indexed container for the power-up bars currently on screen.
+
+Bars live in fixed slots so a slot number can name a bar for as long as it
+is shown; balls record the bars they are inside as a bitset with one bit per
+slot.  The edges of every slot are kept in NumPy arrays, and the active
+slots are additionally kept sorted by their top edge.  Finding the bars a
+ball can reach is then a binary search over that order on the vertical
+extent of the ball's path, done for every ball at once, instead of testing
+every ball against every bar.
+"""
+
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pygame
+
+from constants import Ball, BasePowerup, PowerupType
+from physics import sweep_bounds
+
+
+class PowerupSet:
+    """Power-up bars held in a fixed number of slots.
+
+    Parameters
+    ----------
+    capacity:
+        Number of slots, i.e. the most bars shown at once.  At most 64, the
+        width of the per-ball bitsets.
+    """
+
+    def __init__(self, capacity: int = BasePowerup.MAX_ACTIVE) -> None:
+        if not 0 < capacity <= 64:
+            raise ValueError("capacity must be between 1 and 64")
+        self.capacity = capacity
+        self.left = np.zeros(capacity, dtype=np.int64)
+        self.top = np.zeros(capacity, dtype=np.int64)
+        self.right = np.zeros(capacity, dtype=np.int64)
+        self.bottom = np.zeros(capacity, dtype=np.int64)
+        self.timer = np.zeros(capacity)
+        self.rects: list[pygame.Rect | None] = [None] * capacity
+        self.types: list[PowerupType | None] = [None] * capacity
+        # Active slots sorted by top edge, and those top edges.
+        self._order = np.zeros(0, dtype=np.int64)
+        self._tops = np.zeros(0, dtype=np.int64)
+        self._tallest = 0
+        # The same order and tops as lists, for :meth:`touching`.
+        self._slots: list[int] = []
+        self._rows: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def full(self) -> bool:
+        """``True`` when every slot holds a bar."""
+        return len(self._order) >= self.capacity
+
+    def slots(self) -> list[int]:
+        """Return the occupied slots, ordered from the top of the screen."""
+        return self._order.tolist()
+
+    def add(self, powerup: dict) -> int:
+        """Show a bar from :func:`entities.spawn_powerup`; return its slot.
+
+        Callers must clear the slot's bit from every ball with
+        :meth:`physics.BallStore.clear_powerup_slot`, since it may still be
+        set from a previous bar.
+        """
+        free = [s for s, t in enumerate(self.types) if t is None]
+        if not free:
+            raise ValueError("no free power-up slot")
+        slot = free[0]
+        rect = powerup["rect"]
+        self.left[slot], self.top[slot] = rect.left, rect.top
+        self.right[slot], self.bottom[slot] = rect.right, rect.bottom
+        self.timer[slot] = powerup["timer"]
+        self.rects[slot] = rect
+        self.types[slot] = powerup["type"]
+        self._reindex()
+        return slot
+
+    def remove(self, slot: int) -> None:
+        """Take the bar in ``slot`` off the screen."""
+        self.rects[slot] = None
+        self.types[slot] = None
+        self._reindex()
+
+    def copy(self, out: "PowerupSet | None" = None) -> "PowerupSet":
+        """Return an independent copy of the bars and their slots.
+
+        ``out`` is an earlier copy with the same capacity to overwrite and
+        return instead of allocating a new set.
+        """
+        if out is None:
+            out = PowerupSet(self.capacity)
+        for name in ("left", "top", "right", "bottom", "timer"):
+            np.copyto(getattr(out, name), getattr(self, name))
+        out.rects[:] = self.rects
+        out.types[:] = self.types
+        # The index is replaced, never changed in place, so it is shared.
+        out._order = self._order
+        out._tops = self._tops
+        out._tallest = self._tallest
+        out._slots = self._slots
+        out._rows = self._rows
+        return out
+
+    def clear(self) -> None:
+        """Remove every bar."""
+        self.rects = [None] * self.capacity
+        self.types = [None] * self.capacity
+        self._reindex()
+
+    def _reindex(self) -> None:
+        """Rebuild the top-sorted order after bars were added or removed."""
+        active = np.array(
+            [s for s, t in enumerate(self.types) if t is not None],
+            dtype=np.int64,
+        )
+        self._order = active[np.argsort(self.top[active], kind="stable")]
+        self._tops = self.top[self._order]
+        heights = self.bottom[active] - self.top[active]
+        self._tallest = int(heights.max()) if len(active) else 0
+        self._slots = self._order.tolist()
+        self._rows = self._tops.tolist()
+
+    def expire(self, dt: float) -> None:
+        """Count down every bar's timer by ``dt`` and drop expired bars."""
+        if not len(self._order):
+            return
+        self.timer[self._order] -= dt
+        expired = self._order[self.timer[self._order] <= 0]
+        if len(expired):
+            for slot in expired.tolist():
+                self.rects[slot] = None
+                self.types[slot] = None
+            self._reindex()
+
+    def candidates(
+        self, y_min: np.ndarray, y_max: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return the ball and slot pairs whose vertical extents overlap.
+
+        Parameters
+        ----------
+        y_min, y_max:
+            Lowest and highest hitbox top each ball occupied this step.
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            Ball indices and the slots of the bars each can reach.
+        """
+        tops = self._tops
+        if not len(tops):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        # A bar can touch a ball only if its top lies within the ball's
+        # vertical extent, widened by the ball size above and the tallest
+        # bar below.
+        lo = np.searchsorted(tops, y_min - self._tallest, side="right")
+        hi = np.searchsorted(tops, y_max + Ball.SIZE, side="left")
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        balls = np.repeat(np.arange(len(lo)), counts)
+        run_starts = np.cumsum(counts) - counts
+        ranks = np.repeat(lo - run_starts, counts) + np.arange(total)
+        return balls, self._order[ranks]
+
+    def touching(self, rect: pygame.Rect) -> int:
+        """Return the bitset of the bars ``rect`` overlaps.
+
+        The scalar counterpart of :meth:`hits` for a ball standing still,
+        for callers with only a few balls.  Like :meth:`candidates`, only
+        the bars whose top lies within reach of ``rect`` are tested.
+        """
+        rows = self._rows
+        slots = self._slots
+        rects = self.rects
+        bits = 0
+        for k in range(
+            bisect_right(rows, rect.top - self._tallest),
+            bisect_left(rows, rect.bottom),
+        ):
+            slot = slots[k]
+            if rect.colliderect(rects[slot]):
+                bits |= 1 << slot
+        return bits
+
+    def hits(
+        self,
+        x0: np.ndarray,
+        y0: np.ndarray,
+        x1: np.ndarray,
+        y1: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return the ball and slot pairs where a ball's path met a bar.
+
+        Each ball hitbox moved in a straight line from ``(x0, y0)`` to
+        ``(x1, y1)``; pass the same position twice for a stationary test.
+        """
+        balls, slots = self.candidates(
+            np.minimum(y0, y1), np.maximum(y0, y1)
+        )
+        if not len(balls):
+            return balls, slots
+        toi = sweep_bounds(
+            x0[balls],
+            y0[balls],
+            x1[balls],
+            y1[balls],
+            self.left[slots],
+            self.top[slots],
+            self.right[slots],
+            self.bottom[slots],
+        )
+        hit = toi <= 1
+        return balls[hit], slots[hit]
+
+
+__all__ = ["PowerupSet"]
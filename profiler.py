@@ -0,0 +1,192 @@
+"""Per-phase frame timing for the gameplay debug overlay.
+
+A :class:`FrameProfiler` splits every frame into named phases.  The game
+loop calls :meth:`FrameProfiler.mark` as each phase finishes, which charges
+the time since the previous mark to that phase, so instrumenting a frame
+costs one ``perf_counter`` call per phase.  The last few seconds of frames
+are kept in a ring buffer for rolling percentiles, the overlay sparkline
+and CSV dumps.
+"""
+
+import csv
+import time
+
+import numpy as np
+import pygame
+
+# Phases of a gameplay frame, in the order they run.
+PHASES = (
+    "events",
+    "input",
+    "spawn",
+    "physics",
+    "audio",
+    "render",
+    "text",
+    "flip",
+)
+
+
+class FrameProfiler:
+    """Record how long each phase of recent frames took.
+
+    Parameters
+    ----------
+    phases:
+        Names of the phases a frame is split into.
+    history:
+        Number of most recent frames kept.
+    background:
+        Phases timed on other threads, e.g. with :meth:`add`.  They are
+        recorded and reported per phase but left out of frame totals.
+    """
+
+    def __init__(
+        self,
+        phases: tuple[str, ...] = PHASES,
+        history: int = 1200,
+        background: tuple[str, ...] = (),
+    ) -> None:
+        self.phases = phases
+        self.history = history
+        self._index = {name: i for i, name in enumerate(phases)}
+        # Mask of the phases that count towards a frame's total.
+        self._counted = np.array([name not in background for name in phases])
+        # Seconds spent in each phase, one row per frame, used as a ring.
+        self._times = np.zeros((history, len(phases)))
+        self._stamps = np.zeros(history)  # When each frame began.
+        self._count = 0  # Frames recorded in total.
+        self._current = [0.0] * len(phases)
+        self._start = self._last = time.perf_counter()
+
+    def __len__(self) -> int:
+        return min(self._count, self.history)
+
+    @property
+    def frames(self) -> int:
+        """Number of frames recorded since the profiler was created."""
+        return self._count
+
+    def begin(self) -> None:
+        """Start timing a new frame."""
+        self._current = [0.0] * len(self.phases)
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        """Charge the time since the previous mark to ``phase``.
+
+        Marking the same phase several times in a frame, e.g. once per
+        physics step, adds the times together.
+        """
+        now = time.perf_counter()
+        self._current[self._index[phase]] += now - self._last
+        self._last = now
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Charge ``seconds`` timed elsewhere, e.g. on another thread."""
+        self._current[self._index[phase]] += seconds
+
+    def end(self) -> None:
+        """Store the frame started by the last :meth:`begin`."""
+        row = self._count % self.history
+        self._times[row] = self._current
+        self._stamps[row] = self._start
+        self._count += 1
+
+    def _ordered(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the kept phase times and start stamps, oldest first."""
+        n = len(self)
+        if self._count <= self.history:
+            return self._times[:n], self._stamps[:n]
+        split = self._count % self.history
+        order = np.r_[split:self.history, 0:split]
+        return self._times[order], self._stamps[order]
+
+    def frame_times(self, frames: int | None = None) -> np.ndarray:
+        """Return the total time of the last ``frames`` frames, oldest first.
+
+        All kept frames are returned when ``frames`` is ``None``.
+        """
+        times, _ = self._ordered()
+        if frames is not None:
+            times = times[-frames:]
+        return times[:, self._counted].sum(axis=1)
+
+    def percentiles(
+        self, qs: tuple[float, ...] = (50, 95, 99)
+    ) -> dict[str, np.ndarray]:
+        """Return rolling percentiles in seconds per phase and for the frame.
+
+        Returns
+        -------
+        dict[str, numpy.ndarray]
+            Maps every phase name, and ``"frame"`` for the whole frame, to
+            its percentiles ``qs``.
+        """
+        times, _ = self._ordered()
+        if not len(times):
+            zeros = np.zeros(len(qs))
+            return {name: zeros for name in ("frame",) + self.phases}
+        result = np.percentile(times, qs, axis=0)
+        stats = {name: result[:, i] for i, name in enumerate(self.phases)}
+        stats["frame"] = np.percentile(
+            times[:, self._counted].sum(axis=1), qs
+        )
+        return stats
+
+    def dump_csv(self, path: str, seconds: float | None = None) -> int:
+        """Write the frames of the last ``seconds`` to ``path`` as CSV.
+
+        Each row holds the frame's start time relative to the first row and
+        the milliseconds spent in every phase.  All kept frames are written
+        when ``seconds`` is ``None``.  Returns the number of rows written.
+        """
+        times, stamps = self._ordered()
+        if seconds is not None and len(stamps):
+            keep = stamps >= stamps[-1] - seconds
+            times, stamps = times[keep], stamps[keep]
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(("t",) + self.phases + ("frame",))
+            origin = stamps[0] if len(stamps) else 0.0
+            totals = (times[:, self._counted].sum(axis=1) * 1e3).tolist()
+            for stamp, row, total in zip(
+                stamps.tolist(), (times * 1e3).tolist(), totals
+            ):
+                writer.writerow(
+                    [f"{stamp - origin:.4f}"]
+                    + [f"{ms:.4f}" for ms in row]
+                    + [f"{total:.4f}"]
+                )
+        return len(stamps)
+
+    def draw_sparkline(
+        self,
+        surface: pygame.Surface,
+        rect: pygame.Rect,
+        budget: float,
+        colour="green",
+    ) -> pygame.Rect:
+        """Plot recent frame times inside ``rect`` and return ``rect``.
+
+        One frame is plotted per pixel column, scaled so ``budget`` seconds
+        sits at half the height; a grey line marks the budget itself.
+        """
+        times = self.frame_times(rect.width)
+        budget_y = rect.bottom - rect.height // 2
+        pygame.draw.line(
+            surface,
+            "gray40",
+            (rect.left, budget_y),
+            (rect.right - 1, budget_y),
+        )
+        if len(times) > 1:
+            scale = rect.height / (2 * budget)
+            ys = np.maximum(rect.bottom - 1 - times * scale, rect.top)
+            xs = np.arange(rect.right - len(times), rect.right)
+            points = np.column_stack((xs, ys)).tolist()
+            pygame.draw.lines(surface, colour, False, points)
+        return rect
+
+
+__all__ = ["FrameProfiler", "PHASES"]
@@ -0,0 +1,103 @@
+"""Dirty-rectangle presentation for the gameplay screen.
+
+Most of the gameplay screen is black background that never changes.  A
+:class:`DirtyRenderer` remembers the bounds of everything drawn last frame,
+erases only those regions, and presents the union of last frame's and this
+frame's bounds with ``pygame.display.update`` instead of flipping the whole
+window.  When the changed area grows large a full flip is cheaper, so it
+falls back to one automatically.
+"""
+
+import pygame
+
+
+class DirtyRenderer:
+    """Erase and present only the regions that changed between frames.
+
+    Call :meth:`begin` before drawing, :meth:`mark` with the bounds of
+    everything drawn, then :meth:`present` to show the frame.
+
+    Parameters
+    ----------
+    screen:
+        Display surface being drawn to.
+    background:
+        Colour used to erase old regions.
+    max_fraction:
+        Share of the screen the dirty rectangles may cover before a full
+        flip is used instead.
+    max_rects:
+        Most rectangles tracked per frame.  Beyond this, e.g. with
+        thousands of balls, the frame is presented with a full flip.
+    """
+
+    def __init__(
+        self,
+        screen: pygame.Surface,
+        background="black",
+        max_fraction: float = 0.3,
+        max_rects: int = 256,
+    ) -> None:
+        self.screen = screen
+        self.background = background
+        width, height = screen.get_size()
+        self.max_area = width * height * max_fraction
+        self.max_rects = max_rects
+        # ``None`` means the regions are unknown and a full redraw is due.
+        self._prev: list[pygame.Rect] | None = None
+        self._cur: list[pygame.Rect] | None = None
+        self._full = True
+
+    def invalidate(self) -> None:
+        """Force the next frame to clear and present the whole screen."""
+        self._prev = None
+
+    def begin(self) -> None:
+        """Erase whatever was drawn in the previous frame."""
+        if self._prev is None:
+            self.screen.fill(self.background)
+            self._full = True
+        else:
+            fill = self.screen.fill
+            for rect in self._prev:
+                fill(self.background, rect)
+        self._cur = []
+
+    def mark(self, rect: pygame.Rect) -> None:
+        """Record that ``rect`` was drawn this frame."""
+        cur = self._cur
+        if cur is None:
+            return
+        if len(cur) >= self.max_rects:
+            self._cur = None
+            return
+        cur.append(rect)
+
+    def mark_many(self, xs: list, ys: list, width: int, height: int) -> None:
+        """Record equally sized regions drawn at each ``(xs[i], ys[i])``."""
+        cur = self._cur
+        if cur is None:
+            return
+        if len(cur) + len(xs) > self.max_rects:
+            self._cur = None
+            return
+        Rect = pygame.Rect
+        cur.extend(Rect(x, y, width, height) for x, y in zip(xs, ys))
+
+    def present(self) -> None:
+        """Show the frame, updating only dirty regions when worthwhile."""
+        prev, cur = self._prev, self._cur
+        full = self._full or prev is None or cur is None
+        if not full:
+            dirty = prev + cur
+            area = sum(r.width * r.height for r in dirty)
+            full = area > self.max_area
+        if full:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        self._prev = cur
+        self._full = False
+
+
+__all__ = ["DirtyRenderer"]
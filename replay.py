@@ -0,0 +1,136 @@
+"""Compact binary replays of gameplay rounds.
+
+A round is fully determined by the seed of its random generator, the
+physics settings and the controls held at every physics step, so that is
+all a :class:`Replay` stores.  Each step's controls fit in a two-bit mask;
+the masks are kept one per byte and zlib-compressed on save, which shrinks
+typical rounds to well under a byte per step.
+
+File layout, all integers little-endian::
+
+    magic    6s  b"PONGRP"
+    version  B
+    flags    B   bit 0: ball collisions
+    tick     H   physics steps per second
+    seed     Q
+    steps    I   number of recorded steps
+    score    I   final score, used to check playback
+    inputs       zlib-compressed input masks, one byte per step
+
+Replays are played back by :mod:`playback`.
+"""
+
+import random
+import struct
+import zlib
+
+from constants import Physics, Ball
+
+LEFT = 1
+RIGHT = 2
+
+_MAGIC = b"PONGRP"
+# Bumped whenever the simulation changes so old replays would diverge.
+_VERSION = 2
+_HEADER = struct.Struct("<6sBBHQII")
+_COLLISIONS = 1
+
+
+class Replay:
+    """Seed, settings and per-step controls of one round.
+
+    Parameters
+    ----------
+    tick_rate:
+        Physics steps per second the round is simulated at.
+    ball_collisions:
+        Whether balls bounce off each other in the round.
+    seed:
+        Seed for the round's random generator.  A fresh one is drawn from
+        system entropy when omitted.
+    """
+
+    def __init__(
+        self,
+        tick_rate: int = Physics.TICK_RATE,
+        ball_collisions: bool = Ball.ELASTIC_COLLISIONS,
+        seed: int | None = None,
+    ) -> None:
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(63)
+        self.tick_rate = tick_rate
+        self.ball_collisions = ball_collisions
+        self.seed = seed
+        self.score = 0
+        self.inputs = bytearray()  # One control mask per physics step.
+
+    def __len__(self) -> int:
+        return len(self.inputs)
+
+    @property
+    def duration(self) -> float:
+        """Simulated length of the recording in seconds."""
+        return len(self.inputs) / self.tick_rate
+
+    def record(self, left: bool, right: bool) -> None:
+        """Append the controls held during the next physics step."""
+        self.inputs.append((LEFT if left else 0) | (RIGHT if right else 0))
+
+    def controls(self, step: int) -> tuple[bool, bool]:
+        """Return the ``(left, right)`` controls recorded for ``step``."""
+        mask = self.inputs[step]
+        return bool(mask & LEFT), bool(mask & RIGHT)
+
+    def to_bytes(self) -> bytes:
+        """Serialise the replay to its binary file format."""
+        header = _HEADER.pack(
+            _MAGIC,
+            _VERSION,
+            _COLLISIONS if self.ball_collisions else 0,
+            self.tick_rate,
+            self.seed,
+            len(self.inputs),
+            self.score,
+        )
+        return header + zlib.compress(bytes(self.inputs), 9)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        """Parse a replay produced by :meth:`to_bytes`.
+
+        ``ValueError`` is raised if ``data`` is not a valid replay.
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("replay is truncated")
+        magic, version, flags, tick_rate, seed, steps, score = (
+            _HEADER.unpack_from(data)
+        )
+        if magic != _MAGIC:
+            raise ValueError("not a replay file")
+        if version != _VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        try:
+            inputs = zlib.decompress(data[_HEADER.size:])
+        except zlib.error as exc:
+            raise ValueError("corrupt replay inputs") from exc
+        if len(inputs) != steps:
+            raise ValueError("replay step count does not match its inputs")
+
+        replay = cls(tick_rate, bool(flags & _COLLISIONS), seed)
+        replay.score = score
+        replay.inputs = bytearray(inputs)
+        return replay
+
+    def save(self, path: str) -> None:
+        """Write the replay to ``path``."""
+        with open(path, "wb") as fh:
+            fh.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        """Read a replay written by :meth:`save`."""
+        with open(path, "rb") as fh:
+            return cls.from_bytes(fh.read())
+
+
+__all__ = ["Replay", "LEFT", "RIGHT"]
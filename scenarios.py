@@ -0,0 +1,358 @@
+"""Scripted ball-storm loads that find where each part of a frame breaks.
+
+A scenario holds a round at a fixed number of balls, created with
+:func:`entities.create_ball`, and keeps a scripted set of power-up bars from
+:func:`entities.spawn_powerup` on screen.  The ball count is ramped up
+geometrically and every level is played for a number of frames, timing
+three paths of the frame separately:
+
+``physics``
+    :meth:`game.GameState.step`, including power-up hits and culling.
+``render``
+    Clearing the screen, :func:`game.draw_world` and the display flip.
+``audio``
+    :func:`synth.flush` of the sounds queued by the step.
+
+A path is sustainable at a ball count while its 95th percentile frame time
+stays within the frame budget, ``1 / Screen.FPS`` by default.  The largest
+such count is reported per path::
+
+    python scenarios.py max-speed
+    python scenarios.py all --budget-ms 8 -o stress.json
+
+Like :mod:`bench`, scenarios run under SDL's dummy drivers unless
+``SDL_VIDEODRIVER`` or ``SDL_AUDIODRIVER`` are set, so rendering is timed
+without presenting to a real window by default.
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import collections
+import json
+import math
+import random
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pygame
+
+from constants import Screen, Physics, Ball, BasePowerup, PowerupType
+from entities import create_ball, spawn_powerup
+from game import GameState, draw_world
+import synth
+
+# Paths of a frame timed separately, in the order they run.
+PATHS = ("physics", "render", "audio")
+
+# Ball count of the first level and the growth from one level to the next.
+START_BALLS = 64
+RAMP_FACTOR = 1.5
+
+# Frames timed at every level, after a few untimed ones.
+LEVEL_FRAMES = 60
+WARMUP_FRAMES = 5
+
+# Percentile of a path's frame times compared against the budget.
+PERCENTILE = 95
+
+# The ramp stops once a whole frame takes this many budgets, even if some
+# path is still within its own.
+STOP_FACTOR = 4.0
+
+
+class Scenario(NamedTuple):
+    """A scripted load held at every level of the ramp."""
+
+    description: str
+    bars: tuple[PowerupType, ...]  # Bars kept on screen, one per entry.
+    fast: bool                     # Launch balls at ``Ball.MAX_SPEED``.
+
+
+SCENARIOS = {
+    "max-speed": Scenario(
+        "balls launched in every direction at full speed, no power-ups",
+        (),
+        True,
+    ),
+    "duplicate-storm": Scenario(
+        "duplicate bars on every slot, replaced as soon as they expire",
+        (PowerupType.DUPLICATE,) * BasePowerup.MAX_ACTIVE,
+        False,
+    ),
+    "all-powerups": Scenario(
+        "a bar of every power-up type on screen at once",
+        tuple(PowerupType),
+        False,
+    ),
+}
+
+
+def _launch(state: GameState, scenario: Scenario, rng: random.Random) -> None:
+    """Add one ball somewhere in the upper half of the screen."""
+    pos = (
+        rng.randint(Ball.SIZE, Screen.WIDTH - Ball.SIZE),
+        rng.randint(Ball.SIZE, Screen.HEIGHT // 2),
+    )
+    ball = create_ball(up=rng.random() < 0.5, pos=pos, rng=rng)
+    if scenario.fast:
+        angle = rng.uniform(0.0, 2.0 * math.pi)
+        ball["vx"] = Ball.MAX_SPEED * math.cos(angle)
+        ball["vy"] = Ball.MAX_SPEED * math.sin(angle)
+    state.balls.add(ball)
+
+
+def _keep_bars(
+    state: GameState, scenario: Scenario, rng: random.Random
+) -> None:
+    """Make the bars on screen match the scenario's.
+
+    Bars spawned by the round itself are removed, and scripted bars that
+    were used up or expired are shown again.
+    """
+    powerups = state.powerups
+    wanted = collections.Counter(scenario.bars)
+    for slot in powerups.slots():
+        kind = powerups.types[slot]
+        if wanted[kind] > 0:
+            wanted[kind] -= 1
+        else:
+            powerups.remove(slot)
+    for kind, missing in wanted.items():
+        for _ in range(missing):
+            if powerups.full:
+                return
+            slot = powerups.add(spawn_powerup(rng, kind))
+            state.balls.clear_powerup_slot(slot)
+
+
+def hold(
+    state: GameState,
+    scenario: Scenario,
+    count: int,
+    rng: random.Random,
+) -> None:
+    """Bring ``state`` back to ``count`` balls and the scenario's bars.
+
+    Balls beyond ``count``, such as fresh duplicates, are dropped, and lost
+    balls are replaced by new ones.
+    """
+    balls = state.balls
+    if len(balls) > count:
+        balls.alive[count:] = False
+        balls.cull()
+    for _ in range(count - len(balls)):
+        _launch(state, scenario, rng)
+    _keep_bars(state, scenario, rng)
+
+
+def play_level(
+    state: GameState,
+    scenario: Scenario,
+    count: int,
+    rng: random.Random,
+    screen: pygame.Surface,
+    frames: int = LEVEL_FRAMES,
+) -> dict[str, np.ndarray]:
+    """Play ``frames`` frames at ``count`` balls and time every path.
+
+    Returns
+    -------
+    dict[str, numpy.ndarray]
+        Seconds spent in each path of :data:`PATHS`, one entry per frame.
+        Audio is left out when the mixer is not running.
+    """
+    dt = 1.0 / Physics.TICK_RATE
+    audio = pygame.mixer.get_init() is not None
+    times = {path: np.zeros(frames) for path in PATHS}
+    clock = time.perf_counter
+    for frame in range(-WARMUP_FRAMES, frames):
+        hold(state, scenario, count, rng)
+        start = clock()
+        state.step(dt, False, False)
+        stepped = clock()
+        screen.fill("black")
+        draw_world(screen, state, 1.0)
+        pygame.display.flip()
+        drawn = clock()
+        synth.flush()
+        flushed = clock()
+        if frame >= 0:
+            times["physics"][frame] = stepped - start
+            times["render"][frame] = drawn - stepped
+            times["audio"][frame] = flushed - drawn
+    if not audio:
+        del times["audio"]
+    return times
+
+
+def ramp(
+    name: str,
+    budget: float = 1.0 / Screen.FPS,
+    start: int = START_BALLS,
+    factor: float = RAMP_FACTOR,
+    limit: int = 1_000_000,
+    frames: int = LEVEL_FRAMES,
+    seed: int = 0,
+) -> dict:
+    """Ramp the ball count of scenario ``name`` until frames are too slow.
+
+    Parameters
+    ----------
+    name:
+        Key of the scenario in :data:`SCENARIOS`.
+    budget:
+        Frame budget in seconds each path is measured against.
+    start, factor:
+        Ball count of the first level and its growth per level.
+    limit:
+        Largest ball count tried.
+    frames:
+        Frames timed at every level.
+    seed:
+        Seed of the round and of the scripted load.
+
+    Returns
+    -------
+    dict
+        The scenario, the budget in milliseconds, the ``levels`` played with
+        each path's percentile frame time in milliseconds, and per path the
+        largest sustainable ``max_balls``.  ``exceeded`` is ``False`` when
+        the path stayed within budget at every level that was played.
+    """
+    scenario = SCENARIOS[name]
+    screen = pygame.display.get_surface()
+    state = GameState(seed=seed)
+    rng = random.Random(seed)
+    levels = []
+    paths: dict[str, dict] = {}
+    count = start
+    while count <= limit:
+        times = play_level(state, scenario, count, rng, screen, frames)
+        level = {"balls": count}
+        for path, values in times.items():
+            ms = float(np.percentile(values, PERCENTILE)) * 1000
+            level[f"{path}_ms"] = round(ms, 3)
+            result = paths.setdefault(
+                path, {"max_balls": 0, "exceeded": False}
+            )
+            if ms > budget * 1000:
+                result["exceeded"] = True
+            elif not result["exceeded"]:
+                result["max_balls"] = count
+        levels.append(level)
+        print(
+            f"{name:>16} {count:>8} balls "
+            + " ".join(f"{p} {level[f'{p}_ms']:7.2f}ms" for p in times),
+            file=sys.stderr,
+        )
+        frame = sum(np.percentile(v, PERCENTILE) for v in times.values())
+        if frame > STOP_FACTOR * budget or all(
+            result["exceeded"] for result in paths.values()
+        ):
+            break
+        count = max(count + 1, int(count * factor))
+    return {
+        "scenario": name,
+        "description": scenario.description,
+        "budget_ms": budget * 1000,
+        "paths": paths,
+        "levels": levels,
+    }
+
+
+def _init() -> None:
+    """Open the display and start the mixer and sounds if possible."""
+    pygame.display.init()
+    pygame.display.set_mode((Screen.WIDTH, Screen.HEIGHT))
+    try:
+        pygame.mixer.init(44100, -16, 1, 512)
+    except pygame.error:
+        # No audio device: the audio path is not measured.
+        return
+    synth.init_sounds()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run stress scenarios from the command line and return the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "scenario",
+        choices=[*SCENARIOS, "all"],
+        help="scenario to ramp, or all of them",
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=1000 / Screen.FPS,
+        help="frame budget in milliseconds (default: one frame at "
+        f"{Screen.FPS} FPS)",
+    )
+    parser.add_argument(
+        "--start",
+        type=int,
+        default=START_BALLS,
+        help=f"ball count of the first level (default {START_BALLS})",
+    )
+    parser.add_argument(
+        "--factor",
+        type=float,
+        default=RAMP_FACTOR,
+        help=f"ball count growth per level (default {RAMP_FACTOR})",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=1_000_000,
+        help="largest ball count tried (default 1000000)",
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        default=LEVEL_FRAMES,
+        help=f"frames timed per level (default {LEVEL_FRAMES})",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="random seed (default 0)"
+    )
+    parser.add_argument(
+        "-o", "--output", metavar="PATH", help="also write results as JSON"
+    )
+    args = parser.parse_args(argv)
+    if args.factor <= 1:
+        parser.error("--factor must be greater than 1")
+
+    _init()
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = [
+        ramp(
+            name,
+            args.budget_ms / 1000,
+            args.start,
+            args.factor,
+            args.limit,
+            args.frames,
+            args.seed,
+        )
+        for name in names
+    ]
+    pygame.quit()
+
+    for result in results:
+        print(f"{result['scenario']}: {result['description']}")
+        for path, stats in result["paths"].items():
+            note = "" if stats["exceeded"] else " (budget not reached)"
+            print(f"  {path:>8}: {stats['max_balls']:>8} balls{note}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"scenarios": results}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
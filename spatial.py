@@ -0,0 +1,125 @@
+"""Uniform-grid spatial hash used as a collision broad phase.
+
+Balls are bucketed by the grid cell containing their hitbox corner.  The
+buckets are built with a single sort, so rebuilding the hash every physics
+step costs a few array operations even with thousands of balls.
+:meth:`SpatialHash.pairs` then lists the ball pairs sharing or neighbouring
+a cell.
+"""
+
+import numpy as np
+
+from constants import Screen, Ball
+
+
+# Neighbour offsets checked by :meth:`SpatialHash.pairs`.  Only half of the
+# surrounding cells are needed because every pair is visited from one side.
+_NEIGHBOURS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+class SpatialHash:
+    """Grid of ball indices keyed by cell.
+
+    Parameters
+    ----------
+    cell_size:
+        Edge length of a grid cell in pixels.  It must not be smaller than
+        ``Ball.SIZE`` so a ball only ever spans its own and neighbouring
+        cells.
+    """
+
+    def __init__(self, cell_size: int = Ball.SIZE * 2) -> None:
+        if cell_size < Ball.SIZE:
+            raise ValueError("cell_size must be at least Ball.SIZE")
+        self.cell_size = cell_size
+        # One spare column and row on every side collects anything that has
+        # left the screen, e.g. balls falling past the paddle.
+        self.cols = Screen.WIDTH // cell_size + 3
+        self.rows = Screen.HEIGHT // cell_size + 3
+        self._order = np.zeros(0, dtype=np.int64)
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._sorted_keys = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _cells(self, xs: np.ndarray, ys: np.ndarray) -> tuple:
+        """Return the clamped cell column and row for each position."""
+        cx = np.floor_divide(xs, self.cell_size).astype(np.int64) + 1
+        cy = np.floor_divide(ys, self.cell_size).astype(np.int64) + 1
+        np.clip(cx, 0, self.cols - 1, out=cx)
+        np.clip(cy, 0, self.rows - 1, out=cy)
+        return cx, cy
+
+    def build(self, xs: np.ndarray, ys: np.ndarray) -> None:
+        """Rebuild the grid from hitbox corner positions.
+
+        Parameters
+        ----------
+        xs, ys:
+            Top-left corner of every ball's hitbox.  The ball at position
+            ``i`` is reported as index ``i`` by later queries.
+        """
+        cx, cy = self._cells(np.asarray(xs), np.asarray(ys))
+        self._keys = cy * self.cols + cx
+        self._order = np.argsort(self._keys, kind="stable")
+        self._sorted_keys = self._keys[self._order]
+
+    def pairs(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return candidate pairs of balls in the same or adjacent cells.
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            Index arrays ``(i, j)``; every unordered pair appears once.
+        """
+        n = len(self._order)
+        sorted_keys = self._sorted_keys
+        positions = np.arange(n)
+        firsts = []
+        seconds = []
+
+        # Later balls in the same cell, then balls in half the neighbours.
+        lo = positions + 1
+        hi = np.searchsorted(sorted_keys, sorted_keys, side="right")
+        self._collect(lo, hi, firsts, seconds)
+        column = sorted_keys % self.cols
+        for dx, dy in _NEIGHBOURS:
+            neighbour = sorted_keys + dy * self.cols + dx
+            if dx:
+                # Keys are flat, so stepping sideways off an edge column
+                # would wrap into the far end of another row.  ``-1`` is no
+                # cell's key.
+                edge = self.cols - 1 if dx > 0 else 0
+                neighbour[column == edge] = -1
+            lo = np.searchsorted(sorted_keys, neighbour, side="left")
+            hi = np.searchsorted(sorted_keys, neighbour, side="right")
+            self._collect(lo, hi, firsts, seconds)
+
+        if not firsts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        order = self._order
+        return (
+            order[np.concatenate(firsts)],
+            order[np.concatenate(seconds)],
+        )
+
+    @staticmethod
+    def _collect(
+        lo: np.ndarray, hi: np.ndarray, firsts: list, seconds: list
+    ) -> None:
+        """Expand per-ball ``[lo, hi)`` ranges of sorted positions to pairs."""
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        if not total:
+            return
+        firsts.append(np.repeat(np.arange(len(lo)), counts))
+        # Offset of each pair within its ball's run, added to the run start.
+        run_starts = np.cumsum(counts) - counts
+        seconds.append(
+            np.repeat(lo - run_starts, counts) + np.arange(total)
+        )
+
+
+__all__ = ["SpatialHash"]
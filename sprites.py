@@ -0,0 +1,147 @@
+"""Pre-rendered sprites for balls, paddles and power-up bars.
+
+Rasterising the same small circle with ``pygame.draw.ellipse`` for every
+ball on every frame dominates drawing once there are many balls.  Each shape
+is instead rendered once into a cached surface, and balls are submitted in a
+single ``Surface.blits`` call straight from their position arrays.  When
+even that is too slow, :func:`draw_squares` draws every ball as a plain
+square in a few NumPy passes over the screen's pixels.
+"""
+
+from itertools import repeat
+
+import numpy as np
+import pygame
+
+from constants import Ball
+
+# Colour key marking the transparent corners of ball sprites.  It must not be
+# a colour the game draws with.
+_COLOURKEY = (255, 0, 255)
+
+_SPRITES: dict[tuple, pygame.Surface] = {}
+
+
+def _finish(surf: pygame.Surface) -> pygame.Surface:
+    """Convert ``surf`` to the display format when a display exists."""
+    if pygame.display.get_surface() is not None:
+        return surf.convert()
+    return surf
+
+
+def ball_sprite(colour="white") -> pygame.Surface:
+    """Return the cached ball sprite drawn in ``colour``."""
+    key = ("ball", str(colour))
+    surf = _SPRITES.get(key)
+    if surf is None:
+        surf = pygame.Surface((Ball.SIZE, Ball.SIZE))
+        surf.fill(_COLOURKEY)
+        pygame.draw.ellipse(surf, colour, surf.get_rect())
+        surf = _finish(surf)
+        surf.set_colorkey(_COLOURKEY, pygame.RLEACCEL)
+        _SPRITES[key] = surf
+    return surf
+
+
+def rect_sprite(colour, width: int, height: int) -> pygame.Surface:
+    """Return a cached solid ``width`` × ``height`` sprite in ``colour``.
+
+    Used for the paddle, whose width changes with power-ups, and for the
+    power-up bars.
+    """
+    key = ("rect", str(colour), width, height)
+    surf = _SPRITES.get(key)
+    if surf is None:
+        surf = pygame.Surface((max(width, 0), max(height, 0)))
+        surf.fill(colour)
+        surf = _finish(surf)
+        _SPRITES[key] = surf
+    return surf
+
+
+def draw_rect(
+    surface: pygame.Surface, colour, rect: pygame.Rect
+) -> pygame.Rect:
+    """Blit a cached solid sprite over ``rect`` and return the area drawn."""
+    return surface.blit(rect_sprite(colour, rect.width, rect.height), rect)
+
+
+def draw_balls(surface: pygame.Surface, xs, ys, colour="white") -> None:
+    """Draw one ball sprite at every ``(xs[i], ys[i])`` in a single call.
+
+    Parameters
+    ----------
+    surface:
+        Destination surface.
+    xs, ys:
+        Top-left corners of the balls' hitboxes.
+    colour:
+        Ball colour.
+    """
+    sprite = ball_sprite(colour)
+    surface.blits(zip(repeat(sprite), zip(xs, ys)), doreturn=False)
+
+
+def draw_squares(surface: pygame.Surface, xs, ys, colour="white") -> None:
+    """Fill a ``Ball.SIZE`` square at every ``(xs[i], ys[i])``.
+
+    The squares are combined into one coverage mask written to the pixels
+    at once, so the cost depends mostly on the surface size rather than
+    the number of squares.
+
+    Parameters
+    ----------
+    surface:
+        Destination surface.  Those whose pixels cannot be viewed as a 2-D
+        array, such as 24-bit ones, get one square sprite blitted per ball.
+    xs, ys:
+        Integer arrays of the balls' hitbox corners.
+    colour:
+        Square colour.
+    """
+    size = Ball.SIZE
+    if surface.get_bytesize() not in (1, 2, 4):
+        sprite = rect_sprite(colour, size, size)
+        positions = zip(np.asarray(xs).tolist(), np.asarray(ys).tolist())
+        surface.blits(zip(repeat(sprite), positions), doreturn=False)
+        return
+    width, height = surface.get_size()
+    # Mark each corner in a mask padded by one ball on the top and left,
+    # then smear the marks right and down over a ball's width.
+    pad = size - 1
+    marks = np.zeros((width + pad, height + pad), dtype=bool)
+    cols = np.asarray(xs) + pad
+    rows = np.asarray(ys) + pad
+    # Squares entirely off the surface are dropped rather than clamped onto
+    # its edge.
+    shown = (cols >= 0) & (cols < width + pad) & (rows >= 0)
+    shown &= rows < height + pad
+    marks[cols[shown], rows[shown]] = True
+    across = marks.copy()
+    for d in range(1, size):
+        across[d:] |= marks[:-d]
+    down = across.copy()
+    for d in range(1, size):
+        down[:, d:] |= across[:, :-d]
+    pixels = pygame.surfarray.pixels2d(surface)
+    np.copyto(
+        pixels,
+        surface.map_rgb(pygame.Color(colour)),
+        where=down[pad:, pad:],
+    )
+    del pixels  # Unlock the surface.
+
+
+def clear_cache() -> None:
+    """Forget every cached sprite, e.g. after the display mode changes."""
+    _SPRITES.clear()
+
+
+__all__ = [
+    "ball_sprite",
+    "rect_sprite",
+    "draw_rect",
+    "draw_balls",
+    "draw_squares",
+    "clear_cache",
+]
@@ -0,0 +1,62 @@
+"""Timing of the start-up sequence, reported by ``main.py --startup-trace``.
+
+Each import or initialisation step is wrapped in :meth:`StartupTrace.step`.
+When tracing is enabled, every step is printed to stderr as it finishes,
+with the time since start-up began and how long the step itself took.
+Steps may run on a background thread; the thread is named in the report.
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTrace:
+    """Record and optionally print the duration of start-up steps.
+
+    Parameters
+    ----------
+    enabled:
+        Print each step to stderr as it finishes.
+    start:
+        ``time.perf_counter`` value that step times are measured from.
+        Defaults to the moment the trace is created.
+    """
+
+    def __init__(self, enabled: bool = False, start: float | None = None):
+        self.enabled = enabled
+        self.start = time.perf_counter() if start is None else start
+        # (name, thread, finished at, duration) for every step, in seconds.
+        self.steps: list[tuple[str, str, float, float]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name: str):
+        """Time the body of the ``with`` block as the step ``name``."""
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._record(name, now, now - began)
+
+    def mark(self, name: str) -> None:
+        """Record that the moment ``name`` has been reached."""
+        self._record(name, time.perf_counter(), 0.0)
+
+    def _record(self, name: str, now: float, duration: float) -> None:
+        thread = threading.current_thread().name
+        entry = (name, thread, now - self.start, duration)
+        with self._lock:
+            self.steps.append(entry)
+            if self.enabled:
+                print(
+                    f"startup {entry[2] * 1e3:8.1f} ms "
+                    f"{duration * 1e3:8.1f} ms  {name} [{thread}]",
+                    file=sys.stderr,
+                    flush=True,
+                )
+
+
+__all__ = ["StartupTrace"]
@@ -0,0 +1,353 @@
+"""Parallel sweeps of gameplay constants over headless autopilot rounds.
+
+Each configuration overrides attributes of the classes in
+:mod:`constants`, such as ``Ball.GRAVITY`` or ``SlowPowerup.CHANCE``, and
+plays many rounds with :func:`headless.play_round`.  Rounds are split into
+chunks run by a pool of worker processes, one per core by default.  Every
+round has its own seed derived from the sweep seed, the configuration and
+the round number, so a sweep gives the same results however it is spread
+over workers.  The score and round-length distributions of every
+configuration are summarised as one row of a CSV or Parquet file::
+
+    python sweep.py --grid Ball.GRAVITY=0.01,0.02,0.03 \\
+        --grid Ball.SPEED_INCREMENT=1.03,1.05 --rounds 2000 -o sweep.csv
+    python sweep.py --sample Ball.GRAVITY=0.01:0.04 --samples 50 \\
+        --rounds 500 -o sweep.parquet
+
+Overrides only affect values read while a round is played.  Defaults
+captured when a module is imported, such as ``BasePowerup.MAX_ACTIVE``,
+keep their original value.
+"""
+
+import argparse
+import ast
+import csv
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import constants
+from headless import play_round
+
+# Quantiles of the score and round length reported for each configuration.
+QUANTILES = (10, 25, 50, 75, 90)
+
+# Rounds handed to a worker at a time.
+CHUNK_ROUNDS = 20
+
+# Per-round values returned by workers, in order.
+_ROUND_FIELDS = ("score", "frames", "peak_balls", "finished")
+
+
+def _resolve(name: str) -> tuple[type, str]:
+    """Return the constants class and attribute named ``Class.ATTR``."""
+    owner, _, attr = name.partition(".")
+    cls = getattr(constants, owner, None)
+    if not isinstance(cls, type) or not attr or not hasattr(cls, attr):
+        raise ValueError(f"unknown constant {name!r}")
+    if not isinstance(getattr(cls, attr), (int, float)):
+        raise ValueError(f"constant {name!r} is not a number")
+    return cls, attr
+
+
+def _convert(name: str, value):
+    """Return ``value`` as the type of the constant ``name``."""
+    cls, attr = _resolve(name)
+    kind = type(getattr(cls, attr))
+    if kind is bool:
+        return bool(value)
+    if kind is int:
+        return int(round(value))
+    return float(value)
+
+
+def parse_grid(spec: str) -> tuple[str, list]:
+    """Parse ``Class.ATTR=v1,v2,...`` into the name and its values."""
+    name, _, values = spec.partition("=")
+    if not values:
+        raise ValueError(f"expected NAME=V1,V2,... but got {spec!r}")
+    return name, [
+        _convert(name, ast.literal_eval(v.strip()))
+        for v in values.split(",")
+    ]
+
+
+def parse_sample(spec: str) -> tuple[str, float, float]:
+    """Parse ``Class.ATTR=LOW:HIGH`` into the name and its range."""
+    name, _, bounds = spec.partition("=")
+    low, sep, high = bounds.partition(":")
+    if not sep:
+        raise ValueError(f"expected NAME=LOW:HIGH but got {spec!r}")
+    _resolve(name)
+    return name, float(low), float(high)
+
+
+def build_configs(
+    grid: list[tuple[str, list]],
+    sample: list[tuple[str, float, float]],
+    samples: int,
+    seed: int,
+) -> list[dict]:
+    """Return the overrides of every configuration to sweep.
+
+    Every combination of the ``grid`` values is paired with ``samples``
+    draws of the ``sample`` ranges, taken uniformly with a generator seeded
+    by ``seed``.  Without ranges each grid combination is used once.
+    """
+    rng = random.Random(seed)
+    names = [name for name, _ in grid]
+    configs = []
+    for values in itertools.product(*(values for _, values in grid)):
+        fixed = dict(zip(names, values))
+        for _ in range(samples if sample else 1):
+            drawn = {
+                name: _convert(name, rng.uniform(low, high))
+                for name, low, high in sample
+            }
+            configs.append({**fixed, **drawn})
+    return configs
+
+
+def apply_overrides(overrides: dict) -> dict:
+    """Set the constants in ``overrides`` and return their previous values.
+
+    Passing the returned dictionary back restores the originals.
+    """
+    previous = {}
+    for name, value in overrides.items():
+        cls, attr = _resolve(name)
+        previous[name] = getattr(cls, attr)
+        setattr(cls, attr, value)
+    return previous
+
+
+def round_seed(seed: int, config: int, round_index: int) -> int:
+    """Return the seed of one round, independent of how rounds are split."""
+    sequence = np.random.SeedSequence([seed, config, round_index])
+    return int(sequence.generate_state(1)[0])
+
+
+def _play_chunk(
+    task: tuple[int, dict, range, int, int | None, bool]
+) -> tuple[int, range, list[tuple]]:
+    """Play a chunk of rounds of one configuration in a worker process."""
+    config, overrides, rounds, seed, max_frames, ball_collisions = task
+    previous = apply_overrides(overrides)
+    try:
+        results = []
+        for i in rounds:
+            stats = play_round(
+                max_frames, ball_collisions, round_seed(seed, config, i)
+            )
+            results.append(tuple(stats[field] for field in _ROUND_FIELDS))
+    finally:
+        apply_overrides(previous)
+    return config, rounds, results
+
+
+def summarise(overrides: dict, rounds: np.ndarray) -> dict:
+    """Return the result row of one configuration.
+
+    Parameters
+    ----------
+    overrides:
+        Constants set for the configuration; they lead the row.
+    rounds:
+        One row of ``_ROUND_FIELDS`` values per round played.
+    """
+    score, frames, peak_balls, finished = rounds.T
+    row = dict(overrides)
+    row["rounds"] = len(rounds)
+    for name, values in (("score", score), ("frames", frames)):
+        row[f"{name}_mean"] = float(values.mean())
+        row[f"{name}_std"] = float(values.std())
+        row[f"{name}_min"] = float(values.min())
+        for q, value in zip(QUANTILES, np.percentile(values, QUANTILES)):
+            row[f"{name}_p{q}"] = float(value)
+        row[f"{name}_max"] = float(values.max())
+    row["peak_balls_mean"] = float(peak_balls.mean())
+    row["peak_balls_max"] = int(peak_balls.max())
+    row["finished"] = float(finished.mean())
+    return row
+
+
+def run_sweep(
+    configs: list[dict],
+    rounds: int,
+    max_frames: int | None = None,
+    ball_collisions: bool = constants.Ball.ELASTIC_COLLISIONS,
+    seed: int = 0,
+    workers: int | None = None,
+    chunk: int = CHUNK_ROUNDS,
+) -> list[dict]:
+    """Play ``rounds`` rounds of every configuration and summarise them.
+
+    Parameters
+    ----------
+    configs:
+        Overrides of each configuration, e.g. from :func:`build_configs`.
+    rounds:
+        Rounds played per configuration.
+    max_frames:
+        Optional per-round frame cap passed to :func:`headless.play_round`.
+    ball_collisions:
+        Let balls bounce elastically off each other.
+    seed:
+        Sweep seed that every round's seed is derived from.
+    workers:
+        Worker processes; defaults to the number of CPUs.
+    chunk:
+        Rounds handed to a worker at a time.
+
+    Returns
+    -------
+    list[dict]
+        One :func:`summarise` row per configuration, in order.
+    """
+    results = [np.zeros((rounds, len(_ROUND_FIELDS))) for _ in configs]
+    tasks = [
+        (
+            config,
+            overrides,
+            range(start, min(start + chunk, rounds)),
+            seed,
+            max_frames,
+            ball_collisions,
+        )
+        for config, overrides in enumerate(configs)
+        for start in range(0, rounds, chunk)
+    ]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_play_chunk, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            config, played, values = future.result()
+            results[config][played.start:played.stop] = values
+            print(
+                f"\r{done}/{len(tasks)} chunks "
+                f"{time.perf_counter() - started:.0f}s",
+                end="",
+                file=sys.stderr,
+                flush=True,
+            )
+    print(file=sys.stderr)
+    return [
+        summarise(overrides, values)
+        for overrides, values in zip(configs, results)
+    ]
+
+
+def write_results(rows: list[dict], path: str) -> None:
+    """Write result rows to ``path``, as Parquet if it ends in ``.parquet``.
+
+    Parquet output needs the optional ``pyarrow`` package.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.Table.from_pylist(rows), path)
+        return
+    fields = list(dict.fromkeys(key for row in rows for key in row))
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run a sweep from the command line and return the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        metavar="NAME=V1,V2",
+        help="sweep constant NAME over the listed values; repeatable",
+    )
+    parser.add_argument(
+        "--sample",
+        action="append",
+        default=[],
+        metavar="NAME=LOW:HIGH",
+        help="draw constant NAME uniformly from a range; repeatable",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=20,
+        help="random draws per grid combination with --sample (default 20)",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=1000,
+        help="rounds per configuration (default 1000)",
+    )
+    parser.add_argument(
+        "--max-frames",
+        type=int,
+        default=36_000,
+        metavar="N",
+        help="stop each round after N frames (default 36000)",
+    )
+    parser.add_argument(
+        "--ball-collisions",
+        action="store_true",
+        help="let balls bounce elastically off each other",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="sweep seed (default 0)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="sweep.csv",
+        metavar="PATH",
+        help="results file, Parquet if it ends in .parquet (default "
+        "sweep.csv)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        grid = [parse_grid(spec) for spec in args.grid]
+        sample = [parse_sample(spec) for spec in args.sample]
+    except (ValueError, SyntaxError) as exc:
+        parser.error(str(exc))
+    if args.output.endswith(".parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("writing Parquet needs pyarrow; use a .csv path")
+
+    configs = build_configs(grid, sample, args.samples, args.seed)
+    workers = args.workers or os.cpu_count()
+    print(
+        f"{len(configs)} configurations x {args.rounds} rounds "
+        f"on {workers} workers",
+        file=sys.stderr,
+    )
+    rows = run_sweep(
+        configs,
+        args.rounds,
+        args.max_frames,
+        args.ball_collisions,
+        args.seed,
+        workers,
+    )
+    write_results(rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,49 @@
-"""Sound synthesis helpers for generating simple effects."""
+"""Sound synthesis helpers for generating simple effects.
+
+Gameplay queues sound events through an :class:`AudioScheduler` instead of
+playing them inline; it coalesces each frame's events and plays them from a
+small fixed pool of mixer voices.
+
+Generated waveforms are stored in a versioned on-disk cache as ``.npy``
+files.  Warm starts memory-map those files and hand the samples straight to
+the mixer, so NumPy is only imported when a waveform has to be synthesised.
+"""
+
+import ast
+import math
+import mmap
+import os
+from pathlib import Path
 
-import numpy as np
 from pygame import mixer
 import pygame
 
 SAMPLE_RATE = 44100
 
+# Bump whenever the synthesis changes so stale waveforms are not reused.
+CACHE_VERSION = 1
+
+
+def cache_dir() -> Path:
+    """Return the directory holding cached waveforms.
+
+    ``PONG_CACHE_DIR`` overrides the location; otherwise the standard
+    per-user cache directory is used.
+    """
+    root = os.environ.get("PONG_CACHE_DIR")
+    if root is None:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        root = Path(base) / "pong"
+    return Path(root) / f"sounds-v{CACHE_VERSION}"
+
 
 def _enveloped_sine(
     freq: float,
     duration: float,
     volume: float,
-) -> mixer.Sound:
-    """Return a sine wave burst shaped by an exponential envelope.
+    channels: int,
+):
+    """Return int16 samples of a sine burst shaped by an exponential envelope.
 
     Parameters
     ----------
@@ -22,7 +53,12 @@ def _enveloped_sine(
         Length of the sound in seconds.
     volume:
         Peak volume as a multiplier between 0 and 1.
+    channels:
+        Number of mixer channels to duplicate the mono signal across.
     """
+    # Only needed on a cache miss, so keep it off the warm start path.
+    import numpy as np
+
     n_samples = int(SAMPLE_RATE * duration)
     t = np.linspace(0, duration, n_samples, endpoint=False)
     wave = np.sin(2 * np.pi * freq * t)
@@ -31,21 +67,229 @@ def _enveloped_sine(
     wave = wave * envelope * volume
     audio = (wave * 32767).astype(np.int16)
 
-    init = pygame.mixer.get_init()
-    channels = init[2] if init else 1
-    if channels > 1 and audio.ndim == 1:
+    if channels > 1:
         # Duplicate the mono signal for stereo mixers.
         audio = np.repeat(audio[:, None], channels, axis=1)
+    return audio
+
+
+def _npy_data_offset(buf, shape: tuple) -> int:
+    """Return where the samples start in the ``.npy`` file held in ``buf``.
+
+    The header is parsed with the standard library so loading needs no
+    NumPy.  ``ValueError`` is raised unless the file holds C-ordered int16
+    samples of the given ``shape``.
+    """
+    if bytes(buf[:6]) != b"\x93NUMPY":
+        raise ValueError("not an .npy file")
+    if buf[6] == 1:
+        start = 10
+        header_len = int.from_bytes(buf[8:10], "little")
+    else:
+        start = 12
+        header_len = int.from_bytes(buf[8:12], "little")
+    header = ast.literal_eval(
+        bytes(buf[start:start + header_len]).decode("latin1")
+    )
+    if (
+        header.get("descr") != "<i2"
+        or header.get("fortran_order")
+        or tuple(header.get("shape", ())) != shape
+    ):
+        raise ValueError("unexpected waveform layout")
+    return start + header_len
+
+
+def _load_cached(path: Path, shape: tuple) -> mixer.Sound | None:
+    """Return the sound cached at ``path``, or ``None`` if it is unusable."""
+    try:
+        with open(path, "rb") as fh, mmap.mmap(
+            fh.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            offset = _npy_data_offset(mm, shape)
+            # The mixer copies the samples, so the mapping can close after.
+            with memoryview(mm) as view, view[offset:] as samples:
+                return mixer.Sound(buffer=samples)
+    except (OSError, ValueError, SyntaxError):
+        return None
+
+
+def _store_cached(path: Path, audio) -> None:
+    """Write ``audio`` to ``path`` atomically, ignoring unwritable caches."""
+    import numpy as np
+
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as fh:
+            np.save(fh, audio)
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def _cached_sine(freq: float, duration: float, volume: float) -> mixer.Sound:
+    """Return an enveloped sine sound, synthesising it only on a cache miss.
+
+    Waveforms are keyed by frequency, duration, volume, sample rate and the
+    mixer's channel count.
+    """
+    init = pygame.mixer.get_init()
+    channels = init[2] if init else 1
+    n_samples = int(SAMPLE_RATE * duration)
+    shape = (n_samples,) if channels == 1 else (n_samples, channels)
 
-    return pygame.sndarray.make_sound(audio)
+    name = f"{freq:g}_{duration:g}_{volume:g}_{SAMPLE_RATE}_{channels}.npy"
+    path = cache_dir() / name
+    sound = _load_cached(path, shape)
+    if sound is None:
+        audio = _enveloped_sine(freq, duration, volume, channels)
+        _store_cached(path, audio)
+        sound = mixer.Sound(buffer=audio.tobytes())
+    return sound
 
 
 SOUNDS: dict[str, mixer.Sound] = {}
 
 
 def init_sounds() -> None:
-    """Generate all game sound effects and store them in ``SOUNDS``."""
-    SOUNDS["bounce"] = _enveloped_sine(880, 0.12, 0.5)
-    SOUNDS["powerup"] = _enveloped_sine(1200, 0.15, 0.6)
-    SOUNDS["menu_move"] = _enveloped_sine(660, 0.07, 0.4)
-    SOUNDS["menu_select"] = _enveloped_sine(520, 0.15, 0.5)
+    """Load all game sound effects and store them in ``SOUNDS``."""
+    SOUNDS["bounce"] = _cached_sine(880, 0.12, 0.5)
+    SOUNDS["powerup"] = _cached_sine(1200, 0.15, 0.6)
+    SOUNDS["menu_move"] = _cached_sine(660, 0.07, 0.4)
+    SOUNDS["menu_select"] = _cached_sine(520, 0.15, 0.5)
+
+
+def play(name: str) -> None:
+    """Play the sound ``name`` if it has been generated.
+
+    Headless runs never call :func:`init_sounds`, so missing sounds are
+    silently ignored instead of raising ``KeyError``.
+    """
+    sound = SOUNDS.get(name)
+    if sound is not None:
+        sound.play()
+
+
+# Higher priorities win voices and the per-frame budget over lower ones.
+PRIORITIES = {
+    "bounce": 0,
+    "menu_move": 1,
+    "menu_select": 2,
+    "powerup": 2,
+}
+
+
+class AudioScheduler:
+    """Coalesce queued sound events and play them from a fixed voice pool.
+
+    Every event queued during a frame is merged per sound, so a frame with
+    dozens of bounces plays the bounce sound once, louder.  :meth:`flush`
+    then plays the merged events in priority order, up to ``budget`` plays,
+    on voices reserved from the mixer.  When every voice is busy the one
+    playing the lowest-priority sound is reused, provided it does not
+    outrank the new sound.  :meth:`throttle` limits how often a sound can
+    play at all, to shed load.
+
+    Parameters
+    ----------
+    voices:
+        Number of mixer channels reserved for scheduled sounds.
+    budget:
+        Maximum number of sounds started per :meth:`flush`.
+    gain:
+        Volume of a single event.  Each doubling of the event count adds
+        the same amount again, capped at full volume.
+    """
+
+    def __init__(self, voices: int = 8, budget: int = 4, gain: float = 0.6):
+        self.voices = voices
+        self.budget = budget
+        self.gain = gain
+        self._pending: dict[str, int] = {}
+        self._channels: list[mixer.Channel] = []
+        self._priority: list[int] = []  # Priority of each voice's sound.
+        self._intervals: dict[str, int] = {}  # Flushes between plays.
+        self._last: dict[str, int] = {}  # Flush each sound last played in.
+        self._flushes = 0
+
+    def queue(self, name: str, count: int = 1) -> None:
+        """Record ``count`` events for sound ``name`` this frame."""
+        self._pending[name] = self._pending.get(name, 0) + count
+
+    def throttle(self, name: str, flushes: int = 1) -> None:
+        """Play sound ``name`` at most once every ``flushes`` flushes.
+
+        Events queued for it in between are dropped.  A value of one lifts
+        the limit.
+        """
+        if flushes > 1:
+            self._intervals[name] = flushes
+        else:
+            self._intervals.pop(name, None)
+
+    def _reserve_voices(self) -> None:
+        """Set aside the voice pool once the mixer is running."""
+        # Add the pool on top of the existing channels and reserve it, so
+        # ``Sound.play`` elsewhere keeps the channels it had before.
+        mixer.set_num_channels(mixer.get_num_channels() + self.voices)
+        mixer.set_reserved(self.voices)
+        self._channels = [mixer.Channel(i) for i in range(self.voices)]
+        self._priority = [0] * self.voices
+
+    def _voice(self, priority: int) -> int | None:
+        """Return the index of a voice for a sound of ``priority``."""
+        for i, channel in enumerate(self._channels):
+            if not channel.get_busy():
+                return i
+        lowest = min(range(self.voices), key=self._priority.__getitem__)
+        if self._priority[lowest] <= priority:
+            return lowest
+        return None
+
+    def flush(self) -> None:
+        """Play the events queued since the last flush."""
+        self._flushes += 1
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = {}
+        if not SOUNDS or not mixer.get_init():
+            return
+        if not self._channels:
+            self._reserve_voices()
+
+        for name, interval in self._intervals.items():
+            if self._flushes - self._last.get(name, -interval) < interval:
+                pending.pop(name, None)
+        ordered = sorted(
+            pending.items(), key=lambda item: -PRIORITIES.get(item[0], 0)
+        )
+        for name, count in ordered[: self.budget]:
+            sound = SOUNDS.get(name)
+            if sound is None:
+                continue
+            priority = PRIORITIES.get(name, 0)
+            voice = self._voice(priority)
+            if voice is None:
+                continue
+            channel = self._channels[voice]
+            channel.set_volume(
+                min(1.0, self.gain * (1 + math.log2(count)))
+            )
+            channel.play(sound)
+            self._priority[voice] = priority
+            self._last[name] = self._flushes
+
+
+AUDIO = AudioScheduler()
+
+
+def queue(name: str, count: int = 1) -> None:
+    """Queue ``count`` events for sound ``name`` on the shared scheduler."""
+    AUDIO.queue(name, count)
+
+
+def flush() -> None:
+    """Play the sounds queued on the shared scheduler this frame."""
+    AUDIO.flush()
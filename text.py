@@ -0,0 +1,139 @@
+"""Shared fonts and cached text rendering for the UI.
+
+:func:`get_font` resolves each system font once per process.  ``Font.render``
+rasterises the whole string every call, which adds up when
+the score and per-ball debug lines are redrawn each frame.  A
+:class:`TextRenderer` keeps an atlas of individually rendered glyphs and an
+LRU cache of whole strings, so steady-state frames only blit surfaces that
+already exist.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+# Characters rendered into every atlas up front: enough for numbers and the
+# debug overlay, so a typical frame never needs to render a new glyph.
+ATLAS_CHARS = (
+    "0123456789.-: "
+    "abcdefghijklmnopqrstuvwxyz"
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+)
+
+_FONTS: dict[tuple[str | None, int], pygame.font.Font] = {}
+
+
+def get_font(size: int, name: str | None = None) -> pygame.font.Font:
+    """Return the system font ``name`` at ``size``, loading it only once.
+
+    ``pygame.font.SysFont`` searches the system font list on every call, so
+    screens share fonts through this registry instead of creating their own.
+
+    Parameters
+    ----------
+    size:
+        Font size in points.
+    name:
+        System font name, or ``None`` for the default font.
+    """
+    key = (name, size)
+    font = _FONTS.get(key)
+    if font is None:
+        if name is None:
+            # ``SysFont`` would scan every installed font only to fall back
+            # to the bundled default, so load that directly.
+            font = pygame.font.Font(None, size)
+        else:
+            font = pygame.font.SysFont(name, size)
+        _FONTS[key] = font
+    return font
+
+
+class TextRenderer:
+    """Draw text in one font and colour from cached surfaces.
+
+    Parameters
+    ----------
+    font:
+        Font used to rasterise glyphs and strings.
+    colour:
+        Text colour.
+    max_strings:
+        Number of whole-string surfaces kept by :meth:`render` before the
+        least recently used one is evicted.
+    """
+
+    def __init__(
+        self,
+        font: pygame.font.Font,
+        colour,
+        max_strings: int = 128,
+    ) -> None:
+        self.font = font
+        self.colour = colour
+        self.max_strings = max_strings
+        self.height = font.get_height()
+        self._strings: OrderedDict[str, pygame.Surface] = OrderedDict()
+        self._glyphs: dict[str, pygame.Surface] = {}
+        for ch in ATLAS_CHARS:
+            self.glyph(ch)
+
+    def glyph(self, ch: str) -> pygame.Surface:
+        """Return the atlas surface for the single character ``ch``."""
+        surf = self._glyphs.get(ch)
+        if surf is None:
+            surf = self.font.render(ch, True, self.colour)
+            self._glyphs[ch] = surf
+        return surf
+
+    def render(self, text: str) -> pygame.Surface:
+        """Return a surface for ``text``, rendering it only on a cache miss.
+
+        Best for labels that rarely change; use :meth:`draw` for text that
+        changes every frame, such as numbers.
+        """
+        surf = self._strings.get(text)
+        if surf is not None:
+            self._strings.move_to_end(text)
+            return surf
+        surf = self.font.render(text, True, self.colour)
+        self._strings[text] = surf
+        if len(self._strings) > self.max_strings:
+            self._strings.popitem(last=False)
+        return surf
+
+    def width(self, text: str) -> int:
+        """Return the width :meth:`draw` uses for ``text``."""
+        return sum(self.glyph(ch).get_width() for ch in text)
+
+    def draw(
+        self, surface: pygame.Surface, text: str, pos: tuple[float, float]
+    ) -> pygame.Rect:
+        """Blit ``text`` onto ``surface`` glyph by glyph.
+
+        Parameters
+        ----------
+        surface:
+            Destination surface.
+        text:
+            String to draw.
+        pos:
+            Top-left corner of the text.
+
+        Returns
+        -------
+        pygame.Rect
+            Area covered by the drawn text.
+        """
+        x, y = pos
+        start = x
+        batch = []
+        for ch in text:
+            surf = self.glyph(ch)
+            batch.append((surf, (x, y)))
+            x += surf.get_width()
+        surface.blits(batch, doreturn=False)
+        return pygame.Rect(start, y, x - start, self.height)
+
+
+__all__ = ["get_font", "TextRenderer", "ATLAS_CHARS"]
@@ -23,7 +23,7 @@ def snappy_ease(t: float) -> float:
     return cubic_bezier(t, 0.0, 0.1, 0.9, 1.0)
 
 
-def random_velocity(up: bool = False) -> tuple[float, float]:
+def random_velocity(up: bool = False, rng=random) -> tuple[float, float]:
     """Return a random starting velocity for a ball.
 
     Parameters
@@ -31,21 +31,24 @@ def random_velocity(up: bool = False) -> tuple[float, float]:
     up:
         When ``True`` the vertical component is negated so the ball travels
         upward.
+    rng:
+        Source of randomness, e.g. a seeded :class:`random.Random`.
+        Defaults to the global generator.
     """
 
     # Choose a horizontal component first. The ``range`` is inclusive/exclusive
     # so we convert it to a list before picking a value.
-    vx = float(random.choice(list(range(*Ball.SPEED_X_RANGE))))
+    vx = float(rng.choice(list(range(*Ball.SPEED_X_RANGE))))
 
     # Vertical speed is always positive; flip it if the ball should move up.
-    vy = float(random.choice(range(*Ball.SPEED_Y_RANGE)))
+    vy = float(rng.choice(range(*Ball.SPEED_Y_RANGE)))
     if up:
         vy *= -1
     return vx, vy
 
 
 def duplicate_velocity(
-    vx_current: float, vy_current: float
+    vx_current: float, vy_current: float, rng=random
 ) -> tuple[float, float]:
     """Generate a velocity of equal speed in a new random direction.
 
@@ -55,13 +58,15 @@ def duplicate_velocity(
         Current horizontal velocity of the ball.
     vy_current:
         Current vertical velocity of the ball; its sign is preserved.
+    rng:
+        Source of randomness.  Defaults to the global generator.
     """
 
     speed = math.hypot(vx_current, vy_current)
     while True:
         # Pick a random direction but avoid angles close to 0 or π, which would
         # result in a horizontal trajectory that is less interesting.
-        ang = random.uniform(0.1, 3.04)
+        ang = rng.uniform(0.1, 3.04)
         vx = speed * math.cos(ang)
 
         # If we accidentally picked an almost horizontal angle, try again.
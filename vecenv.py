@@ -0,0 +1,540 @@
+"""Lock-step simulation of many independent rounds for training bots.
+
+:class:`VecPongEnv` plays ``num_envs`` rounds at once under the rules of
+:class:`game.GameState`: the same paddle easing, ball bounces, scoring and
+power-ups, all tuned by :mod:`constants`.  Every quantity is a NumPy array
+with one row per environment and, for balls, one column per ball slot, so a
+step costs a fixed number of array operations however many rounds are
+simulated.  The interface follows the vectorised Gym convention:
+:meth:`VecPongEnv.step` takes one action per environment and returns
+observations, rewards and done flags, and rounds that end are restarted
+automatically.
+
+It differs from :class:`game.GameState` in three ways.  Each environment
+holds at most ``max_balls`` balls, and duplicates that do not fit are
+dropped.  Balls never collide with each other.  Randomness comes from a
+NumPy generator, so a seed does not reproduce the round a ``GameState``
+with the same seed would play.
+"""
+
+import numpy as np
+
+from constants import (
+    Screen,
+    Physics,
+    Paddle,
+    Ball,
+    BasePowerup,
+    DuplicatePowerup,
+    PaddleBigPowerup,
+    PaddleSmallPowerup,
+    SlowPowerup,
+    PowerupType,
+)
+from physics import sweep_bounds
+from replay import LEFT, RIGHT
+from utils import cubic_bezier
+
+# Power-up types in the order of the type codes used in observations, which
+# is also the order :func:`entities.spawn_powerup` picks from.
+POWERUP_TYPES = (
+    PowerupType.DUPLICATE,
+    PowerupType.PADDLE_BIG,
+    PowerupType.PADDLE_SMALL,
+    PowerupType.SLOW,
+)
+_SETTINGS = (
+    DuplicatePowerup,
+    PaddleBigPowerup,
+    PaddleSmallPowerup,
+    SlowPowerup,
+)
+_DUPLICATE, _PADDLE_BIG, _PADDLE_SMALL, _SLOW = range(len(POWERUP_TYPES))
+
+# Observation values per environment, then per ball slot and per bar slot.
+PADDLE_FEATURES = 4  # Paddle x, velocity and width, slow-motion time left.
+BALL_FEATURES = 5    # x, y, vx, vy and 1 if the ball is in play.
+BAR_FEATURES = 4     # Left, top, type code and 1 if the bar is shown.
+
+
+class VecPongEnv:
+    """Step ``num_envs`` independent rounds in lock-step.
+
+    Actions are bitsets of the controls held for one step, using
+    :data:`replay.LEFT` and :data:`replay.RIGHT`, so ``0`` keeps still and
+    ``LEFT | RIGHT`` behaves like holding both keys.  Each step is one
+    fixed physics step of ``1 / Physics.TICK_RATE`` seconds.
+
+    Observations are ``float32`` arrays of shape
+    ``(num_envs, observation_size)``.  Each row holds the
+    ``PADDLE_FEATURES`` paddle values, then ``BALL_FEATURES`` values for
+    every ball slot and ``BAR_FEATURES`` values for every power-up slot.
+    Positions are hitbox corners in pixels and velocities are in pixels per
+    frame; empty slots are all zeros.
+
+    Parameters
+    ----------
+    num_envs:
+        Number of rounds simulated side by side.
+    max_balls:
+        Ball slots per environment.  With the default of one, duplicate
+        power-ups have no effect.
+    max_powerups:
+        Power-up bars shown at once per environment; ``0`` disables
+        power-ups.
+    seed:
+        Seed for the random generator.  ``None`` seeds it from system
+        entropy.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        max_balls: int = 1,
+        max_powerups: int = BasePowerup.MAX_ACTIVE,
+        seed: int | None = None,
+    ) -> None:
+        if num_envs < 1 or max_balls < 1 or max_powerups < 0:
+            raise ValueError("need at least one environment and ball slot")
+        self.num_envs = num_envs
+        self.max_balls = max_balls
+        self.max_powerups = max_powerups
+        self.observation_size = (
+            PADDLE_FEATURES
+            + BALL_FEATURES * max_balls
+            + BAR_FEATURES * max_powerups
+        )
+        self.dt = 1.0 / Physics.TICK_RATE
+        self.rng = np.random.default_rng(seed)
+
+        envs = num_envs
+        balls = (num_envs, max_balls)
+        bars = (num_envs, max_powerups)
+
+        # Paddle state, mirroring the attributes of ``GameState``.
+        self.paddle_x = np.zeros(envs)  # Sub-pixel position.
+        self.paddle_rx = np.zeros(envs, dtype=np.int64)  # Rect position.
+        self.paddle_width = np.zeros(envs, dtype=np.int64)
+        self.paddle_vx = np.zeros(envs)
+        self.paddle_target_vx = np.zeros(envs)
+        self.paddle_start_vx = np.zeros(envs)
+        self.transition_t = np.ones(envs)
+        self.paddle_power_timer = np.zeros(envs)
+        self.slow_timer = np.zeros(envs)
+        self.score = np.zeros(envs, dtype=np.int64)
+        # Score of the round each environment finished most recently.
+        self.final_score = np.zeros(envs, dtype=np.int64)
+
+        # Ball slots, laid out like the columns of ``physics.BallStore``.
+        self.x = np.zeros(balls)
+        self.y = np.zeros(balls)
+        self.px = np.zeros(balls)
+        self.py = np.zeros(balls)
+        self.vx = np.zeros(balls)
+        self.vy = np.zeros(balls)
+        self.rx = np.zeros(balls, dtype=np.int64)
+        self.ry = np.zeros(balls, dtype=np.int64)
+        self.alive = np.zeros(balls, dtype=np.bool_)
+        # Whether each ball is inside each bar, like the per-ball bitsets.
+        self.inside = np.zeros(balls + (max_powerups,), dtype=np.bool_)
+
+        # Power-up bar slots, laid out like ``powerups.PowerupSet``.
+        self.bar_left = np.zeros(bars, dtype=np.int64)
+        self.bar_top = np.zeros(bars, dtype=np.int64)
+        self.bar_right = np.zeros(bars, dtype=np.int64)
+        self.bar_bottom = np.zeros(bars, dtype=np.int64)
+        self.bar_timer = np.zeros(bars)
+        self.bar_type = np.zeros(bars, dtype=np.int64)
+        self.bar_active = np.zeros(bars, dtype=np.bool_)
+
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        """Start a new round in every environment and return observations."""
+        self._reset(np.arange(self.num_envs))
+        return self.observe()
+
+    def _reset(self, envs: np.ndarray) -> None:
+        """Start a new round in the environments ``envs``."""
+        width = Paddle.WIDTH
+        self.paddle_rx[envs] = Screen.WIDTH // 2 - width // 2
+        self.paddle_x[envs] = self.paddle_rx[envs]
+        self.paddle_width[envs] = width
+        self.paddle_vx[envs] = 0.0
+        self.paddle_target_vx[envs] = 0.0
+        self.paddle_start_vx[envs] = 0.0
+        self.transition_t[envs] = 1.0
+        self.paddle_power_timer[envs] = 0.0
+        self.slow_timer[envs] = 0.0
+        self.score[envs] = 0
+        self.alive[envs] = False
+        self.inside[envs] = False
+        self.bar_active[envs] = False
+
+        # One ball, placed and launched like ``entities.create_ball``.
+        rng = self.rng
+        count = len(envs)
+        centre_x = rng.integers(40, Screen.WIDTH - 40, count, endpoint=True)
+        self._place(
+            envs,
+            np.zeros(count, dtype=np.int64),
+            centre_x - Ball.SIZE // 2,
+            np.full(count, Screen.HEIGHT // 2 - Ball.SIZE // 2),
+            rng.integers(*Ball.SPEED_X_RANGE, count).astype(np.float64),
+            rng.integers(*Ball.SPEED_Y_RANGE, count).astype(np.float64),
+        )
+
+    def _place(
+        self,
+        envs: np.ndarray,
+        slots: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray,
+        vx: np.ndarray,
+        vy: np.ndarray,
+    ) -> None:
+        """Put balls with hitbox corner ``(x, y)`` into ball slots."""
+        self.x[envs, slots] = x
+        self.y[envs, slots] = y
+        self.px[envs, slots] = x
+        self.py[envs, slots] = y
+        self.rx[envs, slots] = x
+        self.ry[envs, slots] = y
+        self.vx[envs, slots] = vx
+        self.vy[envs, slots] = vy
+        self.alive[envs, slots] = True
+
+    def _resize_paddle(self, envs: np.ndarray, width: int) -> None:
+        """Set the paddle width of ``envs``, keeping it centred in place."""
+        centre = self.paddle_rx[envs] + self.paddle_width[envs] // 2
+        self.paddle_width[envs] = width
+        self.paddle_rx[envs] = centre - width // 2
+
+    def observe(self) -> np.ndarray:
+        """Return the observations of the current state."""
+        alive = self.alive
+        balls = np.stack(
+            (self.x, self.y, self.vx, self.vy, alive), axis=2
+        ) * alive[:, :, None]
+        active = self.bar_active
+        bars = np.stack(
+            (self.bar_left, self.bar_top, self.bar_type, active), axis=2
+        ) * active[:, :, None]
+        paddle = np.column_stack(
+            (
+                self.paddle_rx,
+                self.paddle_vx,
+                self.paddle_width,
+                self.slow_timer,
+            )
+        )
+        return np.concatenate(
+            (
+                paddle,
+                balls.reshape(self.num_envs, -1),
+                bars.reshape(self.num_envs, -1),
+            ),
+            axis=1,
+        ).astype(np.float32)
+
+    def step(
+        self, actions: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Advance every environment by one physics step.
+
+        Parameters
+        ----------
+        actions:
+            Control bitset of every environment, shape ``(num_envs,)``.
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+            Observations, rewards and done flags.  The reward is the score
+            gained this step, i.e. the number of paddle hits.  An
+            environment is done when its last ball was missed; it has
+            already been reset, so its observation shows the new round and
+            ``final_score`` holds the score of the round that ended.
+        """
+        actions = np.asarray(actions)
+        dt = self.dt
+        frames = dt * Screen.FPS
+
+        slowed = self.slow_timer > 0
+        self.slow_timer[slowed] = np.maximum(self.slow_timer[slowed] - dt, 0)
+        speed = np.where(
+            self.slow_timer > 0, SlowPowerup.SPEED_FACTOR, 1.0
+        ) * frames
+
+        timed = self.paddle_power_timer > 0
+        self.paddle_power_timer[timed] -= dt
+        restore = timed & (self.paddle_power_timer <= 0)
+        if restore.any():
+            self._resize_paddle(np.flatnonzero(restore), Paddle.WIDTH)
+
+        self._move_paddles(actions, dt, frames)
+        if self.max_powerups:
+            self._spawn_powerups(frames)
+        live = self.alive.copy()
+        rewards = self._move_balls(speed, live)
+        if self.max_powerups and self.bar_active.any():
+            self._collide_powerups(live)
+
+        self.bar_timer[self.bar_active] -= dt
+        self.bar_active &= self.bar_timer > 0
+
+        self.score += rewards
+        dones = ~self.alive.any(axis=1)
+        if dones.any():
+            envs = np.flatnonzero(dones)
+            self.final_score[envs] = self.score[envs]
+            self._reset(envs)
+        return self.observe(), rewards, dones
+
+    def _move_paddles(
+        self, actions: np.ndarray, dt: float, frames: float
+    ) -> None:
+        """Ease every paddle towards the velocity its controls ask for."""
+        rx, width = self.paddle_rx, self.paddle_width
+        target = np.zeros(self.num_envs)
+        target[((actions & LEFT) != 0) & (rx > 0)] = -Paddle.SPEED
+        target[((actions & RIGHT) != 0) & (rx + width < Screen.WIDTH)] = (
+            Paddle.SPEED
+        )
+
+        changed = target != self.paddle_target_vx
+        self.paddle_target_vx = target
+        self.paddle_start_vx[changed] = self.paddle_vx[changed]
+        self.transition_t[changed] = 0.0
+
+        easing = self.transition_t < 1.0
+        t = np.minimum(self.transition_t + Paddle.TRANSITION_RATE * dt, 1.0)
+        self.transition_t[easing] = t[easing]
+        # The curve of ``utils.snappy_ease``; ``t`` is already in [0, 1].
+        prog = cubic_bezier(t, 0.0, 0.1, 0.9, 1.0)
+        start = self.paddle_start_vx
+        self.paddle_vx = np.where(
+            easing, start + (target - start) * prog, target
+        )
+
+        # Move and clamp, resyncing the sub-pixel position whenever the
+        # rect was moved directly, exactly like ``GameState.step``.
+        x = np.where(
+            rx != np.trunc(self.paddle_x), rx, self.paddle_x
+        ) + self.paddle_vx * frames
+        moved = np.trunc(x)
+        rx[:] = np.clip(moved, 0, Screen.WIDTH - width)
+        self.paddle_x = np.where(rx != moved, rx, x)
+
+    def _spawn_powerups(self, frames: float) -> None:
+        """Randomly show a bar in environments with a free bar slot."""
+        spawn_prob = 1.0 - (
+            1.0 - sum(settings.CHANCE for settings in _SETTINGS)
+        ) ** frames
+        rng = self.rng
+        free = ~self.bar_active
+        spawn = free.any(axis=1) & (rng.random(self.num_envs) < spawn_prob)
+        if not spawn.any():
+            return
+        envs = np.flatnonzero(spawn)
+        slots = free[envs].argmax(axis=1)
+        kinds = rng.integers(len(_SETTINGS), size=len(envs))
+        width = np.array([s.WIDTH for s in _SETTINGS])[kinds]
+        height = np.array([s.HEIGHT for s in _SETTINGS])[kinds]
+        left = rng.integers(20, Screen.WIDTH - width - 20, endpoint=True)
+        top = rng.integers(80, Screen.HEIGHT // 2, len(envs), endpoint=True)
+        self.bar_left[envs, slots] = left
+        self.bar_top[envs, slots] = top
+        self.bar_right[envs, slots] = left + width
+        self.bar_bottom[envs, slots] = top + height
+        self.bar_timer[envs, slots] = np.array(
+            [s.DURATION for s in _SETTINGS]
+        )[kinds]
+        self.bar_type[envs, slots] = kinds
+        self.bar_active[envs, slots] = True
+        self.inside[envs, :, slots] = False
+
+    def _move_balls(self, speed: np.ndarray, live: np.ndarray) -> np.ndarray:
+        """Advance every ball like :meth:`physics.BallStore.step`.
+
+        Returns the number of paddle hits in each environment.
+        """
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        px, py = self.px, self.py
+        px[:] = x
+        py[:] = y
+        factor = speed[:, None]
+
+        vy += Ball.GRAVITY * factor
+        x += vx * factor
+        y += vy * factor
+
+        span = Screen.WIDTH - Ball.SIZE
+        left = (x <= 0) & (vx < 0)
+        right = (x >= span) & (vx > 0)
+        x[left] *= -1
+        x[right] = 2 * span - x[right]
+        vx[left | right] *= -1
+
+        top = (y <= 0) & (vy < 0)
+        y[top] *= -1
+        vy[top] *= -1
+        if top.any():
+            speed_top = np.hypot(vx[top], vy[top])
+            boosted = np.minimum(
+                speed_top * Ball.SPEED_INCREMENT, Ball.MAX_SPEED
+            )
+            scale = np.where(
+                speed_top < Ball.MAX_SPEED,
+                boosted / np.maximum(speed_top, 1e-12),
+                1.0,
+            )
+            vx[top] *= scale
+            vy[top] *= scale
+
+        shape = x.shape
+        paddle_top = Screen.HEIGHT - 20 - Paddle.HEIGHT
+        paddle_left = np.broadcast_to(self.paddle_rx[:, None], shape)
+        paddle_right = paddle_left + self.paddle_width[:, None]
+        toi = sweep_bounds(
+            px.ravel(),
+            py.ravel(),
+            x.ravel(),
+            y.ravel(),
+            paddle_left.ravel(),
+            paddle_top,
+            paddle_right.ravel(),
+            paddle_top + Paddle.HEIGHT,
+        ).reshape(shape)
+        hit = (toi <= 1) & (vy > 0) & live
+        if hit.any():
+            t = toi[hit]
+            hit_x = px[hit] + (x[hit] - px[hit]) * t
+            hit_y = py[hit] + (y[hit] - py[hit]) * t
+            y[hit] = 2 * hit_y - y[hit]
+            centre = paddle_left + self.paddle_width[:, None] // 2
+            offset = (hit_x + Ball.SIZE / 2 - centre[hit]) / (
+                Paddle.WIDTH / 2
+            )
+            paddle_vx = np.broadcast_to(self.paddle_vx[:, None], shape)
+            vy[hit] *= -1
+            new_vx = (
+                vx[hit]
+                + offset * Ball.ANGLE_INFLUENCE
+                + paddle_vx[hit] * Paddle.VEL_INFLUENCE
+            )
+            vx[hit] = np.clip(
+                new_vx * Ball.SPEED_INCREMENT, -Ball.MAX_SPEED, Ball.MAX_SPEED
+            )
+            vy[hit] = np.clip(
+                vy[hit] * Ball.SPEED_INCREMENT, -Ball.MAX_SPEED, Ball.MAX_SPEED
+            )
+
+        self.rx[:] = np.rint(x)
+        self.ry[:] = np.rint(y)
+        self.alive &= self.ry <= Screen.HEIGHT
+        return np.count_nonzero(hit, axis=1)
+
+    def _collide_powerups(self, live: np.ndarray) -> None:
+        """Apply every bar to the balls whose path met it this step.
+
+        Follows ``GameState._collide_powerups``: all hits are found first,
+        then each bar's effect is applied in slot order.  ``live`` marks the
+        balls that were in play when the step began.
+        """
+        per_bar = self.max_balls
+        hits = []
+        for slot in range(self.max_powerups):
+            envs = np.flatnonzero(self.bar_active[:, slot])
+            if not envs.size:
+                continue
+            toi = sweep_bounds(
+                self.px[envs].ravel(),
+                self.py[envs].ravel(),
+                self.x[envs].ravel(),
+                self.y[envs].ravel(),
+                np.repeat(self.bar_left[envs, slot], per_bar),
+                np.repeat(self.bar_top[envs, slot], per_bar),
+                np.repeat(self.bar_right[envs, slot], per_bar),
+                np.repeat(self.bar_bottom[envs, slot], per_bar),
+            ).reshape(len(envs), per_bar)
+            hit = (toi <= 1) & live[envs]
+            fresh = hit & ~self.inside[envs, :, slot]
+            self.inside[envs, :, slot] = hit
+            hits.append((slot, envs, hit, fresh))
+
+        for slot, envs, hit, fresh in hits:
+            kinds = self.bar_type[envs, slot]
+            slow = envs[(kinds == _SLOW) & hit.any(axis=1)]
+            self.slow_timer[slow] = SlowPowerup.EFFECT_TIME
+            self.bar_active[slow, slot] = False
+
+            entered = fresh.any(axis=1)
+            for kind, width in (
+                (
+                    _PADDLE_BIG,
+                    int(Paddle.WIDTH * PaddleBigPowerup.ENLARGE_FACTOR),
+                ),
+                (
+                    _PADDLE_SMALL,
+                    int(Paddle.WIDTH * PaddleSmallPowerup.SHRINK_FACTOR),
+                ),
+            ):
+                resized = envs[(kinds == kind) & entered]
+                if resized.size:
+                    self._resize_paddle(resized, width)
+                    self.paddle_power_timer[resized] = (
+                        PaddleBigPowerup.SIZE_DURATION
+                    )
+
+            rows, parents = np.nonzero(fresh & (kinds == _DUPLICATE)[:, None])
+            if rows.size:
+                self._duplicate(envs[rows], parents)
+
+    def _duplicate(self, envs: np.ndarray, parents: np.ndarray) -> None:
+        """Copy the balls ``parents`` of ``envs`` into free ball slots.
+
+        ``envs`` must be sorted.  Copies leave from the centre of their
+        parent at the same speed in a random direction, like duplicates in
+        :class:`game.GameState`; those without a free slot are dropped.
+        """
+        # The n-th copy in an environment takes its n-th free slot.
+        rank = np.arange(len(envs)) - np.searchsorted(envs, envs)
+        free = ~self.alive[envs]
+        fits = rank < np.count_nonzero(free, axis=1)
+        if not fits.any():
+            return
+        slots = np.argsort(~free, axis=1, kind="stable")[fits, rank[fits]]
+        envs, parents = envs[fits], parents[fits]
+
+        vx, vy = self.vx[envs, parents], self.vy[envs, parents]
+        speed = np.hypot(vx, vy)
+        angle = self.rng.uniform(0.1, 3.04, len(envs))
+        # Redraw near-vertical directions, as ``utils.duplicate_velocity``
+        # does.
+        retry = np.abs(speed * np.cos(angle)) < 1e-3
+        while retry.any():
+            angle[retry] = self.rng.uniform(0.1, 3.04, np.count_nonzero(retry))
+            retry = np.abs(speed * np.cos(angle)) < 1e-3
+        new_vy = speed * np.sin(angle)
+        new_vy[vy < 0] *= -1
+
+        self._place(
+            envs,
+            slots,
+            self.rx[envs, parents],
+            self.ry[envs, parents],
+            speed * np.cos(angle),
+            new_vy,
+        )
+        # Start inside the same bars so the copy does not re-trigger them.
+        self.inside[envs, slots] = self.inside[envs, parents]
+
+
+__all__ = [
+    "VecPongEnv",
+    "POWERUP_TYPES",
+    "PADDLE_FEATURES",
+    "BALL_FEATURES",
+    "BAR_FEATURES",
+]